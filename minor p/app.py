@@ -1,54 +1,87 @@
 # app.py
+"""
+Flask application factory.
+
+    from app import create_app
+    app = create_app()
+
+Face recognition (dlib models, OpenCV) is only imported by the first
+recognition or enrollment request, so pages such as /students and test
+clients start without it. Processes that will serve recognition can load
+it up front with create_app(warm_up=True), WARM_UP_MODELS in config.py,
+or by calling warm_up_recognition() from a server hook, e.g. gunicorn's
+post_worker_init.
+"""
 from flask import Flask, render_template
 import os
 
-# -------------------------------------------------
-# Create Required Project Directories
-# -------------------------------------------------
-os.makedirs("database", exist_ok=True)
-os.makedirs("static", exist_ok=True)
-os.makedirs("templates", exist_ok=True)
+from config import SECRET_KEY, WARM_UP_MODELS
 
-# -------------------------------------------------
-# Flask App Initialization
-# -------------------------------------------------
-app = Flask(__name__)
-app.secret_key = "supersecretkey"
 
 # -------------------------------------------------
-# Initialize Databases Before Routes
+# Recognition Warm-up
 # -------------------------------------------------
-from database.db_utils import init_databases
-init_databases()
+def warm_up_recognition():
+    """
+    Loads everything a recognition request needs: the worker pool when
+    RECOGNITION_WORKERS > 0 (each worker warms itself up), otherwise the
+    face models and gallery in this process.
+    """
+    from services.recognition_pool import get_recognition_pool
 
-# -------------------------------------------------
-# Blueprints Import (AFTER DB INIT)
-# -------------------------------------------------
-from routes.enroll import enroll_bp
-from routes.attendance import attendance_bp
-from routes.students import students_bp
-from routes.attendance_list import attendance_list_bp
-from routes.add_student import add_student_bp
+    if get_recognition_pool() is not None:
+        print("🔥 Recognition workers starting")
+        return
+    from services.face_service import warm_up
+
+    print(f"🔥 Face models warmed up in {warm_up():.0f} ms")
 
-# -------------------------------------------------
-# Register Blueprints
-# -------------------------------------------------
-app.register_blueprint(enroll_bp)
-app.register_blueprint(attendance_bp)
-app.register_blueprint(students_bp)
-app.register_blueprint(attendance_list_bp)
-app.register_blueprint(add_student_bp)
 
 # -------------------------------------------------
-# Home Route
+# App Factory
 # -------------------------------------------------
-@app.route("/")
-def index():
-    return render_template("index.html")
+def create_app(init_db=True, warm_up=WARM_UP_MODELS):
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+
+    # Create required project directories
+    for folder in ("database", "static", "templates"):
+        os.makedirs(os.path.join(app.root_path, folder), exist_ok=True)
+
+    # Initialize databases before routes
+    if init_db:
+        from database.db_utils import init_databases
+        init_databases()
+
+    # Blueprints import (after DB init)
+    from routes.enroll import enroll_bp
+    from routes.attendance import attendance_bp
+    from routes.students import students_bp
+    from routes.attendance_list import attendance_list_bp
+    from routes.add_student import add_student_bp
+    from routes.dashboard import dashboard_bp
+    from routes.metrics import metrics_bp
+
+    app.register_blueprint(enroll_bp)
+    app.register_blueprint(attendance_bp)
+    app.register_blueprint(students_bp)
+    app.register_blueprint(attendance_list_bp)
+    app.register_blueprint(add_student_bp)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Home route
+    @app.route("/")
+    def index():
+        return render_template("index.html")
+
+    if warm_up:
+        warm_up_recognition()
+    return app
 
 
 # -------------------------------------------------
 # Run Flask
 # -------------------------------------------------
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
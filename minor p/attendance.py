@@ -1,32 +1,35 @@
 # attendance.py
-import cv2, os, sqlite3
-import numpy as np
-import face_recognition
+"""
+Mark attendance from a local camera window, or headless from video files,
+image folders and streams:
+
+    python attendance.py                                   # webcam window, 'q' to stop
+    python attendance.py --headless lecture1.mp4 lecture2.mp4 rtsp://cam3/stream
+    python attendance.py --headless recordings/*.mp4 --fps 1 --start "2026-10-18 09:00"
+"""
+import argparse
+import json
+import cv2
 from datetime import datetime
 
-STUD_DB = "database/students.db"
-ATT_DB = "database/attendance.db"
-STUDENTS_DIR = "students"
-EMBED_DIR = "embeddings"
+from config import SCENE_GATE
+from services.attendance_writer import get_attendance_writer
+from services.gallery import get_gallery
+from services.face_service import load_models, match_face_encodings
+from services.scene_gate import thumbnail_from_image
+from services.tracker import FaceTracker
 
 
 def mark_attendance_with_camera():
-    known_encodings = []
-    known_rolls = []
-    known_names = []
-
-    # Load all known faces
-    conn = sqlite3.connect(STUD_DB)
-    c = conn.cursor()
-    c.execute("SELECT name, roll FROM students")
-    for name, roll in c.fetchall():
-        path = os.path.join(EMBED_DIR, f"{roll}.npy")
-        if os.path.exists(path):
-            known_encodings.append(np.load(path))
-            known_rolls.append(roll)
-            known_names.append(name)
-    conn.close()
+    from database.db_utils import init_databases
 
+    init_databases()
+
+    # Load all known faces from students.db once (one bulk read)
+    get_gallery().snapshot()
+
+    face_recognition = load_models()
+    tracker = FaceTracker()
     cap = cv2.VideoCapture(0)
     print("📸 Attendance marking started. Press 'q' to stop.")
 
@@ -38,18 +41,28 @@ def mark_attendance_with_camera():
         small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
         rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
 
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-
-        for encoding in face_encodings:
-            matches = face_recognition.compare_faces(known_encodings, encoding, tolerance=0.45)
-            face_distances = face_recognition.face_distance(known_encodings, encoding)
-            best_match_index = np.argmin(face_distances) if len(face_distances) > 0 else None
-
-            if best_match_index is not None and matches[best_match_index]:
-                name = known_names[best_match_index]
-                roll = known_rolls[best_match_index]
-                mark_attendance(name, roll)
+        # Nothing moved since the last processed frame: keep its tracks
+        thumb = thumbnail_from_image(rgb_frame) if SCENE_GATE else None
+        if thumb is not None and not tracker.gate.changed(thumb):
+            tracker.touch()
+        else:
+            face_locations = face_recognition.face_locations(rgb_frame)
+
+            # Only encode faces the tracker has not already identified
+            tracks, to_encode = tracker.step(face_locations)
+            face_encodings = face_recognition.face_encodings(
+                rgb_frame, [face_locations[i] for i in to_encode]
+            )
+
+            identities = match_face_encodings(face_encodings)
+            for i, identity in zip(to_encode, identities):
+                tracker.resolve(tracks[i], identity)
+
+            for track in tracks:
+                if track.identity is not None:
+                    roll, name, _ = track.identity
+                    mark_attendance(name, roll)
+            tracker.gate.update(thumb, None)
 
         cv2.imshow("Attendance", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -57,20 +70,77 @@ def mark_attendance_with_camera():
 
     cap.release()
     cv2.destroyAllWindows()
+    get_attendance_writer().flush()
 
 
 def mark_attendance(name, roll):
-    conn = sqlite3.connect(ATT_DB)
-    c = conn.cursor()
-    date = datetime.now().strftime("%Y-%m-%d")
-    time = datetime.now().strftime("%H:%M:%S")
-
-    c.execute("SELECT * FROM attendance WHERE roll=? AND date=?", (roll, date))
-    exists = c.fetchone()
-    if not exists:
-        c.execute("INSERT INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
-                  (roll, name, date, time))
-        conn.commit()
-        print(f"✅ Marked {name} ({roll}) present at {time}")
-
-    conn.close()
+    if get_attendance_writer().submit(roll, name):
+        print(f"✅ Marked {name} ({roll}) present at {datetime.now().strftime('%H:%M:%S')}")
+
+
+# ---------- Headless ingestion ----------
+def ingest_sources(specs, args):
+    from database.db_utils import init_databases
+    from services.ingest import IngestEngine, IngestError, open_source
+
+    init_databases()
+    sources = []
+    for spec in specs:
+        try:
+            sources.append(open_source(spec, sequence_fps=args.sequence_fps))
+        except IngestError as e:
+            print(f"⚠️ Skipping {spec}: {e}")
+    if not sources:
+        print("❌ No usable sources.")
+        return 1
+
+    engine = IngestEngine(
+        sources, sample_fps=args.fps, workers=args.workers, start_time=args.start,
+        class_name=args.class_name, section=args.section, inline=args.inline,
+    )
+    try:
+        reports = engine.run()
+    except IngestError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+    return 1 if any(r["error"] for r in reports) else 0
+
+
+def main():
+    from config import INGEST_SAMPLE_FPS, INGEST_WORKERS
+
+    parser = argparse.ArgumentParser(description="Mark attendance from a camera or recordings.")
+    parser.add_argument("--headless", nargs="+", metavar="SOURCE",
+                        help="video files, image folders/globs, stream URLs or camera indexes")
+    parser.add_argument("--fps", type=float, default=INGEST_SAMPLE_FPS,
+                        help="frames sampled per second of each source")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="recognition processes (0 = CPUs, at most one per source)")
+    parser.add_argument("--inline", action="store_true",
+                        help="recognize in this process instead of a worker pool")
+    parser.add_argument("--start", help='recording start "YYYY-MM-DD HH:MM"; marks are dated '
+                                        "start + position in the video instead of now")
+    parser.add_argument("--sequence-fps", type=float,
+                        help="frame rate of image sequences (default: each image is one sample)")
+    parser.add_argument("--class", dest="class_name", help="match this class first")
+    parser.add_argument("--section")
+    parser.add_argument("--report", help="write per-source stats to this JSON file")
+    args = parser.parse_args()
+    if args.start:
+        try:
+            args.start = datetime.strptime(args.start, "%Y-%m-%d %H:%M")
+        except ValueError:
+            parser.error('--start must look like "2026-10-18 09:00"')
+
+    if not args.headless:
+        mark_attendance_with_camera()
+        return 0
+    return ingest_sources(args.headless, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
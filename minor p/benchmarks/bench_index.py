@@ -0,0 +1,81 @@
+"""
+benchmarks/bench_index.py
+Recall-vs-latency of the IVF index against the exact scan.
+
+Runs offline on synthetic encodings. From the project directory:
+
+    python -m benchmarks.bench_index --sizes 10000 100000 --nprobe 1 4 8 16
+
+Prints one JSON object per (size, backend, nprobe) line.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_gallery, synthetic_queries
+from services.face_index import ExactIndex, IVFIndex
+from services.matcher import squared_norms
+
+
+def time_search(index, queries, matrix, sq_norms, tolerance, batch, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parts = [index.search(queries[i : i + batch], matrix, sq_norms, tolerance)
+                 for i in range(0, len(queries), batch)]
+        best = min(best, time.perf_counter() - start)
+        result = np.concatenate([p.indices for p in parts])
+    return result, best
+
+
+def run(sizes, nprobes, n_queries, batch, tolerance, repeat):
+    for n in sizes:
+        matrix = synthetic_gallery(n)
+        sq_norms = squared_norms(matrix)
+        queries = synthetic_queries(matrix, min(n_queries, n))
+
+        exact_idx, exact_s = time_search(ExactIndex(), queries, matrix, sq_norms,
+                                         tolerance, batch, repeat)
+        yield {
+            "size": n, "backend": "exact", "nprobe": None, "recall_at_1": 1.0,
+            "ms_per_frame": 1000.0 * exact_s / (len(queries) / batch),
+        }
+
+        start = time.perf_counter()
+        ivf = IVFIndex.train(matrix)
+        train_s = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            ivf.nprobe = min(nprobe, len(ivf.centroids))
+            ivf_idx, ivf_s = time_search(ivf, queries, matrix, sq_norms,
+                                         tolerance, batch, repeat)
+            yield {
+                "size": n, "backend": "ivf", "nprobe": ivf.nprobe,
+                "n_lists": len(ivf.centroids),
+                "recall_at_1": float(np.mean(ivf_idx == exact_idx)),
+                "ms_per_frame": 1000.0 * ivf_s / (len(queries) / batch),
+                "train_s": train_s,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--faces-per-frame", type=int, default=40)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for row in run(args.sizes, args.nprobe, args.queries, args.faces_per_frame,
+                   args.tolerance, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+benchmarks/bench_lists.py
+Render time of the attendance and students list pages at large row counts.
+
+Seeds throwaway databases with a synthetic roster and enough school days
+of attendance to reach each requested row count, then times the HTML pages
+and their JSON variants through the Flask test client: the first page, a
+deep page reached by following the keyset cursor, and class-filtered views.
+From the project directory:
+
+    python -m benchmarks.bench_lists --rows 100000 1000000 --students 5000
+
+Prints one JSON object per (rows, view) line.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+from flask import Flask
+
+from benchmarks.synthetic import (
+    percentiles,
+    seed_attendance,
+    seed_students,
+    synthetic_roster,
+    temp_databases,
+)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRESENT = 0.9
+
+
+def make_app():
+    from routes.attendance_list import attendance_list_bp
+    from routes.students import students_bp
+
+    app = Flask(__name__, root_path=PROJECT_DIR)  # project templates/ and static/
+    app.register_blueprint(attendance_list_bp)
+    app.register_blueprint(students_bp)
+    return app
+
+
+def _cursor_after(client, api, pages, limit):
+    """Follows the JSON API's `next` cursor `pages` times."""
+    cursor = None
+    for _ in range(pages):
+        params = {"limit": limit}
+        if cursor:
+            params["after"] = cursor
+        cursor = client.get(api, query_string=params).get_json()["next"]
+        if cursor is None:
+            break
+    return cursor
+
+
+def _time_view(client, url, params, repeat):
+    samples, size = [], 0
+    client.get(url, query_string=params)  # warm-up: templates, statement cache
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = client.get(url, query_string=params)
+        samples.append(1000.0 * (time.perf_counter() - start))
+        size = len(resp.data)
+        assert resp.status_code == 200, (url, resp.status_code)
+    return {**percentiles(samples), "bytes": size}
+
+
+def run(row_counts, students=5000, repeat=20, deep_pages=50):
+    app = make_app()
+    client = app.test_client()
+    roster = synthetic_roster(students)
+
+    for rows in row_counts:
+        with temp_databases():
+            seed_students(roster)
+            start = time.perf_counter()
+            written = seed_attendance(roster, days=math.ceil(rows / (students * PRESENT)))
+            seed_s = time.perf_counter() - start
+
+            deep_att = _cursor_after(client, "/api/attendance", deep_pages, 100)
+            deep_stud = _cursor_after(client, "/api/students", min(deep_pages, students // 100), 100)
+            views = [
+                ("attendance_html_first", "/attendance_list", {}),
+                ("attendance_html_first_1000", "/attendance_list", {"limit": 1000}),
+                ("attendance_html_deep", "/attendance_list", {"after": deep_att}),
+                ("attendance_html_class", "/attendance_list", {"class_name": "Class 3", "section": "A"}),
+                ("attendance_json_first", "/api/attendance", {}),
+                ("attendance_json_deep", "/api/attendance", {"after": deep_att}),
+                ("students_html_first", "/students", {}),
+                ("students_html_deep", "/students", {"after": deep_stud}),
+                ("students_html_class", "/students", {"class_name": "Class 3", "section": "A"}),
+                ("students_json_first", "/api/students", {}),
+            ]
+            for view, url, params in views:
+                params = {k: v for k, v in params.items() if v is not None}
+                yield {
+                    "rows": written,
+                    "students": students,
+                    "view": view,
+                    "seed_s": round(seed_s, 2),
+                    **_time_view(client, url, params, repeat),
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for row in run(args.rows, args.students, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
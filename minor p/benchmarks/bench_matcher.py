@@ -0,0 +1,88 @@
+"""
+benchmarks/bench_matcher.py
+Matcher throughput: faces matched per second against synthetic galleries.
+
+Compares the vectorized GEMM matcher (services/matcher.py) in float64 and
+float32 with the original one-face-at-a-time distance loop. From the
+project directory:
+
+    python -m benchmarks.bench_matcher --sizes 1000 10000 100000 --faces 1 10 40
+
+Prints one JSON object per (size, faces, method) line.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_gallery, synthetic_queries
+from services.matcher import match_faces, squared_norms
+
+
+def per_face_loop(queries, known, tolerance):
+    """The pre-GEMM path: one full distance scan per face."""
+    out = []
+    for q in queries:
+        distances = np.linalg.norm(known - q, axis=1)
+        best = int(np.argmin(distances))
+        out.append(best if distances[best] <= tolerance else -1)
+    return out
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, faces_per_frame, tolerance=0.5, repeat=5, frames=20):
+    for n in sizes:
+        gallery64 = synthetic_gallery(n)
+        gallery32 = gallery64.astype(np.float32)
+        norms64, norms32 = squared_norms(gallery64), squared_norms(gallery32)
+
+        for faces in faces_per_frame:
+            queries = synthetic_queries(gallery64, min(faces * frames, n))
+            batches = [queries[i : i + faces] for i in range(0, len(queries), faces)]
+
+            methods = [
+                ("gemm_float64", lambda: [match_faces(b, gallery64, tolerance, known_sq_norms=norms64)
+                                          for b in batches]),
+                ("gemm_float32", lambda: [match_faces(b.astype(np.float32), gallery32, tolerance,
+                                                      known_sq_norms=norms32) for b in batches]),
+            ]
+            # The loop is O(faces x N) Python-level passes; skip it where it would take minutes
+            if n * len(queries) <= 50_000_000:
+                methods.append(("per_face_loop", lambda: [per_face_loop(b, gallery64, tolerance)
+                                                          for b in batches]))
+
+            for method, fn in methods:
+                seconds = best_of(fn, repeat)
+                yield {
+                    "size": n,
+                    "faces_per_frame": faces,
+                    "method": method,
+                    "ms_per_frame": round(1000.0 * seconds / len(batches), 4),
+                    "faces_per_s": round(len(queries) / seconds, 1),
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for row in run(args.sizes, args.faces, args.tolerance, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
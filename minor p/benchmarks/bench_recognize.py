@@ -0,0 +1,131 @@
+"""
+benchmarks/bench_recognize.py
+End-to-end latency of POST /attendance/recognize through the Flask test
+client, against throwaway databases seeded with synthetic students.
+
+Frames are synthetic multi-face JPEGs posted as raw image bodies. Two
+detector modes:
+
+  * planted (default) - face_recognition is replaced by benchmarks.synthetic
+    .PlantedFaces, which returns the boxes each frame was drawn with and
+    noisy copies of enrolled encodings. Measures everything around the
+    dlib networks (request parsing, decode, resize, tracker, gallery,
+    matcher, attendance writer, JSON) with a known number of faces.
+  * dlib - the real pipeline. Drawn faces are not detected by dlib, so this
+    mostly measures decode + detection cost for the frame size.
+
+Each case runs "cold" (a new camera per request, so every face is encoded
+and matched), "tracked" (one camera with the scene gate off, so the
+tracker reuses identities but every frame is still detected) and "static"
+(one camera, gate on: the unchanged frame is answered by the scene gate).
+From the project directory:
+
+    python -m benchmarks.bench_recognize --sizes 1000 10000 --faces 1 10 30
+
+Prints one JSON object per (size, faces, tracking) line.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from flask import Flask
+
+from benchmarks.synthetic import (
+    PlantedFaces,
+    percentiles,
+    seed_students,
+    synthetic_frame,
+    synthetic_roster,
+    temp_databases,
+)
+
+
+def make_app():
+    from routes.attendance import attendance_bp
+
+    app = Flask(__name__)
+    app.debug = True  # per-stage timings in the response body
+    app.register_blueprint(attendance_bp)
+    return app
+
+
+def run(sizes, faces_per_frame, frame_size=(1280, 720), requests=50, detector="planted"):
+    from services import face_service
+
+    app = make_app()
+    client = app.test_client()
+    width, height = frame_size
+
+    for n in sizes:
+        roster = synthetic_roster(n)
+        with temp_databases():
+            seed_students(roster)
+            client.get("/attendance/gallery/stats")  # load the gallery outside the timings
+
+            for faces in faces_per_frame:
+                jpeg, boxes = synthetic_frame(width, height, faces, seed=faces)
+                real_module, gate = face_service.face_recognition, face_service.SCENE_GATE
+                if detector == "planted":
+                    face_service.face_recognition = PlantedFaces(
+                        frame_size, boxes, [roster[i % n][4] for i in range(faces)]
+                    )
+                try:
+                    for tracking in ("cold", "tracked", "static"):
+                        face_service.SCENE_GATE = tracking != "tracked"
+                        yield _measure(client, jpeg, n, faces, tracking, requests,
+                                       detector, frame_size)
+                finally:
+                    face_service.face_recognition = real_module
+                    face_service.SCENE_GATE = gate
+
+
+def _measure(client, jpeg, n, faces, tracking, requests, detector, frame_size):
+    latencies, stages, matched = [], {}, 0
+    for i in range(requests + 1):
+        camera = f"bench-{n}-{faces}-{i if tracking == 'cold' else 0}"
+        start = time.perf_counter()
+        resp = client.post(f"/attendance/recognize?camera_id={camera}", data=jpeg,
+                           content_type="image/jpeg")
+        elapsed = 1000.0 * (time.perf_counter() - start)
+        body = resp.get_json()
+        if i == 0:
+            continue  # warm-up (first request also seeds the tracker)
+        latencies.append(elapsed)
+        matched += sum(1 for m in body.get("matches", []) if m.get("roll"))
+        for stage, value in (body.get("timings") or {}).items():
+            if stage.endswith("_ms"):
+                stages.setdefault(stage, []).append(value)
+
+    return {
+        "size": n,
+        "faces_per_frame": faces,
+        "tracking": tracking,
+        "detector": detector,
+        "frame": f"{frame_size[0]}x{frame_size[1]}",
+        "bytes_per_frame": len(jpeg),
+        "requests": requests,
+        **percentiles(latencies),
+        "frames_per_s": round(1000.0 * len(latencies) / sum(latencies), 2),
+        "matched_per_frame": round(matched / len(latencies), 2),
+        "stages_median_ms": {k: round(statistics.median(v), 3) for k, v in sorted(stages.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--frame", default="1280x720")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--detector", choices=["planted", "dlib"], default="planted")
+    args = parser.parse_args()
+
+    frame_size = tuple(int(v) for v in args.frame.lower().split("x"))
+    for row in run(args.sizes, args.faces, frame_size, args.requests, args.detector):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
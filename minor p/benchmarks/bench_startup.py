@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_startup.py
+App startup time, measured in fresh interpreter processes.
+
+Each run starts a new Python process (so nothing is cached in
+sys.modules) against throwaway databases and records:
+
+  * import_ms       - `from app import create_app`
+  * create_app_ms   - create_app(): database init + blueprint registration
+  * first_page_ms   - the first GET /students through the test client
+  * warm_up_ms      - face_service.warm_up() (dlib models + gallery), only
+                      when face_recognition is installed
+  * heavy_modules   - which of cv2 / PIL / face_recognition / dlib were
+                      imported by create_app() (should be none)
+
+From the project directory:
+
+    python -m benchmarks.bench_startup --runs 5 --students 1000
+
+Prints one JSON object per measurement line (median of the runs).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("cv2", "PIL", "face_recognition", "dlib")
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from benchmarks.synthetic import seed_students, synthetic_roster, temp_databases
+out = {}
+with temp_databases():
+    seed_students(synthetic_roster(%(students)d))
+    t = time.perf_counter()
+    from app import create_app
+    out["import_ms"] = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    app = create_app()
+    out["create_app_ms"] = (time.perf_counter() - t) * 1000
+    out["heavy_modules"] = sorted(m for m in %(heavy)r if m in sys.modules)
+    t = time.perf_counter()
+    assert app.test_client().get("/students").status_code == 200
+    out["first_page_ms"] = (time.perf_counter() - t) * 1000
+    if %(warm_up)r:
+        try:
+            import face_recognition  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            from services.face_service import warm_up
+            t = time.perf_counter()
+            warm_up()
+            out["warm_up_ms"] = (time.perf_counter() - t) * 1000
+print("RESULT " + json.dumps(out))
+"""
+
+
+def _child_run(students, warm_up):
+    code = CHILD % {"students": students, "heavy": HEAVY_MODULES, "warm_up": warm_up}
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True,
+                          text=True, check=True)
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):])
+
+
+def _interpreter_ms():
+    """Bare `python -c pass` wall time, the floor every process pays."""
+    import time
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(runs=5, students=1000, warm_up=True):
+    results = [_child_run(students, warm_up) for _ in range(runs)]
+    heavy = sorted({m for r in results for m in r["heavy_modules"]})
+    yield {"measure": "interpreter_ms", "runs": runs,
+           "median_ms": round(statistics.median(_interpreter_ms() for _ in range(runs)), 2)}
+    for measure in ("import_ms", "create_app_ms", "first_page_ms", "warm_up_ms"):
+        samples = [r[measure] for r in results if measure in r]
+        if samples:
+            yield {"measure": measure, "runs": runs, "students": students,
+                   "median_ms": round(statistics.median(samples), 2),
+                   "max_ms": round(max(samples), 2), "heavy_modules": heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--no-warm-up", action="store_true", help="skip the model warm-up step")
+    args = parser.parse_args()
+
+    for row in run(args.runs, args.students, not args.no_warm_up):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+benchmarks/bench_upload.py
+Bytes-on-wire and server CPU per frame: base64 JSON vs raw JPEG upload.
+
+Measures only the request-decoding stage (body -> RGB array), which is the
+part that differs between the two paths; detection and matching cost the
+same either way. From the project directory:
+
+    python -m benchmarks.bench_upload --sizes 320x240 640x480 --frames 500
+"""
+
+import argparse
+import base64
+import json
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+from services.image_io import decode_base64_payload, decode_image_bytes
+
+
+def synthetic_jpeg(width, height, quality=70, seed=0):
+    """A noisy gradient with a few blobs, so JPEG size is realistic."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    img = np.stack([x * 255 // width, y * 255 // height, (x + y) * 127 // (width + height)], -1)
+    img = img.astype(np.uint8)
+    for _ in range(12):
+        cx, cy, r = rng.integers(width), rng.integers(height), rng.integers(10, height // 4)
+        cv2.circle(img, (int(cx), int(cy)), int(r), rng.integers(0, 255, 3).tolist(), -1)
+    img = cv2.add(img, rng.integers(0, 20, img.shape, dtype=np.uint8))
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes()
+
+
+def legacy_base64_decode(body):
+    """The pre-binary server path: JSON, base64, PIL, np.array."""
+    from PIL import Image
+
+    data_url = json.loads(body)["image"]
+    _, encoded = data_url.split(",", 1)
+    img_bytes = base64.b64decode(encoded)
+    return np.array(Image.open(BytesIO(img_bytes)).convert("RGB"))
+
+
+def base64_decode(body):
+    return decode_image_bytes(decode_base64_payload(json.loads(body)["image"]))
+
+
+def cpu_ms_per_frame(fn, body, frames):
+    fn(body)  # warm-up
+    start = time.process_time()
+    for _ in range(frames):
+        fn(body)
+    return 1000.0 * (time.process_time() - start) / frames
+
+
+def run(sizes, frames, quality):
+    for width, height in sizes:
+        jpeg = synthetic_jpeg(width, height, quality)
+        data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+        json_body = json.dumps({"image": data_url}).encode("utf-8")
+
+        paths = [("raw_jpeg", decode_image_bytes, jpeg), ("base64_json", base64_decode, json_body)]
+        try:
+            import PIL  # noqa: F401
+            paths.append(("base64_json_pil_legacy", legacy_base64_decode, json_body))
+        except ImportError:
+            pass
+
+        for name, fn, body in paths:
+            yield {
+                "frame": f"{width}x{height}",
+                "path": name,
+                "bytes_on_wire": len(body),
+                "cpu_ms_per_frame": cpu_ms_per_frame(fn, body, frames),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", default=["320x240", "640x480", "1280x720"])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--quality", type=int, default=70)
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in s.lower().split("x")) for s in args.sizes]
+    for row in run(sizes, args.frames, args.quality):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+benchmarks/bench_writes.py
+Attendance write throughput with several threads marking at once.
+
+Compares the batched AttendanceWriter (services/attendance_writer.py) with
+one db_utils.mark_attendance() transaction per mark, on throwaway
+databases. Each student is sighted `repeats` times, as on a live camera.
+From the project directory:
+
+    python -m benchmarks.bench_writes --threads 1 4 16 --students 2000
+
+Prints one JSON object per (method, threads, repeats) line: the median of
+`rounds` runs. Wall time includes the final flush, so every mark is on
+disk when the clock stops.
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.synthetic import percentiles, seed_students, synthetic_roster, temp_databases
+from database.db_utils import get_db_connection, mark_attendance
+from services.attendance_writer import AttendanceWriter
+
+
+def _run_threads(n_threads, work):
+    """Runs work(t, samples) on n threads at once; returns (start time, per-call ms samples)."""
+    samples = [[] for _ in range(n_threads)]
+    barrier = threading.Barrier(n_threads + 1)
+
+    def target(t):
+        barrier.wait()
+        work(t, samples[t])
+
+    threads = [threading.Thread(target=target, args=(t,)) for t in range(n_threads)]
+    for th in threads:
+        th.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for th in threads:
+        th.join()
+    return start, [ms for s in samples for ms in s]
+
+
+def _count_rows(day):
+    conn = get_db_connection("attendance")
+    try:
+        return conn.execute("SELECT COUNT(*) FROM attendance WHERE date = ?", (day,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _one_case(method, roster, n_threads, rep, when):
+    """Marks every student `rep` times on `when`'s date; returns (seconds, samples, commits)."""
+    day = when.strftime("%Y-%m-%d")
+    shards = [roster[t::n_threads] for t in range(n_threads)]
+
+    if method == "writer":
+        writer = AttendanceWriter()
+
+        def work(t, samples):
+            for _ in range(rep):
+                for name, roll, *_ in shards[t]:
+                    s = time.perf_counter()
+                    writer.submit(roll, name, when)
+                    samples.append(1000.0 * (time.perf_counter() - s))
+
+        start, samples = _run_threads(n_threads, work)
+        writer.stop()
+        commits = writer.stats["flushes"]
+    else:
+        def work(t, samples):
+            for _ in range(rep):
+                for name, roll, *_ in shards[t]:
+                    s = time.perf_counter()
+                    mark_attendance(roll, name, day, "09:00:00")
+                    samples.append(1000.0 * (time.perf_counter() - s))
+
+        start, samples = _run_threads(n_threads, work)
+        commits = len(samples)
+
+    seconds = time.perf_counter() - start
+    assert _count_rows(day) == len(roster), (method, day)
+    return seconds, samples, commits
+
+
+def run(thread_counts, students=2000, repeats=(1, 5), rounds=3):
+    roster = synthetic_roster(students)
+    with temp_databases():
+        seed_students(roster)
+        day_no = 0
+
+        for rep in repeats:
+            for n_threads in thread_counts:
+                for method in ("writer", "per_mark"):
+                    # Each round marks a fresh date, so every round inserts every student once
+                    runs = []
+                    for _ in range(rounds):
+                        day_no += 1
+                        when = datetime(2025, 1, 1, 9, 0, 0) + timedelta(days=day_no)
+                        runs.append(_one_case(method, roster, n_threads, rep, when))
+                    seconds, samples, commits = sorted(runs, key=lambda r: r[0])[len(runs) // 2]
+                    yield {
+                        "method": method,
+                        "threads": n_threads,
+                        "repeats": rep,
+                        "students": students,
+                        "rounds": rounds,
+                        "commits": commits,
+                        "wall_s": round(seconds, 4),
+                        "marks_per_s": round(len(samples) / seconds, 1),
+                        "rows_per_s": round(students / seconds, 1),
+                        "call": percentiles(samples),
+                    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--rounds", type=int, default=3, help="runs per case; the median is reported")
+    args = parser.parse_args()
+
+    for row in run(args.threads, args.students, args.repeats, args.rounds):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
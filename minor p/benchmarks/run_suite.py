@@ -0,0 +1,193 @@
+"""
+benchmarks/run_suite.py
+Runs the whole benchmark suite offline and writes one JSON results file.
+
+    python -m benchmarks.run_suite                       # full sizes (1k/10k/100k)
+    python -m benchmarks.run_suite --quick               # small sizes, about a minute
+    python -m benchmarks.run_suite --only matcher lists
+    python -m benchmarks.run_suite --compare benchmarks/results/baseline.json
+
+The results file records the machine, library versions, git commit and the
+config knobs that affect speed, next to every benchmark's rows. Rows are
+identified by their parameters (size, faces, threads, ...), so --compare
+can line up two runs and report the change in each benchmark's headline
+metric. With --fail-on-regression the exit code is 1 when anything got
+slower than --threshold, for use in CI.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import config
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# name -> (module, key fields, headline metric, higher is better, quick kwargs, full kwargs)
+SUITE = {
+    "matcher": (
+        "benchmarks.bench_matcher", ("size", "faces_per_frame", "method"), "ms_per_frame", False,
+        {"sizes": [1000, 10000], "faces_per_frame": [1, 10, 40], "repeat": 3},
+        {"sizes": [1000, 10000, 100000], "faces_per_frame": [1, 10, 40]},
+    ),
+    "index": (
+        "benchmarks.bench_index", ("size", "backend", "nprobe"), "ms_per_frame", False,
+        {"sizes": [10000], "nprobes": [4, 16], "n_queries": 200, "batch": 40, "tolerance": 0.5,
+         "repeat": 2},
+        {"sizes": [10000, 100000], "nprobes": [1, 4, 8, 16, 32], "n_queries": 400, "batch": 40,
+         "tolerance": 0.5, "repeat": 3},
+    ),
+    "upload": (
+        "benchmarks.bench_upload", ("frame", "path"), "cpu_ms_per_frame", False,
+        {"sizes": [(640, 480)], "frames": 100, "quality": 70},
+        {"sizes": [(320, 240), (640, 480), (1280, 720)], "frames": 300, "quality": 70},
+    ),
+    "recognize": (
+        "benchmarks.bench_recognize", ("size", "faces_per_frame", "tracking", "detector"),
+        "p50_ms", False,
+        {"sizes": [1000], "faces_per_frame": [1, 10], "requests": 20},
+        {"sizes": [1000, 10000, 100000], "faces_per_frame": [1, 10, 30], "requests": 50},
+    ),
+    "writes": (
+        "benchmarks.bench_writes", ("method", "threads", "repeats"), "marks_per_s", True,
+        {"thread_counts": [1, 8], "students": 500, "repeats": [1, 5]},
+        {"thread_counts": [1, 4, 16], "students": 2000, "repeats": [1, 5]},
+    ),
+    "lists": (
+        "benchmarks.bench_lists", ("rows", "view"), "p50_ms", False,
+        {"row_counts": [20000], "students": 1000, "repeat": 5},
+        {"row_counts": [100000, 1000000], "students": 5000, "repeat": 20},
+    ),
+    "startup": (
+        "benchmarks.bench_startup", ("measure",), "median_ms", False,
+        {"runs": 3, "students": 1000},
+        {"runs": 7, "students": 10000},
+    ),
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=config.BASE_DIR, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "config": {
+            name: getattr(config, name) for name in (
+                "ENCODING_DTYPE", "ENCODING_NORMALIZE", "FACE_INDEX", "FACE_DETECT_MAX_DIM",
+                "FACE_DETECT_MODEL", "RECOGNITION_WORKERS", "ATTENDANCE_FLUSH_INTERVAL",
+                "ATTENDANCE_FLUSH_SIZE", "LIST_PAGE_SIZE",
+            )
+        },
+    }
+
+
+def run_suite(names, quick=False):
+    results = {}
+    for name in names:
+        module_name, *_, quick_kwargs, full_kwargs = SUITE[name]
+        print(f"⏱️ {name} ...", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+            rows = []
+            for row in module.run(**(quick_kwargs if quick else full_kwargs)):
+                print(f"   {json.dumps(row)}", file=sys.stderr)
+                rows.append(row)
+        except ImportError as e:
+            # e.g. face_recognition (recognize) or Pillow missing on this machine
+            print(f"⚠️ {name} skipped: {e}", file=sys.stderr)
+            results[name] = {"skipped": str(e)}
+            continue
+        results[name] = {"seconds": round(time.perf_counter() - start, 1), "rows": rows}
+    return results
+
+
+# ---------- Comparison ----------
+def _row_key(row, fields):
+    return tuple(row.get(f) for f in fields)
+
+
+def compare(baseline, current, threshold):
+    """Yields (benchmark, key, metric, old, new, change, regressed) for rows present in both."""
+    for name, (_, fields, metric, higher_is_better, *_) in SUITE.items():
+        old_rows = baseline["results"].get(name, {}).get("rows", [])
+        new_rows = current["results"].get(name, {}).get("rows", [])
+        old_by_key = {_row_key(r, fields): r for r in old_rows}
+        for row in new_rows:
+            key = _row_key(row, fields)
+            old = old_by_key.get(key)
+            if old is None or not old.get(metric) or row.get(metric) is None:
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            regressed = -change > threshold if higher_is_better else change > threshold
+            yield name, dict(zip(fields, key)), metric, old[metric], row[metric], change, regressed
+
+
+def print_comparison(baseline, current, threshold):
+    print(f"Baseline {baseline['meta'].get('git_commit')} ({baseline['meta']['timestamp']}) -> "
+          f"current {current['meta'].get('git_commit')} ({current['meta']['timestamp']})")
+    regressions = 0
+    for name, key, metric, old, new, change, regressed in compare(baseline, current, threshold):
+        regressions += regressed
+        flag = "❌" if regressed else "  "
+        params = " ".join(f"{k}={v}" for k, v in key.items())
+        print(f"{flag} {name:<9} {params:<55} {metric:<14} {old:>12.3f} -> {new:>12.3f} "
+              f"({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), help="run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    report = {"schema": 1, "quick": args.quick, "meta": environment()}
+    report["results"] = run_suite(args.only or list(SUITE), args.quick)
+
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['git_commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = print_comparison(baseline, report, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+benchmarks/synthetic.py
+Deterministic synthetic data shared by the benchmarks: face encodings,
+multi-face classroom frames, and throwaway databases seeded with them.
+
+Everything is generated from fixed seeds, so two runs on the same machine
+measure exactly the same work.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def synthetic_gallery(n, dim=128, seed=0):
+    """Clustered unit-scale vectors, roughly shaped like dlib face encodings."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, n // 50)
+    centers = rng.normal(0.0, 0.1, size=(n_clusters, dim))
+    labels = rng.integers(n_clusters, size=n)
+    return centers[labels] + rng.normal(0.0, 0.04, size=(n, dim))
+
+
+def synthetic_queries(gallery, n_queries, noise=0.02, seed=1):
+    """Perturbed copies of random gallery rows, i.e. a re-sighted student."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(gallery), n_queries, replace=False)
+    return gallery[rows] + rng.normal(0.0, noise, size=(n_queries, gallery.shape[1]))
+
+
+def synthetic_roster(n, seed=0):
+    """(name, roll, class_name, section, encoding) rows for n students in 10 classes x 2 sections."""
+    encodings = synthetic_gallery(n, seed=seed)
+    return [
+        (f"Student {i}", f"R{i:06d}", f"Class {i % 10 + 1}", "AB"[(i // 10) % 2], encodings[i])
+        for i in range(n)
+    ]
+
+
+# ---------- Frames ----------
+def synthetic_frame(width, height, n_faces, quality=80, seed=0):
+    """
+    A classroom-like JPEG with n_faces drawn faces on a grid.
+    Returns (jpeg_bytes, boxes) with boxes as (top, right, bottom, left).
+    """
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    img = np.stack([x * 200 // width, y * 200 // height, np.full_like(x, 90)], -1).astype(np.uint8)
+    img = cv2.add(img, rng.integers(0, 25, img.shape, dtype=np.uint8))
+
+    cols = max(1, int(np.ceil(np.sqrt(n_faces * width / height))))
+    rows = max(1, int(np.ceil(n_faces / cols)))
+    cell_w, cell_h = width // cols, height // rows
+    size = max(8, int(min(cell_w, cell_h) * 0.7))
+
+    boxes = []
+    for i in range(n_faces):
+        cx = (i % cols) * cell_w + cell_w // 2
+        cy = (i // cols) * cell_h + cell_h // 2
+        half = size // 2
+        skin = tuple(int(v) for v in rng.integers([60, 110, 160], [110, 170, 230]))
+        cv2.ellipse(img, (cx, cy), (half * 3 // 4, half), 0, 0, 360, skin, -1)
+        for dx in (-half // 3, half // 3):
+            cv2.circle(img, (cx + dx, cy - half // 4), max(1, half // 8), (30, 30, 30), -1)
+        cv2.ellipse(img, (cx, cy + half // 2), (half // 3, max(1, half // 8)), 0, 0, 180,
+                    (40, 40, 120), max(1, half // 16))
+        boxes.append((cy - half, cx + half, cy + half, cx - half))
+
+    ok, buf = cv2.imencode(".jpg", img[:, :, ::-1], [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes(), boxes
+
+
+class PlantedFaces:
+    """
+    Stand-in for the face_recognition module on synthetic frames: "detects"
+    the boxes a frame was drawn with and "encodes" each as a noisy copy of
+    a known encoding, so the rest of the pipeline (decode, resize, tracker,
+    matcher, attendance writer, JSON) does its real work without the dlib
+    networks. Only valid for frames of the size it was built for.
+    """
+
+    def __init__(self, frame_size, boxes, encodings, noise=0.02, seed=2):
+        self.width, self.height = frame_size
+        self.boxes = np.asarray(boxes, dtype=np.float64)
+        rng = np.random.default_rng(seed)
+        encodings = np.asarray(encodings, dtype=np.float64)
+        self.encodings = encodings + rng.normal(0.0, noise, size=encodings.shape)
+
+    def face_locations(self, img, number_of_times_to_upsample=1, model="hog"):
+        sy, sx = img.shape[0] / self.height, img.shape[1] / self.width
+        return [(int(t * sy), int(r * sx), int(b * sy), int(l * sx)) for t, r, b, l in self.boxes]
+
+    def face_encodings(self, img, known_face_locations=None, num_jitters=1, model="small"):
+        if known_face_locations is None:
+            return list(self.encodings)
+        centers = (self.boxes[:, :2] + self.boxes[:, 2:]) / 2  # (top+bottom, right+left)/2
+        out = []
+        for t, r, b, l in known_face_locations:
+            i = int(np.argmin(np.abs(centers - ((t + b) / 2, (r + l) / 2)).sum(axis=1)))
+            out.append(self.encodings[i])
+        return out
+
+
+# ---------- Throwaway databases ----------
+@contextmanager
+def temp_databases():
+    """
+    Points db_utils, the gallery and the attendance writer at fresh
+    databases in a temporary directory, and restores them afterwards.
+    The real database/ folder is never touched.
+    """
+    import database.db_utils as db_utils
+    from services import attendance_writer, gallery
+
+    saved = (db_utils.STUD_DB, db_utils.ATT_DB, gallery._gallery, attendance_writer._writer)
+    tmp = tempfile.mkdtemp(prefix="attendif-bench-")
+    db_utils.STUD_DB = os.path.join(tmp, "students.db")
+    db_utils.ATT_DB = os.path.join(tmp, "attendance.db")
+    gallery._gallery = gallery.FaceGallery(db_path=db_utils.STUD_DB)
+    attendance_writer._writer = None
+    try:
+        db_utils.init_databases()
+        yield tmp
+    finally:
+        if attendance_writer._writer is not None:
+            attendance_writer._writer.stop()
+        gallery._gallery.close()
+        db_utils.close_all_connections()
+        (db_utils.STUD_DB, db_utils.ATT_DB, gallery._gallery, attendance_writer._writer) = saved
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def seed_students(roster, batch=5000):
+    from database.db_utils import add_students_bulk
+
+    for i in range(0, len(roster), batch):
+        add_students_bulk(roster[i : i + batch])
+
+
+def seed_attendance(roster, days, present=0.9, seed=0, start="2025-01-06"):
+    """
+    Inserts attendance for `days` consecutive dates (about `present` of the
+    roster each day) straight into attendance.db and rebuilds the rollups.
+    Returns the number of rows written.
+    """
+    from datetime import date, timedelta
+
+    from database import rollups
+    from database.db_utils import get_db_connection
+
+    rng = np.random.default_rng(seed)
+    first = date.fromisoformat(start)
+    conn = get_db_connection("attendance")
+    total = 0
+    try:
+        with conn:
+            for d in range(days):
+                day = (first + timedelta(days=d)).isoformat()
+                here = np.flatnonzero(rng.random(len(roster)) < present)
+                minutes = rng.integers(0, 120, len(here))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
+                    ((roster[i][1], roster[i][0], day, f"{8 + m // 60:02d}:{m % 60:02d}:00")
+                     for i, m in zip(here, minutes)),
+                )
+                total += len(here)
+    finally:
+        conn.close()
+    conn = get_db_connection("attendance")
+    try:
+        rollups.rebuild(conn)
+    finally:
+        conn.close()
+    return total
+
+
+def percentiles(samples_ms):
+    """p50/p95/p99/mean of a list of millisecond samples, rounded for JSON."""
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+    }
@@ -0,0 +1,50 @@
+# bulk_enroll.py
+"""
+Enroll a whole roster at once from a CSV and a folder or .zip of photos.
+
+    python bulk_enroll.py roster.csv photos/
+    python bulk_enroll.py roster.csv photos.zip --workers 8 --failures failed.csv
+"""
+import argparse
+import csv
+import sys
+
+from database.db_utils import init_databases
+from services.bulk_import import import_roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-enroll students from a roster CSV.")
+    parser.add_argument("roster", help="CSV with name, roll, class_name, section[, photo]")
+    parser.add_argument("photos", help="folder or .zip containing the photos")
+    parser.add_argument("--workers", type=int, default=0, help="encoder processes (0 = CPUs)")
+    parser.add_argument("--failures", help="write failed rows to this CSV")
+    args = parser.parse_args()
+
+    init_databases()
+    failed = []
+    for event in import_roster(args.roster, args.photos, workers=args.workers):
+        kind = event["event"]
+        if kind == "start":
+            print(f"📋 {event['total']} students in roster")
+        elif kind == "failure":
+            failed.append(event)
+            print(f"⚠️ Line {event['line']} (roll {event['roll'] or '?'}): {event['reason']}")
+        elif kind == "progress":
+            print(f"⏳ {event['done']}/{event['total']} processed, "
+                  f"{event['enrolled']} enrolled, {event['failed']} failed")
+        elif kind == "done":
+            print(f"✅ Enrolled {event['enrolled']} of {event['total']} students "
+                  f"in {event['seconds']}s ({event['failed']} failed)")
+
+    if args.failures and failed:
+        with open(args.failures, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["line", "roll", "reason"], extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(failed)
+        print(f"📝 Failed rows written to {args.failures}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,12 +24,132 @@ ATT_DB = os.path.join(DB_DIR, "attendance.db")
 # App Settings
 # -------------------------------------------------
 SECRET_KEY = "supersecretkey"
+# Load the face models (or start the recognition workers) in create_app()
+# instead of on the first recognition request. Leave off for processes
+# that only serve pages/APIs, and for tests.
+WARM_UP_MODELS = False
 
 # -------------------------------------------------
 # Face Recognition Settings
 # -------------------------------------------------
 FACE_TOLERANCE = 0.5  # lower = stricter match
 
+# Detection pipeline for web recognition requests. Detection runs on a
+# downscaled copy (FACE_DETECT_SCALE, capped to FACE_DETECT_MAX_DIM px on
+# the longest side); boxes are mapped back and encodings are computed on
+# the original frame.
+FACE_DETECT_SCALE = 1.0      # extra downscale factor, 1.0 = none
+FACE_DETECT_MAX_DIM = 640    # 0 disables the cap
+FACE_DETECT_UPSAMPLE = 1     # HOG upsampling passes (finds smaller faces, slower)
+FACE_DETECT_MODEL = "hog"    # "hog" (CPU) or "cnn" (needs dlib with CUDA)
+
+# Stored encodings: versioned float32 records (database/encoding_format.py).
+# With ENCODING_NORMALIZE the vectors are L2-normalized on write and load.
+ENCODING_DTYPE = "float32"
+ENCODING_NORMALIZE = False
+
+# Multi-sample enrollment (services/face_templates.py): every student is
+# stored as the centroid of the captured samples plus up to
+# ENROLL_MAX_EXEMPLARS of the most distinct samples. Samples further than
+# ENROLL_MAX_SPREAD from the median face are dropped as bad captures, and
+# samples closer than ENROLL_MIN_EXEMPLAR_GAP to an existing template add
+# nothing but matching cost.
+ENROLL_SAMPLES = 5
+ENROLL_MAX_EXEMPLARS = 4
+ENROLL_MAX_SPREAD = 0.6
+ENROLL_MIN_EXEMPLAR_GAP = 0.08
+
+# Share one memory-mapped gallery snapshot between all worker processes
+# instead of a private copy each (useful with RECOGNITION_WORKERS or
+# several gunicorn workers).
+GALLERY_MMAP = False
+GALLERY_SNAPSHOT_DIR = os.path.join(DB_DIR, "gallery_snapshots")
+
+# Matching index: "exact" (linear scan) or "ivf" (approximate, for very
+# large galleries). Galleries smaller than FACE_INDEX_MIN_SIZE always use
+# the exact scan; FACE_INDEX_NPROBE trades recall for speed.
+FACE_INDEX = "exact"
+FACE_INDEX_MIN_SIZE = 20000
+FACE_INDEX_NPROBE = 8
+FACE_INDEX_PATH = os.path.join(DB_DIR, "face_index.npz")
+FACE_INDEX_SAVE_DELAY = 30.0  # seconds; new enrollments reach the saved index in the background
+
+# -------------------------------------------------
+# Face Tracking (per scanning session / camera)
+# -------------------------------------------------
+TRACK_IOU_THRESHOLD = 0.3       # min IoU to continue a track
+TRACK_DRIFT_IOU = 0.6           # re-encode once a face moved further than this
+TRACK_TTL = 5.0                 # seconds before an unseen track is dropped
+TRACK_REVERIFY_INTERVAL = 30.0  # seconds between full re-checks of a known face
+TRACK_UNKNOWN_RETRY = 3.0       # seconds between retries of an unknown face
+
+# Scene-change gate (services/scene_gate.py): a frame that barely differs
+# from the last processed one reuses its result instead of being detected.
+SCENE_GATE = True
+SCENE_THUMB_SIZE = (160, 90)    # grey thumbnail compared between frames (w, h)
+SCENE_PIXEL_DELTA = 20          # grey levels a thumbnail pixel must move to count
+SCENE_CHANGED_FRACTION = 0.002  # share of moved pixels that counts as a scene change
+SCENE_REFRESH_INTERVAL = 10.0   # seconds; a frame is always processed at least this often
+
+# -------------------------------------------------
+# Recognition Worker Pool
+# -------------------------------------------------
+# 0 runs recognition inline in the request thread. N > 0 starts N worker
+# processes; requests beyond RECOGNITION_QUEUE_SIZE per worker get HTTP 429.
+RECOGNITION_WORKERS = 0
+RECOGNITION_QUEUE_SIZE = 4
+RECOGNITION_TIMEOUT = 10.0        # seconds a request waits for its result
+RECOGNITION_MAX_FRAME_AGE = 3.0   # queued frames older than this are dropped
+
+# -------------------------------------------------
+# Scan Streaming (/scan/stream, services/scan_stream.py)
+# -------------------------------------------------
+# Each camera keeps one frame in flight and only its newest waiting frame;
+# older ones are dropped as stale instead of queued.
+STREAM_KEEPALIVE = 15.0         # seconds between keep-alive comments on idle streams
+STREAM_LISTENER_BUFFER = 32     # events buffered per listener before the oldest is dropped
+STREAM_WORKER_IDLE = 30.0       # seconds a stream's recognition thread waits for frames
+# Streams live in the memory of one server process (run with a single
+# worker, e.g. gunicorn -w 1 --threads 16 run:app). The first process to
+# serve a stream locks this file; others answer stream requests with 503.
+STREAM_LOCK_PATH = os.path.join(DB_DIR, "scan_stream.lock")
+
+# -------------------------------------------------
+# Headless Ingestion (python attendance.py --headless, services/ingest.py)
+# -------------------------------------------------
+INGEST_SAMPLE_FPS = 2.0        # frames per second taken from each source
+INGEST_MAX_DIM = 1280          # larger frames are shrunk before recognition
+INGEST_WORKERS = 0             # recognition processes; 0 = one per CPU (at most one per source)
+INGEST_REPORT_INTERVAL = 5.0   # seconds between progress lines
+
+# -------------------------------------------------
+# Attendance Writer
+# -------------------------------------------------
+# Recognition events are batched and flushed in one transaction
+ATTENDANCE_FLUSH_INTERVAL = 0.5  # seconds
+ATTENDANCE_FLUSH_SIZE = 64       # flush early once this many are pending
+
+# Students first seen after this time count as late (GET /api/dashboard/late)
+LATE_AFTER = "09:00:00"
+
+# -------------------------------------------------
+# Bulk Enrollment (services/bulk_import.py)
+# -------------------------------------------------
+BULK_IMPORT_WORKERS = 0        # encoder processes; 0 = one per CPU
+BULK_IMPORT_BATCH_SIZE = 200   # students inserted per transaction
+
+# -------------------------------------------------
+# Metrics (/metrics, services/metrics.py)
+# -------------------------------------------------
+METRICS_RECENT_WINDOW = 1024  # observations behind the p50/p95/p99 summaries
+
+# -------------------------------------------------
+# Lists (attendance / students pages and their JSON API)
+# -------------------------------------------------
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 5000  # rows per chunk for streaming exports (services/exporter.py)
+
 # -------------------------------------------------
 # Miscellaneous
 # -------------------------------------------------
@@ -1,7 +1,31 @@
 # database/db_utils.py
 import sqlite3
 import os
+import base64
+import functools
+import json
+import queue
+import threading
+import time
+import uuid
 import numpy as np
+from datetime import datetime
+
+from config import ENCODING_NORMALIZE
+from database.encoding_format import (
+    ENROLLED,
+    ENROLLMENT_STATES,
+    pack_encoding,
+    pack_encodings,
+    template_state,
+)
+from database.migrate_encodings import (
+    SCHEMA_VERSION,
+    STATE_COLUMN,
+    migrate as migrate_encodings,
+    schema_version,
+)
+from database import rollups
 
 # ---------- Absolute Paths ----------
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -13,6 +37,43 @@ ATT_DB = os.path.join(DB_DIR, "attendance.db")
 os.makedirs(DB_DIR, exist_ok=True)
 
 
+# ---------- Metric Hooks ----------
+# Latency and commit metrics go through hooks instead of an import of
+# services.metrics (services depend on the database, not the other way
+# round). services/metrics.py installs them when it is loaded; CLI tools
+# and benchmarks that never load it only pay for a None check.
+_metric_hooks = {"inc": None, "observe": None}
+
+
+def set_metric_hooks(inc=None, observe=None):
+    """Installs the callbacks: inc(name, value=1, **labels), observe(name, seconds, **labels)."""
+    _metric_hooks["inc"] = inc
+    _metric_hooks["observe"] = observe
+
+
+def count_metric(name, value=1, **labels):
+    hook = _metric_hooks["inc"]
+    if hook is not None:
+        hook(name, value, **labels)
+
+
+def timed(name, **labels):
+    """Decorator timing a helper into histogram `name` (when a hook is installed)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            hook = _metric_hooks["observe"]
+            if hook is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hook(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
 # ---------- Safe Connection (Windows-Safe, No Delete) ----------
 def safe_connect(db_path):
     """Connect to SQLite DB and auto-fix corruption safely on Windows."""
@@ -69,33 +130,251 @@ def safe_connect(db_path):
         return sqlite3.connect(db_path)
 
 
+# ---------- Connection Pool ----------
+# Connections are long-lived and shared through a small pool per database
+# file. The integrity check above runs once per process per file (and again
+# every INTEGRITY_CHECK_INTERVAL seconds), not on every call. Each pooled
+# connection keeps sqlite3's statement cache, so repeated queries are
+# prepared only once.
+#
+# Attendance connections also ATTACH students.db as `roster`, so roster
+# joins (class filters, absentees, rollups) run as one indexed SQL
+# statement instead of loading students into Python.
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+INTEGRITY_CHECK_INTERVAL = 24 * 60 * 60
+
+
+def configure_connection(conn):
+    """WAL + NORMAL sync lets Flask workers and camera scripts read while one writes."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class PooledConnection:
+    """
+    Proxy over a pooled sqlite3 connection. close() hands it back to the pool
+    (rolling back anything uncommitted) instead of closing it, so existing
+    `conn = get_db_connection(); ...; conn.close()` code needs no changes.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._conn.in_transaction:
+            self._conn.rollback()
+        self._pool.release(self._conn)
+        self._conn = None
+
+
+class ConnectionPool:
+    def __init__(self, db_path, size=POOL_SIZE, attach=(), setup=None):
+        self.db_path = db_path
+        self.size = size
+        self.attach = attach  # ((schema_name, db_path), ...)
+        self._setup = setup   # run once on the first connection handed out
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        configure_connection(conn)
+        for schema, path in self.attach:
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        return conn
+
+    def _integrity_check_due(self):
+        return not self._last_check or time.monotonic() - self._last_check >= INTEGRITY_CHECK_INTERVAL
+
+    def _check_integrity_if_due(self):
+        if not self._integrity_check_due():
+            return
+        with self._lock:
+            if not self._integrity_check_due():
+                return
+            # Drop idle connections first so a corrupted file can be renamed
+            self._close_idle()
+            safe_connect(self.db_path).close()
+            self._last_check = time.monotonic()
+
+    def _run_setup(self, conn):
+        with self._lock:
+            if self._setup is None:
+                return
+            try:
+                self._setup(conn)
+            except Exception:
+                self.release(conn)
+                raise
+            self._setup = None
+
+    def acquire(self):
+        self._check_integrity_if_due()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        if self._setup is not None:
+            self._run_setup(conn)
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        if self._idle.qsize() >= self.size:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def _close_idle(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def close_all(self):
+        with self._lock:
+            self._close_idle()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, attach=(), setup=None):
+    key = (db_path, attach)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(db_path, attach=attach, setup=setup))
+    return pool
+
+
+def close_all_connections():
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+
 # ---------- Get DB Connection ----------
+# Each process brings students.db to the current schema on its first
+# connection, so code paths that never call init_databases() (e.g.
+# create_app(init_db=False), the camera loop) do not query columns an old
+# database lacks. Up to date, that costs one PRAGMA per process.
+def _ensure_students_schema(conn):
+    if schema_version(conn) < SCHEMA_VERSION:
+        _init_students_db(conn)
+
+
+def _ensure_roster_schema(conn):
+    # attendance.db queries read roster.students
+    get_db_connection("students").close()
+
+
 def get_db_connection(db_name="students"):
-    db_path = STUD_DB if db_name == "students" else ATT_DB
-    return safe_connect(db_path)
+    if db_name == "students":
+        return get_pool(STUD_DB, setup=_ensure_students_schema).acquire()
+    return get_pool(ATT_DB, attach=(("roster", STUD_DB),), setup=_ensure_roster_schema).acquire()
 
 
 # ---------- Initialize Databases ----------
 def init_databases():
     """Create tables safely."""
     # Students DB init
-    conn = safe_connect(STUD_DB)
+    conn = get_db_connection("students")
+    _init_students_db(conn)
+    conn.close()
+
+    # Attendance DB init
+    conn = get_db_connection("attendance")
+    _init_attendance_db(conn)
+    conn.close()
+
+    print("✅ Databases initialized at:", DB_DIR)
+
+
+def _init_students_db(conn):
+    """students table, gallery generation triggers and indexes, migrated to SCHEMA_VERSION."""
     c = conn.cursor()
-    c.execute("""
+    c.execute(f"""
         CREATE TABLE IF NOT EXISTS students (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT,
             roll TEXT UNIQUE,
             class_name TEXT,
             section TEXT,
-            encoding BLOB
+            encoding BLOB,
+            exemplars BLOB,
+            {STATE_COLUMN}
+        )
+    """)
+
+    # Gallery generation: bumped on UPDATE/DELETE so the in-memory gallery
+    # (services/gallery.py) in every process knows to fully reload. Plain
+    # INSERTs are picked up incrementally by id and need no bump.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS gallery_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
         )
     """)
+    c.execute("INSERT OR IGNORE INTO gallery_meta (id, generation) VALUES (1, 0)")
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_gallery_update
+        AFTER UPDATE ON students
+        BEGIN
+            UPDATE gallery_meta SET generation = generation + 1 WHERE id = 1;
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_gallery_delete
+        AFTER DELETE ON students
+        BEGIN
+            UPDATE gallery_meta SET generation = generation + 1 WHERE id = 1;
+        END
+    """)
+    # Class/section filters of the students list (id is implied)
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_students_class_section ON students (class_name, section)"
+    )
     conn.commit()
-    conn.close()
 
-    # Attendance DB init
-    conn = safe_connect(ATT_DB)
+    # Bring older encoding BLOBs / embeddings/*.npy to the current format
+    report = migrate_encodings(conn)
+    if any(report.values()):
+        print("🔄 Migrated face encodings:", report)
+
+    # Students still waiting for a usable face (the admin list), without
+    # indexing the enrolled majority
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_students_needs_face ON students (id)"
+        " WHERE enrollment_state != 'enrolled'"
+    )
+    conn.commit()
+
+
+def _init_attendance_db(conn):
+    """attendance table and indexes, dashboard rollups and scan sessions."""
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS attendance (
@@ -106,22 +385,76 @@ def init_databases():
             time TEXT
         )
     """)
+
+    # One attendance row per student per day. Older databases may hold
+    # duplicates from the previous check-then-insert code; keep the first.
+    # Once the unique index exists there can be none, so the full-table
+    # cleanup only runs the first time (not on every app start).
+    has_unique_index = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_attendance_roll_date'"
+    ).fetchone()
+    if not has_unique_index:
+        c.execute("""
+            DELETE FROM attendance WHERE id NOT IN (
+                SELECT MIN(id) FROM attendance GROUP BY roll, date
+            )
+        """)
+        c.execute(
+            "CREATE UNIQUE INDEX idx_attendance_roll_date ON attendance (roll, date)"
+        )
+    # Newest-first keyset pagination of the attendance list
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date_time ON attendance (date, time)")
+
+    # Daily/per-student rollups for the dashboard (database/rollups.py),
+    # backfilled once for databases that already hold attendance
+    rollups.create_tables(c)
     conn.commit()
-    conn.close()
+    if rollups.needs_rebuild(conn):
+        rollups.rebuild(conn)
+        print("🔄 Built attendance rollups from existing records")
 
-    print("✅ Databases initialized at:", DB_DIR)
+    # Scanning sessions bound to one class/section
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS scan_sessions (
+            id TEXT PRIMARY KEY,
+            class_name TEXT NOT NULL,
+            section TEXT,
+            created_at TEXT
+        )
+    """)
+    conn.commit()
 
 
 # ---------- Add Student ----------
-def add_student(name, roll, class_name, section, encoding):
+def _template_columns(encoding, exemplars=None):
+    """(encoding BLOB, exemplars BLOB, enrollment_state) for a new template."""
+    state = template_state(encoding)
+    if state != ENROLLED:
+        return None, None, state  # placeholders are never stored
+    return (pack_encoding(encoding, normalize=ENCODING_NORMALIZE),
+            pack_encodings(exemplars if exemplars is not None else [],
+                           normalize=ENCODING_NORMALIZE),
+            state)
+
+
+@timed("attendif_db_seconds", op="add_student")
+def add_student(name, roll, class_name, section, encoding=None, exemplars=None):
+    """
+    `encoding` is the student's main template (the centroid for multi-sample
+    enrollment); `exemplars` are optional extra templates matched alongside it.
+    Without a valid encoding the student is added as "no_face" (or
+    "recapture") and left out of recognition until a face is captured.
+    """
     conn = get_db_connection("students")
     c = conn.cursor()
     try:
         c.execute(
-            "INSERT INTO students (name, roll, class_name, section, encoding) VALUES (?, ?, ?, ?, ?)",
-            (name, roll, class_name, section, encoding.tobytes()),
+            "INSERT INTO students (name, roll, class_name, section, encoding, exemplars,"
+            " enrollment_state) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (name, roll, class_name, section, *_template_columns(encoding, exemplars)),
         )
         conn.commit()
+        count_metric("attendif_db_commits_total", op="add_student")
         print(f"✅ Added student: {name} (Roll: {roll})")
         success = True
     except sqlite3.IntegrityError:
@@ -135,6 +468,117 @@ def add_student(name, roll, class_name, section, encoding):
     return success
 
 
+# ---------- Add Students (bulk) ----------
+@timed("attendif_db_seconds", op="add_students_bulk")
+def add_students_bulk(rows):
+    """
+    Inserts (name, roll, class_name, section, encoding) rows in a single
+    transaction. A roll already present without a face ("no_face" or
+    "recapture") gets the row's face, like set_student_face(). Returns the
+    rolls that were skipped because they are already enrolled (e.g.
+    enrolled concurrently).
+    """
+    conn = get_db_connection("students")
+    c = conn.cursor()
+    skipped = []
+    try:
+        with conn:
+            for name, roll, class_name, section, encoding in rows:
+                blob, _, state = _template_columns(encoding)
+                # Spelled without ON CONFLICT: students tables migrated from
+                # the first schema have no UNIQUE constraint on roll
+                if state == ENROLLED:
+                    c.execute(
+                        "UPDATE students SET encoding = ?, enrollment_state = ?"
+                        " WHERE roll = ? AND enrollment_state != 'enrolled'",
+                        (blob, state, roll),
+                    )
+                    if c.rowcount == 1:
+                        continue
+                c.execute(
+                    "INSERT INTO students (name, roll, class_name, section, encoding,"
+                    " enrollment_state) SELECT ?, ?, ?, ?, ?, ?"
+                    " WHERE NOT EXISTS (SELECT 1 FROM students WHERE roll = ?)",
+                    (name, roll, class_name, section, blob, state, roll),
+                )
+                if c.rowcount != 1:
+                    skipped.append(roll)
+        count_metric("attendif_db_commits_total", op="add_students_bulk")
+        count_metric("attendif_db_rows_total", len(rows) - len(skipped), op="add_students_bulk")
+    finally:
+        conn.close()
+    return skipped
+
+
+# ---------- Enrollment State ----------
+def get_enrollment_state(roll):
+    """Returns the student's enrollment state, or None for an unknown roll."""
+    conn = get_db_connection("students")
+    try:
+        row = conn.execute(
+            "SELECT enrollment_state FROM students WHERE roll = ?", (roll,)
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+@timed("attendif_db_seconds", op="set_student_face")
+def set_student_face(roll, encoding, exemplars=None):
+    """
+    Stores a captured face for a student who has none ("no_face" or
+    "recapture"). Returns True if the student is now enrolled.
+    """
+    blob, exemplar_blob, state = _template_columns(encoding, exemplars)
+    if state != ENROLLED:
+        return False
+    conn = get_db_connection("students")
+    try:
+        with conn:
+            updated = conn.execute(
+                "UPDATE students SET encoding = ?, exemplars = ?, enrollment_state = ?"
+                " WHERE roll = ? AND enrollment_state != 'enrolled'",
+                (blob, exemplar_blob, state, roll),
+            ).rowcount
+        count_metric("attendif_db_commits_total", op="set_student_face")
+    finally:
+        conn.close()
+    if updated:
+        print(f"✅ Face captured for roll {roll}")
+    return updated == 1
+
+
+def get_enrollment_counts():
+    """
+    {"no_face": n, "enrolled": n, "recapture": n} over all students.
+    The not-enrolled counts come from idx_students_needs_face and the total
+    from a small index, so the encoding BLOBs are never read.
+    """
+    conn = get_db_connection("students")
+    try:
+        counts = dict.fromkeys(ENROLLMENT_STATES, 0)
+        counts.update(conn.execute(
+            "SELECT enrollment_state, COUNT(*) FROM students"
+            " WHERE enrollment_state != 'enrolled' GROUP BY enrollment_state"
+        ))
+        total = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+        counts[ENROLLED] = total - sum(counts.values())
+        return counts
+    finally:
+        conn.close()
+
+
+def get_enrolled_rolls():
+    """Returns the set of roll numbers of students with a face on file."""
+    conn = get_db_connection("students")
+    try:
+        return {row[0] for row in conn.execute(
+            "SELECT roll FROM students WHERE enrollment_state = 'enrolled'"
+        )}
+    finally:
+        conn.close()
+
+
 # ---------- Get Students ----------
 def get_students():
     conn = get_db_connection("students")
@@ -150,13 +594,290 @@ def get_all_students():
     return get_students()
 
 
+# ---------- Paginated Lists ----------
+# Keyset ("seek") pagination: each page continues after the last row of
+# the previous one through an index, so page 1000 costs the same as page 1
+# instead of scanning and discarding OFFSET rows. The cursor is opaque to
+# clients (url-safe base64 of the sort key of the last row).
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, length):
+    """
+    Returns the sort key list, or None for a missing/garbled cursor. Only a
+    list of `length` strings/integers counts; anything else (a tampered
+    cursor) restarts at the first page instead of reaching the query.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(isinstance(v, (str, int)) and not isinstance(v, bool) for v in values):
+        return None
+    return values
+
+
+@timed("attendif_db_seconds", op="get_class_sizes")
+def get_class_sizes():
+    """
+    Maps (class_name, section) -> number of enrolled students. Students
+    without a face yet cannot be recognized, so they are not counted in
+    the dashboard's attendance percentages.
+    """
+    conn = get_db_connection("students")
+    c = conn.cursor()
+    c.execute(
+        "SELECT COALESCE(class_name, ''), COALESCE(section, ''), COUNT(*) FROM students "
+        "WHERE enrollment_state = 'enrolled' GROUP BY class_name, section"
+    )
+    sizes = {(class_name, section): n for class_name, section, n in c.fetchall()}
+    conn.close()
+    return sizes
+
+
+def _attendance_where(date_from=None, date_to=None, roll=None, class_name=None, section=None):
+    """WHERE clauses + params shared by the attendance list and the export."""
+    where, params = [], []
+    if date_from:
+        where.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("date <= ?")
+        params.append(date_to)
+    if roll:
+        where.append("roll = ?")
+        params.append(roll)
+    if class_name:
+        # Resolved against the attached students table
+        clause = "roll IN (SELECT roll FROM roster.students WHERE class_name = ?"
+        params.append(class_name)
+        if section:
+            clause += " AND section = ?"
+            params.append(section)
+        where.append(clause + ")")
+    return where, params
+
+
+@timed("attendif_db_seconds", op="get_attendance_page")
+def get_attendance_page(after=None, limit=100, date_from=None, date_to=None, roll=None,
+                        class_name=None, section=None):
+    """
+    One page of attendance records, newest first.
+    `after` is the cursor of the previous page. Returns (rows, next_cursor or None).
+    """
+    where, params = _attendance_where(date_from, date_to, roll, class_name, section)
+    key = decode_cursor(after, 3)
+    if key is not None:
+        where.append("(date, time, id) < (?, ?, ?)")
+        params.extend(key)
+
+    sql = "SELECT id, roll, name, date, time FROM attendance"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY date DESC, time DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db_connection("attendance")
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = c.fetchall()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor((last[3], last[4], last[0]))
+    return rows, next_cursor
+
+
+def iter_attendance(chunk_size=5000, date_from=None, date_to=None, roll=None, class_name=None,
+                    section=None):
+    """
+    Yields attendance rows (id, roll, name, date, time) in chronological
+    order as lists of at most `chunk_size`, reading one chunk at a time so
+    memory stays flat however long the history is.
+    """
+    where, params = _attendance_where(date_from, date_to, roll, class_name, section)
+    sql = "SELECT id, roll, name, date, time FROM attendance"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY date ASC, time ASC, id ASC"
+
+    conn = get_db_connection("attendance")
+    try:
+        c = conn.cursor()
+        c.execute(sql, params)
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+@timed("attendif_db_seconds", op="get_students_page")
+def get_students_page(after=None, limit=100, class_name=None, section=None, roll=None,
+                      state=None):
+    """
+    One page of students in enrollment order. Returns (rows, next_cursor or None).
+    `state` filters by enrollment state; "pending" means every student still
+    without a usable face (served by idx_students_needs_face).
+    """
+    where, params = [], []
+    if state == ENROLLED:
+        where.append("enrollment_state = 'enrolled'")
+    elif state:
+        # Spelled like the partial index's WHERE so SQLite can use it
+        where.append("enrollment_state != 'enrolled'")
+        if state != "pending":
+            where.append("enrollment_state = ?")
+            params.append(state)
+    if class_name:
+        where.append("class_name = ?")
+        params.append(class_name)
+    if section:
+        where.append("section = ?")
+        params.append(section)
+    if roll:
+        where.append("roll = ?")
+        params.append(roll)
+    key = decode_cursor(after, 1)
+    if key is not None:
+        where.append("id > ?")
+        params.extend(key)
+
+    sql = "SELECT id, name, roll, class_name, section, enrollment_state FROM students"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id ASC LIMIT ?"
+    params.append(limit + 1)
+
+    conn = get_db_connection("students")
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = c.fetchall()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor((rows[-1][0],))
+    return rows, next_cursor
+
+
+# ---------- Roster Queries ----------
+# Set-based questions across both databases, answered by single statements
+# on the attendance connection (students.db attached as `roster`) using
+# idx_students_class_section, the students roll key, idx_attendance_roll_date
+# and idx_attendance_date_time.
+def _class_clause(class_name, section, alias="s"):
+    clauses, params = [], []
+    if class_name:
+        clauses.append(f"{alias}.class_name = ?")
+        params.append(class_name)
+    if section:
+        clauses.append(f"{alias}.section = ?")
+        params.append(section)
+    return "".join(" AND " + c for c in clauses), params
+
+
+@timed("attendif_db_seconds", op="get_absentees")
+def get_absentees(date, class_name=None, section=None):
+    """Students (id, name, roll, class_name, section) with no attendance on `date`."""
+    clause, params = _class_clause(class_name, section)
+    conn = get_db_connection("attendance")
+    c = conn.cursor()
+    c.execute(
+        "SELECT s.id, s.name, s.roll, s.class_name, s.section FROM roster.students s "
+        "WHERE NOT EXISTS (SELECT 1 FROM attendance a WHERE a.roll = s.roll AND a.date = ?)"
+        + clause + " ORDER BY s.class_name, s.section, s.roll",
+        [date] + params,
+    )
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
+@timed("attendif_db_seconds", op="get_arrivals")
+def get_arrivals(date, after_time=None, class_name=None, section=None):
+    """
+    First-seen time of every student present on `date`, earliest first, as
+    (roll, name, class_name, section, time). With `after_time` only late
+    arrivals (first seen after that time) are returned.
+    """
+    clause, params = _class_clause(class_name, section)
+    sql = (
+        "SELECT a.roll, COALESCE(s.name, a.name), s.class_name, s.section, a.time "
+        "FROM attendance a LEFT JOIN roster.students s ON s.roll = a.roll "
+        "WHERE a.date = ?"
+    )
+    args = [date]
+    if after_time:
+        sql += " AND a.time > ?"
+        args.append(after_time)
+    if clause:
+        # Filtering on s.* makes the LEFT JOIN an inner one for this case
+        sql += clause
+        args += params
+    sql += " ORDER BY a.time, a.id"
+
+    conn = get_db_connection("attendance")
+    c = conn.cursor()
+    c.execute(sql, args)
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
 # ---------- Mark Attendance ----------
+@timed("attendif_db_seconds", op="mark_attendance")
 def mark_attendance(roll, name, date, time):
+    """Idempotent single insert; returns True if a new row was written."""
+    conn = get_db_connection("attendance")
+    c = conn.cursor()
+    with conn:
+        c.execute(
+            "INSERT OR IGNORE INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
+            (roll, name, date, time),
+        )
+        inserted = c.rowcount == 1
+        if inserted:
+            rollups.apply_marks(conn, [(roll, date)])
+    count_metric("attendif_db_commits_total", op="mark_attendance")
+    conn.close()
+    return inserted
+
+
+# ---------- Scan Sessions ----------
+@timed("attendif_db_seconds", op="create_scan_session")
+def create_scan_session(class_name, section=None):
+    """Bind a new scanning session to a class (and optionally a section)."""
+    session_id = uuid.uuid4().hex
     conn = get_db_connection("attendance")
     c = conn.cursor()
     c.execute(
-        "INSERT INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
-        (roll, name, date, time),
+        "INSERT INTO scan_sessions (id, class_name, section, created_at) VALUES (?, ?, ?, ?)",
+        (session_id, class_name, section, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
     )
     conn.commit()
+    count_metric("attendif_db_commits_total", op="create_scan_session")
+    conn.close()
+    return session_id
+
+
+@timed("attendif_db_seconds", op="get_scan_session")
+def get_scan_session(session_id):
+    """Returns (class_name, section) for a session, or None if unknown."""
+    conn = get_db_connection("attendance")
+    c = conn.cursor()
+    c.execute("SELECT class_name, section FROM scan_sessions WHERE id = ?", (session_id,))
+    row = c.fetchone()
     conn.close()
+    return row
@@ -0,0 +1,145 @@
+# database/encoding_format.py
+"""
+Versioned on-disk format for face encodings stored in students.encoding.
+
+    offset  size  field
+    0       3     magic b"AFE"
+    3       1     format version (1)
+    4       1     dtype code (1 = float32, 2 = float64)
+    5       1     flags (bit 0: vector is L2-normalized)
+    6       2     dimension, uint16 little-endian
+    8       ...   little-endian vector data
+
+Legacy rows hold a bare float64 `tobytes()` dump (1024 bytes for 128-D)
+and are still readable; database/migrate_encodings.py rewrites them.
+
+students.exemplars holds several such records back to back (extra
+templates from multi-sample enrollment, services/face_templates.py).
+
+students.enrollment_state says whether students.encoding is a usable
+template; only "enrolled" rows are loaded into the matching gallery.
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"AFE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<3sBBBH")
+HEADER_SIZE = HEADER.size
+
+FLAG_NORMALIZED = 0x01
+
+DTYPE_CODES = {1: np.dtype("<f4"), 2: np.dtype("<f8")}
+CODE_FOR_DTYPE = {v: k for k, v in DTYPE_CODES.items()}
+
+LEGACY_DIM = 128
+LEGACY_DTYPE = np.dtype("<f8")
+
+ENCODING_DIM = 128
+
+# Enrollment states (students.enrollment_state)
+NO_FACE = "no_face"            # no template yet, e.g. added from the add-student form
+ENROLLED = "enrolled"          # valid template, matched during recognition
+NEEDS_RECAPTURE = "recapture"  # stored template is unusable; capture the face again
+ENROLLMENT_STATES = (NO_FACE, ENROLLED, NEEDS_RECAPTURE)
+
+
+# ---------- Encode ----------
+def pack_encoding(encoding, dtype=np.float32, normalize=False):
+    """Serializes a 1-D encoding with a self-describing header."""
+    vec = np.asarray(encoding, dtype=np.float64).ravel()
+    flags = 0
+    if normalize:
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+            flags |= FLAG_NORMALIZED
+    out_dtype = np.dtype(dtype).newbyteorder("<")
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, CODE_FOR_DTYPE[out_dtype], flags, vec.size)
+    return header + vec.astype(out_dtype).tobytes()
+
+
+def pack_encodings(encodings, dtype=np.float32, normalize=False):
+    """Serializes several encodings as consecutive records (None if empty)."""
+    records = [pack_encoding(enc, dtype, normalize) for enc in encodings]
+    return b"".join(records) if records else None
+
+
+# ---------- Decode ----------
+def _parse_record(blob, start):
+    """Returns (dtype, dim, flags, data_offset, end) of the record at `start`."""
+    if len(blob) - start < HEADER_SIZE or bytes(blob[start : start + 3]) != MAGIC:
+        return None
+    _, version, code, flags, dim = HEADER.unpack_from(blob, start)
+    dtype = DTYPE_CODES.get(code)
+    if version != FORMAT_VERSION or dtype is None:
+        return None
+    end = start + HEADER_SIZE + dim * dtype.itemsize
+    if end > len(blob):
+        return None
+    return dtype, dim, flags, start + HEADER_SIZE, end
+
+
+def read_header(blob):
+    """
+    Returns (dtype, dim, flags, offset) for a stored blob, or None if the blob
+    is neither a versioned record nor a legacy float64 dump.
+    """
+    if blob is None:
+        return None
+    if bytes(blob[:3]) == MAGIC:
+        record = _parse_record(blob, 0)
+        if record is None or record[4] != len(blob):
+            return None
+        return record[:4]
+    if len(blob) == LEGACY_DIM * LEGACY_DTYPE.itemsize:
+        return LEGACY_DTYPE, LEGACY_DIM, 0, 0
+    return None
+
+
+def unpack_encoding(blob):
+    """Returns the stored vector as a (read-only) NumPy view, or None."""
+    info = read_header(blob)
+    if info is None:
+        return None
+    dtype, dim, _, offset = info
+    return np.frombuffer(blob, dtype=dtype, count=dim, offset=offset)
+
+
+def unpack_encodings(blob):
+    """Returns the vectors of a multi-record blob (stops at the first bad record)."""
+    vectors = []
+    offset = 0
+    while blob is not None and offset < len(blob):
+        record = _parse_record(blob, offset)
+        if record is None:
+            break
+        dtype, dim, _, data_offset, offset = record
+        vectors.append(np.frombuffer(blob, dtype=dtype, count=dim, offset=data_offset))
+    return vectors
+
+
+def is_legacy(blob):
+    return blob is not None and bytes(blob[:3]) != MAGIC
+
+
+# ---------- Validation ----------
+def template_state(vec):
+    """Enrollment state for a decoded template (None means no template)."""
+    if vec is None:
+        return NO_FACE
+    vec = np.asarray(vec)
+    if vec.size != ENCODING_DIM or not np.all(np.isfinite(vec)):
+        return NEEDS_RECAPTURE
+    if not np.any(vec):
+        return NO_FACE  # all-zeros placeholder
+    return ENROLLED
+
+
+def blob_state(blob):
+    """Enrollment state for a stored students.encoding value."""
+    if blob is None:
+        return NO_FACE
+    vec = unpack_encoding(blob)
+    return NEEDS_RECAPTURE if vec is None else template_state(vec)
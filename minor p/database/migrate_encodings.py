@@ -0,0 +1,141 @@
+# database/migrate_encodings.py
+"""
+One-shot migration to the versioned float32 encoding format.
+
+  * adds the `encoding` column to old students tables that only have the
+    earlier `embedding` column, copying the data across
+  * rewrites legacy float64 BLOBs as versioned float32 records
+  * imports embeddings/{roll}.npy files (written by the old enroll.py)
+    for students that have no usable encoding in the database
+  * adds the `exemplars` column for multi-sample enrollment (version 2)
+  * adds `enrollment_state` and sets it from each stored encoding:
+    missing or all-zeros placeholder -> no_face, unreadable or not a
+    finite 128-D vector -> recapture, otherwise enrolled (version 3)
+  * stamps PRAGMA user_version so it never runs twice
+
+Run from the project directory:
+
+    python -m database.migrate_encodings
+"""
+import os
+
+import numpy as np
+
+from config import EMBED_DIR, ENCODING_NORMALIZE
+from database.encoding_format import (
+    NEEDS_RECAPTURE,
+    NO_FACE,
+    blob_state,
+    is_legacy,
+    pack_encoding,
+    unpack_encoding,
+)
+
+SCHEMA_VERSION = 3
+STATE_COLUMN = (
+    "enrollment_state TEXT NOT NULL DEFAULT 'no_face'"
+    " CHECK (enrollment_state IN ('no_face', 'enrolled', 'recapture'))"
+)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+
+
+def migrate(conn, embed_dir=EMBED_DIR, normalize=ENCODING_NORMALIZE):
+    """
+    Migrates an open students.db connection in one transaction.
+    Returns a dict of counts. Safe to call on an up-to-date database.
+    """
+    report = {"converted": 0, "imported_npy": 0, "orphan_npy": 0, "skipped": 0,
+              "no_face": 0, "recapture": 0}
+    version = schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return report
+
+    with conn:
+        if version < 1:
+            _migrate_v1(conn, embed_dir, normalize, report)
+        if "exemplars" not in _columns(conn):
+            conn.execute("ALTER TABLE students ADD COLUMN exemplars BLOB")
+        if version < 3:
+            _migrate_v3(conn, report)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    return report
+
+
+def _migrate_v1(conn, embed_dir, normalize, report):
+    """Versioned float32 encodings; embeddings/*.npy folded into the table."""
+    columns = _columns(conn)
+    if "encoding" not in columns:
+        conn.execute("ALTER TABLE students ADD COLUMN encoding BLOB")
+        if "embedding" in columns:
+            conn.execute("UPDATE students SET encoding = embedding")
+
+    # Legacy float64 dumps -> versioned float32
+    updates = []
+    for row_id, blob in conn.execute(
+        "SELECT id, encoding FROM students WHERE encoding IS NOT NULL"
+    ):
+        if not is_legacy(blob):
+            continue
+        vec = unpack_encoding(blob)
+        if vec is None:
+            report["skipped"] += 1
+            continue
+        updates.append((pack_encoding(vec, normalize=normalize), row_id))
+    conn.executemany("UPDATE students SET encoding = ? WHERE id = ?", updates)
+    report["converted"] = len(updates)
+
+    # Consolidate embeddings/*.npy into the database
+    if os.path.isdir(embed_dir):
+        # Students without a usable encoding (missing, unreadable or the
+        # all-zeros placeholder from the add-student form)
+        missing = {}
+        for row_id, roll, blob in conn.execute("SELECT id, roll, encoding FROM students"):
+            vec = unpack_encoding(blob)
+            if vec is None or not np.any(vec):
+                missing[roll] = row_id
+        npy_updates = []
+        for filename in sorted(os.listdir(embed_dir)):
+            if not filename.endswith(".npy"):
+                continue
+            roll = filename[: -len(".npy")]
+            if roll not in missing:
+                report["orphan_npy"] += int(
+                    conn.execute("SELECT 1 FROM students WHERE roll = ?", (roll,)).fetchone()
+                    is None
+                )
+                continue
+            vec = np.load(os.path.join(embed_dir, filename))
+            npy_updates.append((pack_encoding(vec, normalize=normalize), missing[roll]))
+        conn.executemany("UPDATE students SET encoding = ? WHERE id = ?", npy_updates)
+        report["imported_npy"] = len(npy_updates)
+
+
+def _migrate_v3(conn, report):
+    """Enrollment state per student, so the gallery never loads placeholders."""
+    if "enrollment_state" not in _columns(conn):
+        conn.execute(f"ALTER TABLE students ADD COLUMN {STATE_COLUMN}")
+
+    updates = [(blob_state(blob), row_id)
+               for row_id, blob in conn.execute("SELECT id, encoding FROM students")]
+    conn.executemany("UPDATE students SET enrollment_state = ? WHERE id = ?", updates)
+    report["no_face"] = sum(1 for state, _ in updates if state == NO_FACE)
+    report["recapture"] = sum(1 for state, _ in updates if state == NEEDS_RECAPTURE)
+
+
+if __name__ == "__main__":
+    from database.db_utils import STUD_DB, get_db_connection
+
+    conn = get_db_connection("students")
+    try:
+        result = migrate(conn)
+    finally:
+        conn.close()
+    print(f"✅ Migrated {STUD_DB}: {result}")
@@ -0,0 +1,270 @@
+# database/rollups.py
+"""
+Materialized attendance rollups in attendance.db, for the dashboard API.
+
+    school_days         date -> students present that day (a day counts as
+                        a school day once anyone is marked)
+    daily_class_rollup  (date, class_name, section) -> present count
+    student_rollup      roll -> days present, first/last date, current and
+                        best streak of consecutive school days
+
+The attendance writer (services/attendance_writer.py) updates them with
+apply_marks() inside the same transaction as the attendance rows it
+inserted, so reads never scan the raw attendance history. Dashboard
+questions such as "attendance % by class this month" then touch at most
+(days in range x classes) rollup rows, whatever the size of the history.
+
+rebuild() recomputes everything from the attendance table with set-based
+SQL (e.g. after restoring a backup or importing old data):
+
+    python -m database.rollups
+"""
+import json
+
+
+def create_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS school_days (
+            date TEXT PRIMARY KEY,
+            present INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_class_rollup (
+            date TEXT NOT NULL,
+            class_name TEXT NOT NULL,
+            section TEXT NOT NULL,
+            present INTEGER NOT NULL,
+            PRIMARY KEY (date, class_name, section)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS student_rollup (
+            roll TEXT PRIMARY KEY,
+            class_name TEXT NOT NULL,
+            section TEXT NOT NULL,
+            days_present INTEGER NOT NULL,
+            first_date TEXT NOT NULL,
+            last_date TEXT NOT NULL,
+            streak INTEGER NOT NULL,
+            best_streak INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_student_rollup_class ON student_rollup (class_name, section)"
+    )
+
+
+def needs_rebuild(conn):
+    """True when attendance rows exist but the rollups were never built."""
+    return (
+        conn.execute("SELECT 1 FROM school_days LIMIT 1").fetchone() is None
+        and conn.execute("SELECT 1 FROM attendance LIMIT 1").fetchone() is not None
+    )
+
+
+# ---------- Incremental maintenance ----------
+def apply_marks(conn, marks):
+    """
+    Folds newly inserted attendance rows into the rollups. `marks` are
+    (roll, date) pairs that were actually inserted (not ignored duplicates).
+    Call inside the transaction that inserted them, on an attendance
+    connection (students.db attached as `roster`). Marks should arrive in
+    date order; rebuild() repairs streaks after out-of-order backfills.
+    """
+    if not marks:
+        return
+    roster = {
+        roll: (class_name, section) for roll, class_name, section in conn.execute(
+            "SELECT roll, class_name, section FROM roster.students "
+            "WHERE roll IN (SELECT value FROM json_each(?))",
+            (json.dumps([roll for roll, _ in marks]),),
+        )
+    }
+    for roll, date in marks:
+        class_name, section = roster.get(roll) or ("", "")
+        class_name, section = class_name or "", section or ""
+
+        conn.execute(
+            "INSERT INTO school_days (date, present) VALUES (?, 1) "
+            "ON CONFLICT (date) DO UPDATE SET present = present + 1",
+            (date,),
+        )
+        conn.execute(
+            "INSERT INTO daily_class_rollup (date, class_name, section, present) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (date, class_name, section) DO UPDATE SET present = present + 1",
+            (date, class_name, section),
+        )
+
+        # The streak continues if the student was present on the previous school day
+        prev_day = conn.execute(
+            "SELECT MAX(date) FROM school_days WHERE date < ?", (date,)
+        ).fetchone()[0]
+        conn.execute("""
+            INSERT INTO student_rollup
+                (roll, class_name, section, days_present, first_date, last_date, streak, best_streak)
+            VALUES (:roll, :class_name, :section, 1, :date, :date, 1, 1)
+            ON CONFLICT (roll) DO UPDATE SET
+                class_name = excluded.class_name,
+                section = excluded.section,
+                days_present = days_present + 1,
+                first_date = MIN(first_date, excluded.first_date),
+                last_date = MAX(last_date, excluded.last_date),
+                streak = CASE
+                    WHEN last_date = :prev_day THEN streak + 1
+                    WHEN last_date > :date THEN streak
+                    ELSE 1 END,
+                best_streak = MAX(best_streak, CASE
+                    WHEN last_date = :prev_day THEN streak + 1
+                    WHEN last_date > :date THEN streak
+                    ELSE 1 END)
+        """, {"roll": roll, "class_name": class_name, "section": section, "date": date,
+              "prev_day": prev_day})
+
+
+# ---------- Full rebuild ----------
+def rebuild(conn):
+    """
+    Recomputes all rollups from the attendance table in one transaction,
+    joining classes from the attached students table. Streaks are computed
+    with the gaps-and-islands trick: numbering school days and each
+    student's days, consecutive attendance shares the same difference.
+    """
+    with conn:
+        conn.execute("DELETE FROM school_days")
+        conn.execute("DELETE FROM daily_class_rollup")
+        conn.execute("DELETE FROM student_rollup")
+
+        conn.execute("""
+            INSERT INTO school_days (date, present)
+            SELECT date, COUNT(*) FROM attendance GROUP BY date
+        """)
+        conn.execute("""
+            INSERT INTO daily_class_rollup (date, class_name, section, present)
+            SELECT a.date, COALESCE(r.class_name, ''), COALESCE(r.section, ''), COUNT(*)
+            FROM attendance a LEFT JOIN roster.students r ON r.roll = a.roll
+            GROUP BY a.date, COALESCE(r.class_name, ''), COALESCE(r.section, '')
+        """)
+        conn.execute("""
+            WITH day_no AS (
+                SELECT date, ROW_NUMBER() OVER (ORDER BY date) AS n FROM school_days
+            ),
+            islands AS (
+                SELECT a.roll, a.date,
+                       d.n - ROW_NUMBER() OVER (PARTITION BY a.roll ORDER BY a.date) AS island
+                FROM attendance a JOIN day_no d ON d.date = a.date
+            ),
+            runs AS (
+                SELECT roll, island, COUNT(*) AS length, MIN(date) AS run_start,
+                       MAX(date) AS run_end
+                FROM islands GROUP BY roll, island
+            ),
+            per_student AS (
+                SELECT roll, SUM(length) AS days_present, MAX(length) AS best_streak,
+                       MIN(run_start) AS first_date, MAX(run_end) AS last_date
+                FROM runs GROUP BY roll
+            )
+            INSERT INTO student_rollup
+                (roll, class_name, section, days_present, first_date, last_date, streak, best_streak)
+            SELECT p.roll, COALESCE(r.class_name, ''), COALESCE(r.section, ''), p.days_present,
+                   p.first_date, p.last_date,
+                   (SELECT length FROM runs WHERE roll = p.roll AND run_end = p.last_date),
+                   p.best_streak
+            FROM per_student p LEFT JOIN roster.students r ON r.roll = p.roll
+        """)
+
+
+# ---------- Queries ----------
+def school_day_count(conn, date_from, date_to):
+    return conn.execute(
+        "SELECT COUNT(*) FROM school_days WHERE date BETWEEN ? AND ?", (date_from, date_to)
+    ).fetchone()[0]
+
+
+def class_attendance(conn, date_from, date_to, class_sizes):
+    """
+    Attendance % per class/section over a date range. `class_sizes` maps
+    (class_name, section) -> enrolled students. Percent is present marks
+    over (enrolled x school days).
+    """
+    days = school_day_count(conn, date_from, date_to)
+    present = {
+        (c, s): n for c, s, n in conn.execute(
+            "SELECT class_name, section, SUM(present) FROM daily_class_rollup "
+            "WHERE date BETWEEN ? AND ? GROUP BY class_name, section",
+            (date_from, date_to),
+        )
+    }
+    result = []
+    for key in sorted(set(present) | set(class_sizes)):
+        enrolled = class_sizes.get(key, 0)
+        marks = present.get(key, 0)
+        possible = enrolled * days
+        result.append({
+            "class_name": key[0],
+            "section": key[1],
+            "enrolled": enrolled,
+            "school_days": days,
+            "present": marks,
+            "percent": round(100.0 * marks / possible, 1) if possible else None,
+        })
+    return result
+
+
+def daily_counts(conn, date_from, date_to, class_name=None, section=None):
+    """Present count per date (optionally for one class/section)."""
+    sql = "SELECT date, SUM(present) FROM daily_class_rollup WHERE date BETWEEN ? AND ?"
+    params = [date_from, date_to]
+    if class_name:
+        sql += " AND class_name = ?"
+        params.append(class_name)
+    if section:
+        sql += " AND section = ?"
+        params.append(section)
+    sql += " GROUP BY date ORDER BY date"
+    return [{"date": d, "present": n} for d, n in conn.execute(sql, params)]
+
+
+def student_summary(conn, roll, today):
+    """Days present, attendance % since first seen, and current/best streaks."""
+    row = conn.execute(
+        "SELECT class_name, section, days_present, first_date, last_date, streak, best_streak "
+        "FROM student_rollup WHERE roll = ?",
+        (roll,),
+    ).fetchone()
+    if row is None:
+        return None
+    class_name, section, days_present, first_date, last_date, streak, best_streak = row
+    days = school_day_count(conn, first_date, today)
+
+    # The stored streak is still running if the student was present on the
+    # latest school day before today (today itself may still be in progress)
+    last_school_day = conn.execute(
+        "SELECT MAX(date) FROM school_days WHERE date < ?", (today,)
+    ).fetchone()[0]
+    current = streak if last_date >= (last_school_day or last_date) else 0
+
+    return {
+        "roll": roll,
+        "class_name": class_name,
+        "section": section,
+        "days_present": days_present,
+        "school_days": days,
+        "percent": round(100.0 * days_present / days, 1) if days else None,
+        "first_date": first_date,
+        "last_date": last_date,
+        "current_streak": current,
+        "best_streak": best_streak,
+    }
+
+
+if __name__ == "__main__":
+    from database.db_utils import get_db_connection
+
+    conn = get_db_connection("attendance")
+    try:
+        rebuild(conn)
+        days = conn.execute("SELECT COUNT(*) FROM school_days").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"✅ Rebuilt attendance rollups ({days} school days)")
@@ -1,65 +1,59 @@
 # enroll.py
 import cv2
 import face_recognition
-import sqlite3
 import os
-import numpy as np
+
+from config import ENROLL_SAMPLES
+from database.db_utils import init_databases, add_student
+from services.face_templates import build_template
 
 # Create folders if not exist
 os.makedirs("students", exist_ok=True)
-os.makedirs("embeddings", exist_ok=True)
-os.makedirs("database", exist_ok=True)
-
-# Connect to database
-conn = sqlite3.connect("database/students.db")
-c = conn.cursor()
 
-# Create students table
-c.execute('''CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                roll TEXT UNIQUE,
-                class_name TEXT,
-                section TEXT
-            )''')
-conn.commit()
+# Encodings are stored in students.db (database/encoding_format.py),
+# not as embeddings/*.npy files any more
+init_databases()
 
 # Function to enroll student
 def enroll_student(name, roll, class_name, section):
-    # Capture image via webcam
+    # Capture several images via webcam
     cap = cv2.VideoCapture(0)
-    print("📸 Look at the camera. Press 's' to capture your face.")
-    while True:
+    print(f"📸 Look at the camera. Press 's' to capture up to {ENROLL_SAMPLES} photos, "
+          "turning your head slightly between them; 'q' to finish.")
+    image_paths = []
+    while len(image_paths) < ENROLL_SAMPLES:
         ret, frame = cap.read()
         cv2.imshow("Enroll Student", frame)
-        key = cv2.waitKey(1)
-        if key & 0xFF == ord('s'):  # Press 's' to save
-            image_path = f"students/{roll}.jpg"
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('s'):  # Press 's' to save
+            image_path = f"students/{roll}.jpg" if not image_paths else \
+                f"students/{roll}_{len(image_paths)}.jpg"
             cv2.imwrite(image_path, frame)
+            image_paths.append(image_path)
+            print(f"📷 Captured {len(image_paths)}/{ENROLL_SAMPLES}")
+        elif key == ord('q') and image_paths:
             break
     cap.release()
     cv2.destroyAllWindows()
 
-    # Generate face encoding
-    image = face_recognition.load_image_file(image_path)
-    encodings = face_recognition.face_encodings(image)
-    if len(encodings) == 0:
+    # Generate face encodings (one face per capture)
+    encodings = []
+    for image_path in image_paths:
+        image = face_recognition.load_image_file(image_path)
+        found = face_recognition.face_encodings(image)
+        if found:
+            encodings.append(found[0])
+        else:
+            print(f"⚠️ No face detected in {image_path}, skipping it.")
+            os.remove(image_path)
+    if not encodings:
         print("⚠️ No face detected. Try again!")
-        os.remove(image_path)
         return
-    encoding = encodings[0]
-
-    # Save embedding
-    np.save(f"embeddings/{roll}.npy", encoding)
 
-    # Insert into database
-    try:
-        c.execute("INSERT INTO students (name, roll, class_name, section) VALUES (?, ?, ?, ?)",
-                  (name, roll, class_name, section))
-        conn.commit()
-        print(f"✅ Student {name} enrolled successfully!")
-    except sqlite3.IntegrityError:
-        print(f"⚠️ Roll {roll} already exists!")
+    # Insert centroid + most distinct samples into database
+    centroid, exemplars = build_template(encodings)
+    if add_student(name, roll, class_name, section, centroid, exemplars):
+        print(f"✅ Student {name} enrolled successfully from {len(encodings)} samples!")
 
 # Example usage
 if __name__ == "__main__":
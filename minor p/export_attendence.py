@@ -1,14 +1,43 @@
-import sqlite3
-import pandas as pd
+# export_attendence.py
+"""
+Export attendance history from attendance.db, streamed in chunks so memory
+stays flat however long the history is (see services/exporter.py).
+
+    python export_attendence.py                                  # xlsx, everything
+    python export_attendence.py --format csv --from 2025-01-01 --to 2025-06-30
+    python export_attendence.py --format parquet --class 10 --section A -o term1.parquet
+"""
+import argparse
+import sys
 from datetime import datetime
 
-DB_PATH = "database/students.db"
+from services.exporter import FORMATS, ExportError, attendance_chunks, export_to_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export attendance records.")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="xlsx")
+    parser.add_argument("--from", dest="date_from", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="last date, YYYY-MM-DD")
+    parser.add_argument("--class", dest="class_name")
+    parser.add_argument("--section")
+    parser.add_argument("--roll")
+    parser.add_argument("-o", "--output", help="output file (default: attendance_<timestamp>)")
+    args = parser.parse_args()
+
+    filename = args.output or (
+        f"attendance_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{FORMATS[args.format][1]}"
+    )
+    chunks = attendance_chunks(args.date_from, args.date_to, args.roll, args.class_name,
+                               args.section)
+    try:
+        export_to_path(args.format, filename, chunks)
+    except ExportError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Attendance exported to {filename}")
+    return 0
 
-conn = sqlite3.connect(DB_PATH)
-df = pd.read_sql_query("SELECT * FROM attendance", conn)
-conn.close()
 
-date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-filename = f"attendance_{date_str}.xlsx"
-df.to_excel(filename, index=False)
-print(f"✅ Attendance exported to {filename}")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 # routes/add_student.py
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from database.db_utils import add_student
-import numpy as np
 
 add_student_bp = Blueprint("add_student_bp", __name__)
 
@@ -17,9 +16,9 @@ def add_student_page():
             flash("⚠️ Please fill in all fields!", "warning")
             return redirect(url_for("add_student_bp.add_student_page"))
 
-        # placeholder encoding (0s array until face added)
-        encoding = np.zeros((128,), dtype=np.float64)
-        success = add_student(name, roll, class_name, section, encoding)
+        # No face yet: stored as "no_face" and kept out of recognition
+        # until one is captured on the enroll page
+        success = add_student(name, roll, class_name, section)
 
         if success:
             flash(f"✅ Student '{name}' added successfully!", "success")
@@ -1,5 +1,14 @@
-from flask import Blueprint, render_template, request, jsonify
-from services.face_service import recognize_faces_from_base64
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import Blueprint, Response, render_template, request, jsonify, current_app
+from config import RECOGNITION_TIMEOUT
+from database.db_utils import create_scan_session
+from services import metrics
+from services.gallery import get_gallery
+from services.recognition_pool import PoolBusy, get_recognition_pool
+from services.scan_stream import StreamsUnavailable, get_stream
+from services.tracker import get_tracker
 
 attendance_bp = Blueprint("attendance_bp", __name__)
 
@@ -9,16 +18,191 @@ def attendance_page():
     return render_template("attendance.html")
 
 
+RAW_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "application/octet-stream"}
+
+
+def _read_frame():
+    """
+    Returns (params, payload) for a frame upload, in one of three shapes:
+      * raw image body (Content-Type: image/jpeg etc.), fields in the query string
+      * multipart/form-data with an "image" file, fields in the form
+      * JSON {"image": <base64 data URL>, ...} (legacy)
+    """
+    if request.mimetype in RAW_IMAGE_TYPES:
+        return request.args, request.get_data(cache=False)
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        return request.form, upload.read() if upload else None
+    params = request.get_json(silent=True) or {}
+    return params, params.get("image")
+
+
+def _tracker_key(params):
+    # One tracker per scanning session/camera, so faces already recognized
+    # on earlier frames are not re-encoded
+    return params.get("session_id") or params.get("camera_id") or request.remote_addr
+
+
+def _recognize_request():
+    """
+    Shared handler for /attendance/recognize and /scan/frame.
+
+    Accepts the frame shapes of _read_frame().
+    Optional scope fields: class_name, section, or a session_id bound to them.
+    camera_id (or session_id) keys the per-camera face tracker.
+    """
+    # Imported here so pages that never recognize do not load OpenCV/dlib
+    from services.face_service import (
+        recognize_faces_from_base64,
+        recognize_faces_from_bytes,
+        resolve_scope,
+    )
+
+    params, payload = _read_frame()
+    started = time.perf_counter()
+    if not payload:
+        metrics.inc("attendif_frames_total", outcome="rejected")
+        return jsonify({"error": "No image provided."}), 400
+
+    try:
+        class_name, section = resolve_scope(
+            params.get("class_name"), params.get("section"), params.get("session_id")
+        )
+    except ValueError as e:
+        metrics.inc("attendif_frames_total", outcome="rejected")
+        return jsonify({"matches": [], "error": str(e)}), 400
+
+    tracker_key = _tracker_key(params)
+
+    # Per-stage timings are always collected for /metrics, but only returned
+    # (body + Server-Timing header) when the app runs in debug mode
+    options = {"class_name": class_name, "section": section, "debug": True}
+
+    pool = get_recognition_pool()
+    if pool is not None:
+        try:
+            future = pool.submit(payload, tracker_key, **options)
+        except PoolBusy:
+            metrics.inc("attendif_frames_total", outcome="busy")
+            return (jsonify({"matches": [], "error": "Recognition busy, frame dropped."}),
+                    429, {"Retry-After": "1"})
+        try:
+            result = future.result(timeout=RECOGNITION_TIMEOUT)
+        except FutureTimeout:
+            metrics.inc("attendif_frames_total", outcome="timeout")
+            return jsonify({"matches": [], "error": "Recognition timed out."}), 504
+        return _recognition_response(result, started)
+
+    tracker = get_tracker(tracker_key)
+    if isinstance(payload, str):
+        result = recognize_faces_from_base64(payload, tracker=tracker, **options)
+    else:
+        result = recognize_faces_from_bytes(payload, tracker=tracker, **options)
+    return _recognition_response(result, started)
+
+
+def _recognition_response(result, started):
+    """Feeds a recognition result into /metrics and builds the JSON response."""
+    timings = result.pop("timings", None) or {}
+    timings["total_ms"] = (time.perf_counter() - started) * 1000.0
+    metrics.record_recognition(result, timings)
+
+    if not current_app.debug:
+        return jsonify(result)
+    result["timings"] = timings
+    response = jsonify(result)
+    response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+
 # ---------- Face Recognition API ----------
 @attendance_bp.route("/attendance/recognize", methods=["POST"])
 def recognize_faces():
     """
-    Receives a Base64 image from the browser (AJAX)
-    and returns JSON with bounding boxes + names.
+    Receives an image from the browser (raw JPEG body, multipart
+    blob or Base64 JSON) and returns JSON with bounding boxes + names.
+    """
+    return _recognize_request()
+
+
+@attendance_bp.route("/scan/frame", methods=["POST"])
+def scan_frame():
+    """One-shot frame endpoint (request/response) for simple clients."""
+    return _recognize_request()
+
+
+# ---------- Streaming Scan (Server-Sent Events) ----------
+@attendance_bp.route("/scan")
+def scan_page():
+    return render_template("scan.html")
+
+
+@attendance_bp.route("/scan/stream")
+def scan_stream():
+    """
+    Event stream of recognition results and new marks for one camera
+    (camera_id or session_id), see services/scan_stream.py.
     """
-    data = request.get_json()
-    if not data or "image" not in data:
+    try:
+        stream = get_stream(_tracker_key(request.args))
+    except StreamsUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    listener = stream.subscribe()
+    return Response(stream.events(listener), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@attendance_bp.route("/scan/stream/frame", methods=["POST"])
+def scan_stream_frame():
+    """
+    Queues a frame for the camera's stream and returns 202 at once; the
+    result arrives on /scan/stream. Same frame shapes and scope fields as
+    /scan/frame, plus an optional integer "seq" echoed back in the result.
+    """
+    from services.face_service import resolve_scope
+
+    params, payload = _read_frame()
+    if not payload:
+        metrics.inc("attendif_frames_total", outcome="rejected")
         return jsonify({"error": "No image provided."}), 400
+    try:
+        class_name, section = resolve_scope(
+            params.get("class_name"), params.get("section"), params.get("session_id")
+        )
+        seq = int(params["seq"]) if params.get("seq") not in (None, "") else None
+    except ValueError as e:
+        metrics.inc("attendif_frames_total", outcome="rejected")
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        stream = get_stream(_tracker_key(params))
+    except StreamsUnavailable as e:
+        metrics.inc("attendif_frames_total", outcome="rejected")
+        return jsonify({"error": str(e)}), 503
+    options = {"class_name": class_name, "section": section, "debug": True}
+    seq = stream.push(payload, options, seq, show_timings=current_app.debug)
+    return jsonify({"seq": seq, "stale": stream.stats["stale"],
+                    "listeners": stream.listener_count()}), 202
+
+
+# ---------- Scan Session API ----------
+@attendance_bp.route("/attendance/session", methods=["POST"])
+def start_scan_session():
+    """Creates a session bound to a class/section; frames can then send just session_id."""
+    data = request.get_json(silent=True) or request.form
+    class_name = data.get("class_name")
+    if not class_name:
+        return jsonify({"error": "class_name is required."}), 400
+
+    session_id = create_scan_session(class_name, data.get("section") or None)
+    return jsonify({"session_id": session_id, "class_name": class_name,
+                    "section": data.get("section") or None})
+
 
-    result = recognize_faces_from_base64(data["image"])
-    return jsonify(result)
+# ---------- Gallery Cache Stats ----------
+@attendance_bp.route("/attendance/gallery/stats")
+def gallery_stats():
+    gallery = get_gallery()
+    # size counts templates; multi-sample students have several
+    students = len(set(gallery.snapshot().rolls))
+    return jsonify({"size": len(gallery), "students": students, **gallery.stats})
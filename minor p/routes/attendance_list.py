@@ -1,16 +1,86 @@
 # routes/attendance_list.py
-from flask import Blueprint, render_template
-import sqlite3
-from config import ATT_DB
+from datetime import datetime
+
+from flask import Blueprint, Response, render_template, request, jsonify, abort, stream_with_context
+
+from config import LIST_MAX_PAGE_SIZE, LIST_PAGE_SIZE
+from database.db_utils import get_attendance_page
+from services.exporter import FORMATS, ExportError, attendance_chunks, check_format, stream_export
 
 attendance_list_bp = Blueprint("attendance_list_bp", __name__)
 
+
+def page_size():
+    """?limit= clamped to LIST_MAX_PAGE_SIZE (shared with routes/students.py)."""
+    limit = request.args.get("limit", LIST_PAGE_SIZE, type=int)
+    return max(1, min(limit, LIST_MAX_PAGE_SIZE))
+
+
+def _date_arg(name):
+    value = request.args.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        abort(400, description=f"{name} must be a YYYY-MM-DD date")
+
+
+def _attendance_filters():
+    return {
+        "date_from": _date_arg("date_from"),
+        "date_to": _date_arg("date_to"),
+        "roll": request.args.get("roll", "").strip() or None,
+        "class_name": request.args.get("class_name", "").strip() or None,
+        "section": request.args.get("section", "").strip() or None,
+    }
+
+
+def _query_attendance(filters):
+    return get_attendance_page(after=request.args.get("after"), limit=page_size(), **filters)
+
+
 @attendance_list_bp.route("/attendance_list")
 def view_attendance_list():
-    """Display all attendance records from the database."""
-    conn = sqlite3.connect(ATT_DB)
-    c = conn.cursor()
-    c.execute("SELECT id, roll, name, date, time FROM attendance ORDER BY date DESC, time DESC")
-    records = c.fetchall()
-    conn.close()
-    return render_template("attendance_list.html", records=records)
+    """Display attendance records, newest first, one page at a time."""
+    filters = _attendance_filters()
+    records, next_cursor = _query_attendance(filters)
+    return render_template("attendance_list.html", records=records, filters=filters,
+                           next_cursor=next_cursor)
+
+
+@attendance_list_bp.route("/api/attendance")
+def attendance_list_json():
+    """JSON variant of /attendance_list (same filters and cursor)."""
+    filters = _attendance_filters()
+    records, next_cursor = _query_attendance(filters)
+    return jsonify({
+        "records": [
+            {"id": r[0], "roll": r[1], "name": r[2], "date": r[3], "time": r[4]}
+            for r in records
+        ],
+        "next": next_cursor,
+    })
+
+
+@attendance_list_bp.route("/attendance/export")
+def export_attendance():
+    """
+    Streams the filtered attendance history as csv (default), xlsx or parquet
+    in a chunked response; memory stays flat regardless of history length.
+    """
+    fmt = request.args.get("format", "csv").lower()
+    try:
+        check_format(fmt)
+    except ExportError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filters = _attendance_filters()
+    chunks = attendance_chunks(**filters)
+    mimetype, ext = FORMATS[fmt]
+    filename = f"attendance_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}{ext}"
+    return Response(
+        stream_with_context(stream_export(fmt, chunks)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,133 @@
+# routes/dashboard.py
+"""
+Dashboard JSON API. Summaries are answered from the precomputed rollups
+(database/rollups.py) rather than the raw attendance history; per-day
+roster questions (absentees, arrivals, late comers) are single indexed
+queries across students.db and attendance.db (db_utils, roster queries).
+"""
+import calendar
+from datetime import date, datetime
+
+from flask import Blueprint, request, jsonify, abort
+
+from config import LATE_AFTER
+from database import rollups
+from database.db_utils import get_absentees, get_arrivals, get_class_sizes, get_db_connection
+
+dashboard_bp = Blueprint("dashboard_bp", __name__, url_prefix="/api/dashboard")
+
+
+def _date_range():
+    """
+    ?month=YYYY-MM or ?date_from=&date_to= (default: this month so far).
+    Dates are returned zero-padded (2025-1-5 -> 2025-01-05), since they are
+    compared as text with the stored YYYY-MM-DD dates.
+    """
+    try:
+        if request.args.get("month"):
+            month = datetime.strptime(request.args["month"], "%Y-%m")
+            last = calendar.monthrange(month.year, month.month)[1]
+            return month.strftime("%Y-%m-01"), month.strftime(f"%Y-%m-{last:02d}")
+        today = date.today()
+        date_from = request.args.get("date_from") or today.strftime("%Y-%m-01")
+        date_to = request.args.get("date_to") or today.strftime("%Y-%m-%d")
+        return tuple(datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+                     for value in (date_from, date_to))
+    except ValueError:
+        abort(400, description="Use month=YYYY-MM or date_from/date_to=YYYY-MM-DD")
+
+
+@dashboard_bp.route("/classes")
+def class_summary():
+    """Attendance % per class/section over a month or date range."""
+    date_from, date_to = _date_range()
+    sizes = get_class_sizes()
+    conn = get_db_connection("attendance")
+    try:
+        classes = rollups.class_attendance(conn, date_from, date_to, sizes)
+    finally:
+        conn.close()
+    return jsonify({"date_from": date_from, "date_to": date_to, "classes": classes})
+
+
+@dashboard_bp.route("/daily")
+def daily_summary():
+    """Students present per day, optionally for one class/section."""
+    date_from, date_to = _date_range()
+    conn = get_db_connection("attendance")
+    try:
+        days = rollups.daily_counts(conn, date_from, date_to,
+                                    request.args.get("class_name"), request.args.get("section"))
+    finally:
+        conn.close()
+    return jsonify({"date_from": date_from, "date_to": date_to, "days": days})
+
+
+@dashboard_bp.route("/students/<roll>")
+def student_summary(roll):
+    """Days present, attendance % and streaks for one student."""
+    conn = get_db_connection("attendance")
+    try:
+        summary = rollups.student_summary(conn, roll, date.today().strftime("%Y-%m-%d"))
+    finally:
+        conn.close()
+    if summary is None:
+        return jsonify({"error": f"No attendance recorded for roll {roll}."}), 404
+    return jsonify(summary)
+
+
+# ---------- Per-day roster views ----------
+def _day():
+    value = request.args.get("date") or date.today().strftime("%Y-%m-%d")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        abort(400, description="date must be YYYY-MM-DD")
+
+
+def _class_args():
+    return request.args.get("class_name") or None, request.args.get("section") or None
+
+
+@dashboard_bp.route("/absentees")
+def absentees():
+    """Students of a class (or the whole school) not marked on ?date= (default today)."""
+    day = _day()
+    rows = get_absentees(day, *_class_args())
+    return jsonify({
+        "date": day,
+        "count": len(rows),
+        "students": [
+            {"id": r[0], "name": r[1], "roll": r[2], "class_name": r[3], "section": r[4]}
+            for r in rows
+        ],
+    })
+
+
+def _arrivals_json(day, rows, **extra):
+    return jsonify({
+        "date": day,
+        **extra,
+        "count": len(rows),
+        "arrivals": [
+            {"roll": r[0], "name": r[1], "class_name": r[2], "section": r[3], "first_seen": r[4]}
+            for r in rows
+        ],
+    })
+
+
+@dashboard_bp.route("/arrivals")
+def arrivals():
+    """First-seen time of every student present on ?date=, earliest first."""
+    day = _day()
+    return _arrivals_json(day, get_arrivals(day, None, *_class_args()))
+
+
+@dashboard_bp.route("/late")
+def late_arrivals():
+    """Students first seen after ?after=HH:MM[:SS] (default LATE_AFTER) on ?date=."""
+    day = _day()
+    after = request.args.get("after") or LATE_AFTER
+    if len(after) == 5:
+        after += ":00"
+    return _arrivals_json(day, get_arrivals(day, after, *_class_args()), after=after)
@@ -1,14 +1,17 @@
 # routes/enroll.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-import numpy as np
-import face_recognition
-import cv2
-import base64
-from io import BytesIO
-from PIL import Image
+from flask import (Blueprint, Response, render_template, request, redirect, url_for, flash,
+                   jsonify, stream_with_context)
+import json
+import os
+import shutil
+import tempfile
 
-from database.db_utils import add_student
-from services.face_service import encode_face_from_base64
+from config import ENROLL_SAMPLES
+from database.db_utils import add_student, get_enrollment_state, set_student_face
+from database.encoding_format import ENROLLED
+from services.face_templates import build_template
+from services.bulk_import import import_roster
+from werkzeug.utils import secure_filename
 
 enroll_bp = Blueprint("enroll", __name__, url_prefix="/enroll")
 
@@ -16,30 +19,93 @@ enroll_bp = Blueprint("enroll", __name__, url_prefix="/enroll")
 @enroll_bp.route("/", methods=["GET", "POST"])
 def enroll_student():
     if request.method == "POST":
+        # Imported here so only enrollment requests load the face models
+        from services.face_service import encode_face_from_base64
+
         name = request.form.get("name")
         roll = request.form.get("roll")
         class_name = request.form.get("class_name")
         section = request.form.get("section")
-        image_data = request.form.get("image_data")  # from webcam (base64)
+        # One or more webcam captures (base64), see templates/enroll.html
+        image_data = [d for d in request.form.getlist("image_data") if d]
 
         # Check all fields
         if not all([name, roll, class_name, section, image_data]):
             flash("⚠️ Please fill all fields and capture a photo!", "warning")
             return redirect(url_for("enroll.enroll_student"))
 
-        # Encode face from base64 data
-        encoding = encode_face_from_base64(image_data)
-        if encoding is None:
+        # Encode every capture; frames without a face are skipped
+        encodings = [e for e in map(encode_face_from_base64, image_data) if e is not None]
+        if not encodings:
             flash("❌ No face detected. Try again.", "danger")
             return redirect(url_for("enroll.enroll_student"))
 
-        # Save to database
-        success = add_student(name, roll, class_name, section, encoding)
+        # Centroid + most distinct samples (services/face_templates.py)
+        centroid, exemplars = build_template(encodings)
+
+        # Save to database: a new student, or the face for one added
+        # without a face (or whose stored face was unusable)
+        state = get_enrollment_state(roll)
+        if state is None:
+            success = add_student(name, roll, class_name, section, centroid, exemplars)
+        elif state != ENROLLED:
+            success = set_student_face(roll, centroid, exemplars)
+        else:
+            success = False
         if success:
-            flash(f"✅ {name} enrolled successfully!", "success")
+            flash(f"✅ {name} enrolled successfully from {len(encodings)} "
+                  f"sample{'s' if len(encodings) != 1 else ''}!", "success")
         else:
             flash("⚠️ Roll number already exists!", "danger")
 
         return redirect(url_for("enroll.enroll_student"))
 
-    return render_template("enroll.html")
+    # Prefilled from the students list's "Add Face" link
+    return render_template("enroll.html", samples=ENROLL_SAMPLES, student=request.args)
+
+
+# ---------- Bulk Enrollment ----------
+def _save_bulk_upload(workdir):
+    """Saves the roster and photos (one .zip or many image files) into workdir."""
+    roster = request.files.get("roster")
+    photos = request.files.getlist("photos")
+    if roster is None or not roster.filename or not photos:
+        return None, None
+
+    roster_path = os.path.join(workdir, "roster.csv")
+    roster.save(roster_path)
+
+    if len(photos) == 1 and photos[0].filename.lower().endswith(".zip"):
+        photos_path = os.path.join(workdir, "photos.zip")
+        photos[0].save(photos_path)
+    else:
+        photos_path = os.path.join(workdir, "photos")
+        os.makedirs(photos_path)
+        for photo in photos:
+            name = secure_filename(os.path.basename(photo.filename))
+            if name:
+                photo.save(os.path.join(photos_path, name))
+    return roster_path, photos_path
+
+
+@enroll_bp.route("/bulk", methods=["GET", "POST"])
+def enroll_bulk():
+    """Streams import progress as newline-delimited JSON events."""
+    if request.method == "GET":
+        return render_template("enroll_bulk.html")
+
+    workdir = tempfile.mkdtemp(prefix="bulk_enroll_")
+    roster_path, photos_path = _save_bulk_upload(workdir)
+    if roster_path is None:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return jsonify({"error": "Upload a roster CSV and a .zip or images of photos."}), 400
+
+    def generate():
+        try:
+            for event in import_roster(roster_path, photos_path):
+                yield json.dumps(event) + "\n"
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
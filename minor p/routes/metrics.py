@@ -0,0 +1,14 @@
+# routes/metrics.py
+from flask import Blueprint, Response, jsonify, request
+
+from services.metrics import REGISTRY
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+@metrics_bp.route("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint; ?format=json gives p50/p95/p99 per series."""
+    if request.args.get("format") == "json":
+        return jsonify(REGISTRY.snapshot())
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -1,11 +1,49 @@
 # routes/students.py
-from flask import Blueprint, render_template
-from database.db_utils import get_all_students
+from flask import Blueprint, render_template, request, jsonify
+
+from database.db_utils import get_enrollment_counts, get_students_page
+from database.encoding_format import ENROLLMENT_STATES
+from routes.attendance_list import page_size
 
 students_bp = Blueprint("students_bp", __name__)
 
+STATE_FILTERS = ENROLLMENT_STATES + ("pending",)
+
+
+def _student_filters():
+    return {
+        "class_name": request.args.get("class_name", "").strip() or None,
+        "section": request.args.get("section", "").strip() or None,
+        "roll": request.args.get("roll", "").strip() or None,
+        # enrolled / no_face / recapture, or "pending" for every student still
+        # waiting for a usable face capture
+        "state": request.args.get("state") if request.args.get("state") in STATE_FILTERS else None,
+    }
+
+
+def _query_students(filters):
+    return get_students_page(after=request.args.get("after"), limit=page_size(), **filters)
+
+
 @students_bp.route("/students")
 def students_list():
-    """Display all registered students."""
-    students = get_all_students()
-    return render_template("students.html", students=students)
+    """Display registered students, one page at a time."""
+    filters = _student_filters()
+    students, next_cursor = _query_students(filters)
+    return render_template("students.html", students=students, filters=filters,
+                           next_cursor=next_cursor, counts=get_enrollment_counts())
+
+
+@students_bp.route("/api/students")
+def students_list_json():
+    """JSON variant of /students (same filters and cursor)."""
+    filters = _student_filters()
+    students, next_cursor = _query_students(filters)
+    return jsonify({
+        "students": [
+            {"id": s[0], "name": s[1], "roll": s[2], "class_name": s[3], "section": s[4],
+             "enrollment_state": s[5]}
+            for s in students
+        ],
+        "next": next_cursor,
+    })
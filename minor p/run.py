@@ -1,4 +1,13 @@
 # run.py
+"""
+Development server: python run.py
+
+In production serve `run:app` from ONE process with several threads,
+e.g. gunicorn -w 1 --threads 16 run:app. Scan streams (/scan/stream) and
+the per-camera trackers are kept in process memory; with more workers only
+the first one serves streams and the others answer them with 503. Use
+RECOGNITION_WORKERS (config.py) to spread recognition over CPU cores.
+"""
 from app import create_app
 
 app = create_app()
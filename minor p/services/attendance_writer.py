@@ -0,0 +1,179 @@
+"""
+services/attendance_writer.py
+Buffered, batched attendance writes.
+
+Recognition events are queued in memory and flushed to attendance.db in a
+single transaction every ATTENDANCE_FLUSH_INTERVAL seconds, or as soon as
+ATTENDANCE_FLUSH_SIZE events are pending. Rows go in with INSERT OR IGNORE
+against the UNIQUE(roll, date) index, so there is no check-then-insert
+round trip, and an in-memory "already marked today" set means repeat
+sightings of the same student never reach the database at all. The cache
+keeps the last MARKED_CACHE_DAYS dates, so sources replaying footage from
+different days (python attendance.py --headless --start ...) do not
+reload it from the database on every switch.
+
+The dashboard rollups (database/rollups.py) are updated in the same
+transaction, from the rows that were actually inserted.
+"""
+
+import atexit
+import itertools
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from config import ATTENDANCE_FLUSH_INTERVAL, ATTENDANCE_FLUSH_SIZE
+from database import rollups
+from database.db_utils import get_db_connection
+from services import metrics
+
+MARKED_CACHE_DAYS = 8  # dates kept in the "already marked" cache
+
+
+class AttendanceWriter:
+    def __init__(self, flush_interval=ATTENDANCE_FLUSH_INTERVAL, flush_size=ATTENDANCE_FLUSH_SIZE):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._flushing = []           # batch being written right now
+        self._marked = OrderedDict()  # date -> rolls marked that day, least recent first
+        self._thread = None
+        self._stopped = False
+
+        self.stats = {"events": 0, "queued": 0, "flushes": 0, "rows_written": 0}
+
+    # ---------- Marked-per-day cache ----------
+    def _marked_on(self, day):
+        """
+        Rolls already marked on `day` (called with the lock held). A date not
+        cached yet is seeded from rows written earlier (other runs/workers)
+        plus rows still queued or being flushed, which are not in the table yet.
+        """
+        marked = self._marked.get(day)
+        if marked is not None:
+            self._marked.move_to_end(day)
+            return marked
+
+        conn = get_db_connection("attendance")
+        try:
+            rows = conn.execute("SELECT roll FROM attendance WHERE date = ?", (day,)).fetchall()
+        finally:
+            conn.close()
+        marked = {r[0] for r in rows}
+        marked.update(r[0] for r in itertools.chain(self._pending, self._flushing) if r[2] == day)
+        self._marked[day] = marked
+        if len(self._marked) > MARKED_CACHE_DAYS:
+            self._marked.popitem(last=False)
+        return marked
+
+    # ---------- Public API ----------
+    def submit(self, roll, name, when=None):
+        """
+        Queue a sighting. Returns True if this is the student's first mark
+        today (it will be written on the next flush), False if already marked.
+        """
+        when = when or datetime.now()
+        today = when.strftime("%Y-%m-%d")
+
+        with self._cond:
+            self.stats["events"] += 1
+            marked = self._marked_on(today)
+            if roll in marked:
+                return False
+
+            marked.add(roll)
+            self._pending.append((roll, name, today, when.strftime("%H:%M:%S")))
+            self.stats["queued"] += 1
+            self._ensure_thread()
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify()
+            return True
+
+    def flush(self):
+        """Write everything pending in one transaction. Returns rows inserted."""
+        with self._cond:
+            batch, self._pending = self._pending, []
+            self._flushing = batch
+        if not batch:
+            return 0
+
+        conn = get_db_connection("attendance")
+        try:
+            with metrics.timed("attendif_db_seconds", op="attendance_flush"), conn:
+                inserted = []
+                for row in sorted(batch, key=lambda r: (r[2], r[3])):
+                    cur = conn.execute(
+                        "INSERT OR IGNORE INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
+                        row,
+                    )
+                    if cur.rowcount == 1:
+                        inserted.append((row[0], row[2]))
+                rollups.apply_marks(conn, inserted)
+                written = len(inserted)
+        except Exception as e:
+            print("❌ Attendance flush failed, will retry:", e)
+            metrics.inc("attendif_db_commits_total", op="attendance_flush_failed")
+            with self._cond:
+                self._pending[:0] = batch
+                self._flushing = []
+            return 0
+        finally:
+            conn.close()
+
+        with self._cond:
+            self._flushing = []
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += written
+        metrics.inc("attendif_db_commits_total", op="attendance_flush")
+        metrics.inc("attendif_db_rows_total", written, op="attendance_flush")
+        return written
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self):
+        """Flush whatever is left and stop the background thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    # ---------- Background flusher ----------
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(
+                target=self._run, name="attendance-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped and len(self._pending) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+
+# === Process-wide singleton ===
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_attendance_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AttendanceWriter()
+                atexit.register(_writer.stop)
+                metrics.register_gauge("attendif_attendance_pending",
+                                       lambda: [({}, _writer.pending())])
+    return _writer
@@ -0,0 +1,217 @@
+"""
+services/bulk_import.py
+Bulk enrollment from a roster CSV plus a folder (or .zip) of photos.
+
+Roster columns: name, roll, class_name (or class), section and an optional
+photo column. Without a photo column, each student's photo is looked up as
+<roll>.jpg / .jpeg / .png anywhere in the folder or zip.
+
+Detection and encoding run in a process pool; workers read the photos
+themselves, so only file names cross the process boundary. Students are
+inserted BULK_IMPORT_BATCH_SIZE at a time, one transaction per batch.
+
+import_roster() is a generator of progress events (plain dicts), consumed
+by bulk_enroll.py (CLI) and POST /enroll/bulk (NDJSON stream):
+
+    {"event": "start", "total": ...}
+    {"event": "failure", "line": ..., "roll": ..., "reason": ...}
+    {"event": "progress", "done": ..., "total": ..., "enrolled": ..., "failed": ...}
+    {"event": "done", "total": ..., "enrolled": ..., "failed": ..., "seconds": ...}
+"""
+
+import csv
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import multiprocessing as mp
+
+from config import ALLOWED_EXTENSIONS, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_WORKERS
+from database.db_utils import add_students_bulk, get_enrolled_rolls
+
+REQUIRED_COLUMNS = ("name", "roll", "class_name", "section")
+COLUMN_ALIASES = {"class": "class_name", "roll_no": "roll", "image": "photo"}
+PROGRESS_EVERY = 25  # rows between progress events
+
+
+# ---------- Roster ----------
+def read_roster(roster_path):
+    """Yields (line_number, row dict) with normalized column names."""
+    with open(roster_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None:
+            return
+        reader.fieldnames = [
+            COLUMN_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in reader.fieldnames
+        ]
+        for row in reader:
+            yield reader.line_num, {k: (v or "").strip() for k, v in row.items() if k}
+
+
+# ---------- Photo source (folder or zip) ----------
+def _is_image(filename):
+    return filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
+
+
+def index_photos(photos_path):
+    """
+    Maps lowercase file name and lowercase stem -> path (folder) or member
+    name (zip), so both "photo" column values and roll numbers resolve.
+    """
+    if zipfile.is_zipfile(photos_path):
+        with zipfile.ZipFile(photos_path) as zf:
+            names = [n for n in zf.namelist() if not n.endswith("/")]
+    else:
+        names = [
+            os.path.relpath(os.path.join(root, f), photos_path)
+            for root, _, files in os.walk(photos_path)
+            for f in files
+        ]
+
+    index = {}
+    for name in names:
+        base = os.path.basename(name)
+        if not _is_image(base):
+            continue
+        index.setdefault(base.lower(), name)
+        index.setdefault(base.rsplit(".", 1)[0].lower(), name)
+    return index
+
+
+# ---------- Worker process ----------
+_zip_cache = {}
+
+
+def _read_photo(photos_path, member):
+    if zipfile.is_zipfile(photos_path):
+        zf = _zip_cache.get(photos_path)
+        if zf is None:
+            zf = _zip_cache[photos_path] = zipfile.ZipFile(photos_path)
+        return zf.read(member)
+    with open(os.path.join(photos_path, member), "rb") as f:
+        return f.read()
+
+
+def encode_photo(photos_path, member):
+    """
+    Returns (encoding, None) for a photo with exactly one face, otherwise
+    (None, reason).
+    """
+    from services.face_service import detect_faces, load_models
+    from services.image_io import decode_image_bytes
+
+    try:
+        img = decode_image_bytes(_read_photo(photos_path, member))
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        return None, f"unreadable photo: {e}"
+    if img is None:
+        return None, "unreadable photo"
+
+    boxes = detect_faces(img)
+    if not boxes:
+        return None, "no face detected"
+    if len(boxes) > 1:
+        return None, f"multiple faces detected ({len(boxes)})"
+    return load_models().face_encodings(img, boxes)[0], None
+
+
+# ---------- Import ----------
+def _plan(roster_path, photos_path):
+    """
+    Validates the roster before any encoding work. Returns (tasks, failures)
+    where tasks are (line, name, roll, class_name, section, member).
+    """
+    photos = index_photos(photos_path)
+    enrolled = get_enrolled_rolls()
+    seen = set()
+    tasks, failures = [], []
+
+    for line, row in read_roster(roster_path):
+        roll = row.get("roll", "")
+        missing = [col for col in REQUIRED_COLUMNS if not row.get(col)]
+        if missing:
+            failures.append((line, roll, "missing " + ", ".join(missing)))
+            continue
+        if roll in seen:
+            failures.append((line, roll, "duplicate roll in roster"))
+            continue
+        seen.add(roll)
+        if roll in enrolled:
+            failures.append((line, roll, "roll already enrolled"))
+            continue
+
+        photo = row.get("photo")
+        key = os.path.basename(photo).lower() if photo else roll.lower()
+        member = photos.get(key)
+        if member is None:
+            failures.append((line, roll, f"photo not found: {photo or roll}"))
+            continue
+        tasks.append((line, row["name"], roll, row["class_name"], row["section"], member))
+
+    return tasks, failures
+
+
+def import_roster(roster_path, photos_path, workers=BULK_IMPORT_WORKERS,
+                  batch_size=BULK_IMPORT_BATCH_SIZE):
+    """Runs a bulk import, yielding progress events (see module docstring)."""
+    started = time.perf_counter()
+    tasks, failures = _plan(roster_path, photos_path)
+    total = len(tasks) + len(failures)
+    counts = {"done": 0, "enrolled": 0, "failed": 0}
+
+    def failure(line, roll, reason):
+        counts["failed"] += 1
+        return {"event": "failure", "line": line, "roll": roll, "reason": reason}
+
+    def progress():
+        return {"event": "progress", "total": total, **counts}
+
+    yield {"event": "start", "total": total}
+    for line, roll, reason in failures:
+        counts["done"] += 1
+        yield failure(line, roll, reason)
+
+    batch, batch_lines = [], {}
+
+    def flush():
+        skipped = set(add_students_bulk(batch))
+        events = [failure(batch_lines[r], r, "roll already enrolled") for r in skipped]
+        counts["enrolled"] += len(batch) - len(skipped)
+        batch.clear()
+        batch_lines.clear()
+        return events
+
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        ctx = mp.get_context("spawn")  # dlib is not fork-safe
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=ctx) as pool:
+            futures = {
+                pool.submit(encode_photo, photos_path, task[-1]): task for task in tasks
+            }
+            for future in as_completed(futures):
+                line, name, roll, class_name, section, _ = futures[future]
+                counts["done"] += 1
+                try:
+                    encoding, reason = future.result()
+                except Exception as e:
+                    encoding, reason = None, f"encoding failed: {e}"
+
+                if encoding is None:
+                    yield failure(line, roll, reason)
+                else:
+                    batch.append((name, roll, class_name, section, encoding))
+                    batch_lines[roll] = line
+                    if len(batch) >= batch_size:
+                        yield from flush()
+                        yield progress()
+                        continue
+
+                if counts["done"] % PROGRESS_EVERY == 0:
+                    yield progress()
+
+    if batch:
+        yield from flush()
+    yield progress()
+    yield {"event": "done", "total": total, "enrolled": counts["enrolled"],
+           "failed": counts["failed"], "seconds": round(time.perf_counter() - started, 2)}
@@ -0,0 +1,140 @@
+"""
+services/exporter.py
+Streaming attendance export: CSV, XLSX and Parquet.
+
+Rows are pulled from attendance.db EXPORT_CHUNK_SIZE at a time
+(db_utils.iter_attendance) and written out chunk by chunk, so memory stays
+flat however many years of history are exported:
+
+  * csv     - encoded and yielded per chunk, straight into the response
+  * xlsx    - openpyxl write-only workbook (rows go to disk as appended)
+  * parquet - one row group per chunk (needs pyarrow: pip install pyarrow)
+
+xlsx and parquet are zip/footer based and cannot be emitted while still
+being written, so they are built in a temporary file and then streamed in
+blocks. Used by GET /attendance/export and export_attendence.py.
+"""
+
+import csv
+import io
+import os
+import tempfile
+
+from config import EXPORT_CHUNK_SIZE
+from database.db_utils import iter_attendance
+
+COLUMNS = ("id", "roll", "name", "date", "time")
+
+FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class ExportError(Exception):
+    """Raised for an unknown format or a missing optional dependency."""
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow).")
+    return pa, pq
+
+
+def check_format(fmt):
+    """Validates a format up front, before a response has been started."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}' (use {', '.join(FORMATS)}).")
+    if fmt == "parquet":
+        _pyarrow()
+
+
+def attendance_chunks(date_from=None, date_to=None, roll=None, class_name=None, section=None,
+                      chunk_size=EXPORT_CHUNK_SIZE):
+    """Lists of attendance rows matching the filters, oldest first."""
+    return iter_attendance(chunk_size, date_from, date_to, roll, class_name, section)
+
+
+# ---------- Writers ----------
+def iter_csv(chunks):
+    """Yields UTF-8 CSV bytes: the header, then one block per chunk."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(chunks, path):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Attendance")
+    ws.append(COLUMNS)
+    for rows in chunks:
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def write_parquet(chunks, path):
+    pa, pq = _pyarrow()
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("roll", pa.string()),
+        ("name", pa.string()),
+        ("date", pa.string()),
+        ("time", pa.string()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+
+def export_to_path(fmt, path, chunks):
+    """Writes a whole export to `path` (CLI)."""
+    check_format(fmt)
+    if fmt == "csv":
+        with open(path, "wb") as f:
+            for block in iter_csv(chunks):
+                f.write(block)
+    elif fmt == "xlsx":
+        write_xlsx(chunks, path)
+    else:
+        write_parquet(chunks, path)
+
+
+def stream_export(fmt, chunks):
+    """Yields the export as byte blocks, for a chunked HTTP response."""
+    check_format(fmt)
+    if fmt == "csv":
+        yield from iter_csv(chunks)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=FORMATS[fmt][1])
+    os.close(fd)
+    try:
+        export_to_path(fmt, path, chunks)
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.remove(path)
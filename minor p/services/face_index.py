@@ -0,0 +1,231 @@
+"""
+services/face_index.py
+Pluggable search indexes over the gallery matrix.
+
+  * ExactIndex - brute-force scan via services.matcher (the reference).
+  * IVFIndex   - inverted-file index: k-means coarse quantizer, each gallery
+                 row lives in the list of its nearest centroid, and a query
+                 only scans the `nprobe` closest lists. Pure NumPy.
+
+Indexes store row positions into the gallery matrix, never the vectors
+themselves, so the matrix is passed to search(). IVF indexes are persisted
+next to students.db and reused when the gallery rows (rolls and template
+vectors) are unchanged.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from config import (
+    FACE_INDEX,
+    FACE_INDEX_MIN_SIZE,
+    FACE_INDEX_NPROBE,
+    FACE_INDEX_PATH,
+)
+from services.matcher import MatchResult, match_faces, squared_norms
+
+
+def gallery_fingerprint(rolls, matrix):
+    """
+    Stable hash of the gallery rows (roll order and template vectors), used
+    to validate a saved index: a re-enrolled face changes it even though
+    the rolls stay the same.
+    """
+    h = hashlib.sha1()
+    for roll in rolls:
+        h.update(str(roll).encode("utf-8"))
+        h.update(b"\0")
+    matrix = np.ascontiguousarray(matrix)
+    h.update(str(matrix.dtype).encode("ascii"))
+    h.update(matrix.data)
+    return h.hexdigest()
+
+
+# === Exact backend ===
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self):
+        self.size = 0
+
+    def add(self, vectors, start):
+        self.size = start + len(vectors)
+
+    def search(self, queries, matrix, sq_norms, tolerance):
+        return match_faces(queries, matrix, tolerance, known_sq_norms=sq_norms)
+
+    def save(self, path, rolls, matrix):
+        pass
+
+
+# === K-means coarse quantizer ===
+def nearest_centroid(vectors, centroids, centroid_sq=None, batch_size=4096):
+    """Index of the closest centroid for every row, batched over rows."""
+    if centroid_sq is None:
+        centroid_sq = squared_norms(centroids)
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        block = vectors[start : start + batch_size]
+        out[start : start + len(block)] = match_faces(
+            block, centroids, np.inf, known_sq_norms=centroid_sq
+        ).indices
+    return out
+
+
+def kmeans(data, n_clusters, n_iter=10, sample_size=None, seed=0):
+    """Lloyd's k-means seeded from random rows. Returns (n_clusters, D) centroids."""
+    rng = np.random.default_rng(seed)
+    if sample_size is not None and len(data) > sample_size:
+        data = data[rng.choice(len(data), sample_size, replace=False)]
+    n_clusters = min(n_clusters, len(data))
+    centroids = data[rng.choice(len(data), n_clusters, replace=False)].astype(data.dtype)
+
+    for _ in range(n_iter):
+        assign = nearest_centroid(data, centroids)
+        counts = np.bincount(assign, minlength=n_clusters)
+        # Per-dimension bincount is far faster than np.add.at for the scatter-sum
+        sums = np.stack([np.bincount(assign, weights=data[:, d], minlength=n_clusters)
+                         for d in range(data.shape[1])], axis=1)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        # Re-seed empty clusters from random points so every list is usable
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty))]
+
+    return centroids
+
+
+# === IVF backend ===
+class IVFIndex:
+    kind = "ivf"
+
+    def __init__(self, centroids, nprobe=FACE_INDEX_NPROBE):
+        self.centroids = np.ascontiguousarray(centroids)
+        self.centroid_sq = squared_norms(self.centroids)
+        self.nprobe = min(nprobe, len(self.centroids))
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(len(self.centroids))]
+
+    @classmethod
+    def train(cls, matrix, n_lists=None, nprobe=FACE_INDEX_NPROBE, seed=0):
+        if n_lists is None:
+            # ~4*sqrt(N) lists is the usual IVF starting point
+            n_lists = max(1, int(4 * np.sqrt(len(matrix))))
+        centroids = kmeans(matrix, n_lists, sample_size=64 * n_lists, seed=seed)
+        index = cls(centroids, nprobe=nprobe)
+        index.add(matrix, 0)
+        return index
+
+    @property
+    def size(self):
+        return len(self.assignments)
+
+    def add(self, vectors, start):
+        """Insert rows start..start+len(vectors) of the gallery matrix."""
+        if len(vectors) == 0:
+            return
+        assign = nearest_centroid(vectors, self.centroids, self.centroid_sq)
+        self.assignments = np.concatenate([self.assignments, assign])
+        row_ids = np.arange(start, start + len(vectors), dtype=np.int64)
+        for list_id in np.unique(assign):
+            self.lists[list_id] = np.concatenate([self.lists[list_id], row_ids[assign == list_id]])
+
+    def search(self, queries, matrix, sq_norms, tolerance):
+        queries = np.asarray(queries, dtype=matrix.dtype).reshape(-1, matrix.shape[1])
+        n_faces = len(queries)
+        indices = np.full(n_faces, -1, dtype=np.intp)
+        distances = np.full(n_faces, np.inf)
+        if n_faces == 0 or len(matrix) == 0:
+            return MatchResult(indices, distances, np.zeros(n_faces, dtype=bool))
+
+        query_sq = squared_norms(queries)
+
+        # Distances to every centroid, then keep the nprobe nearest lists
+        cq = queries @ self.centroids.T
+        cq *= -2.0
+        cq += self.centroid_sq[None, :]
+        probes = np.argpartition(cq, self.nprobe - 1, axis=1)[:, : self.nprobe]
+
+        for i in range(n_faces):
+            cand = np.concatenate([self.lists[j] for j in probes[i]])
+            # Rows appended after this snapshot was taken are not in `matrix` yet
+            cand = cand[cand < len(matrix)]
+            if len(cand) == 0:
+                continue
+            # ||q||^2 is constant per query, so it only matters for the winner
+            d2 = sq_norms[cand] - 2.0 * (matrix[cand] @ queries[i])
+            best = int(np.argmin(d2))
+            indices[i] = cand[best]
+            distances[i] = np.sqrt(max(d2[best] + query_sq[i], 0.0))
+
+        return MatchResult(indices, distances, distances <= tolerance)
+
+    # ---------- Persistence ----------
+    def save(self, path, rolls, matrix):
+        """Atomically write the index next to students.db."""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+        os.close(fd)
+        try:
+            np.savez(
+                tmp,
+                centroids=self.centroids,
+                assignments=self.assignments,
+                nprobe=np.int64(self.nprobe),
+                fingerprint=np.array(gallery_fingerprint(rolls, matrix)),
+            )
+            os.replace(tmp, path)
+        except OSError as e:
+            print("⚠️ Could not persist face index:", e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path, rolls, matrix):
+        """Load a saved index, or None if it is missing or for different rows."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["fingerprint"]) != gallery_fingerprint(rolls, matrix):
+                    return None
+                index = cls(data["centroids"], nprobe=int(data["nprobe"]))
+                assignments = data["assignments"]
+        except Exception as e:
+            print("⚠️ Ignoring unreadable face index:", e)
+            return None
+
+        if len(assignments) != len(rolls):
+            return None
+        index.assignments = assignments.astype(np.int32)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(index.centroids) + 1))
+        index.lists = [order[bounds[j]:bounds[j + 1]].astype(np.int64)
+                       for j in range(len(index.centroids))]
+        return index
+
+
+# === Factory ===
+def build_index(matrix, rolls, kind=FACE_INDEX, path=FACE_INDEX_PATH,
+                min_size=FACE_INDEX_MIN_SIZE):
+    """
+    Return the configured index for a freshly loaded gallery.
+    Small galleries always use the exact scan; the IVF index is only worth
+    it once the linear scan dominates.
+    """
+    if kind == "exact" or len(matrix) < min_size:
+        index = ExactIndex()
+        index.add(matrix, 0)
+        return index
+
+    if kind != "ivf":
+        raise ValueError(f"Unknown FACE_INDEX backend: {kind!r}")
+
+    index = IVFIndex.load(path, rolls, matrix)
+    if index is None:
+        index = IVFIndex.train(matrix)
+        index.save(path, rolls, matrix)
+    return index
@@ -1,70 +1,83 @@
 """
 services/face_service.py
 Handles face encoding, recognition, and attendance marking.
+
+face_recognition loads its dlib models when imported (seconds), so it is
+imported on first use via load_models(); processes that will serve
+recognition call warm_up() at startup instead.
 """
 
 import os
 import cv2
 import numpy as np
-import face_recognition
 import base64
-from datetime import datetime
-from PIL import Image
+import time
+from contextlib import nullcontext
 from io import BytesIO
 
-from database.db_utils import get_db_connection
+from config import (
+    FACE_DETECT_MAX_DIM,
+    FACE_DETECT_MODEL,
+    FACE_DETECT_SCALE,
+    FACE_DETECT_UPSAMPLE,
+    FACE_TOLERANCE,
+    SCENE_GATE,
+)
+from database.db_utils import get_scan_session
+from services.attendance_writer import get_attendance_writer
+from services.gallery import get_gallery
+from services.image_io import decode_base64_payload, decode_image_bytes
+from services.matcher import match_faces
+from services.scene_gate import thumbnail_from_bytes, thumbnail_from_image
 
+face_recognition = None  # loaded by load_models()
 
-# === Helper: Load stored face encodings ===
-def load_known_encodings():
+
+# === Model loading ===
+def load_models():
+    """Imports face_recognition (loading the dlib models) on first call."""
+    global face_recognition
+    if face_recognition is None:
+        import face_recognition as module
+        face_recognition = module
+    return face_recognition
+
+
+def warm_up():
     """
-    Loads all stored encodings and metadata from the database.
-    Returns: (encodings, rolls, names)
+    Loads the face models and the gallery and runs one blank frame through
+    detection and encoding, so the first real request does not pay for it.
+    Returns the time taken in ms.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT roll, name, encoding FROM students")
-    rows = cur.fetchall()
-    conn.close()
-
-    encodings, rolls, names = [], [], []
+    start = time.perf_counter()
+    models = load_models()
+    blank = np.zeros((120, 160, 3), dtype=np.uint8)
+    detect_faces(blank)
+    models.face_encodings(blank, [(20, 100, 100, 20)])
+    get_gallery().snapshot()
+    return _elapsed_ms(start)
 
-    for roll, name, blob in rows:
-        try:
-            enc = np.frombuffer(blob, dtype=np.float64)
-            encodings.append(enc)
-            rolls.append(roll)
-            names.append(name)
-        except Exception:
-            continue
 
-    return encodings, rolls, names
+# === Helper: Load stored face encodings ===
+def load_known_encodings():
+    """
+    Returns the cached gallery as (encodings, rolls, names).
+    `encodings` is an (N, 128) matrix; students.db is only re-read
+    when it has changed (see services/gallery.py).
+    """
+    snap = get_gallery().snapshot()
+    return snap.matrix, list(snap.rolls), list(snap.names)
 
 
 # === Helper: Mark attendance once per day ===
-def mark_attendance_once_per_day(roll, name):
+def mark_attendance_once_per_day(roll, name, when=None):
     """
-    Inserts a record into the attendance table if not already marked today.
+    Queues an attendance record unless the student is already marked today
+    (or on `when`'s date, for recorded footage).
     Returns True if marked, False if already marked.
+    Writes are batched by services/attendance_writer.py.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    today = datetime.now().strftime("%Y-%m-%d")
-    cur.execute("SELECT 1 FROM attendance WHERE roll = ? AND date = ?", (roll, today))
-    exists = cur.fetchone()
-
-    if not exists:
-        cur.execute(
-            "INSERT INTO attendance (roll, name, date, time) VALUES (?, ?, ?, ?)",
-            (roll, name, today, datetime.now().strftime("%H:%M:%S")),
-        )
-        conn.commit()
-        conn.close()
-        return True
-    else:
-        conn.close()
-        return False
+    return get_attendance_writer().submit(roll, name, when)
 
 
 # === Encode face from base64 webcam image ===
@@ -72,6 +85,8 @@ def encode_face_from_base64(data_url):
     """
     Takes a base64 image string and returns a 128D face encoding or None.
     """
+    from PIL import Image
+
     try:
         # Decode base64 → bytes
         if data_url.startswith("data:"):
@@ -87,7 +102,7 @@ def encode_face_from_base64(data_url):
         return None
 
     try:
-        encodings = face_recognition.face_encodings(img)
+        encodings = load_models().face_encodings(img)
         if len(encodings) == 0:
             print("⚠️ No face detected in the provided image.")
             return None
@@ -97,73 +112,307 @@ def encode_face_from_base64(data_url):
         return None
 
 
+# === Helper: Resolve class/section scope ===
+_session_scopes = {}
+
+
+def resolve_scope(class_name=None, section=None, session_id=None):
+    """
+    Returns the (class_name, section) a request should be matched against.
+    A session ID wins over explicit fields; (None, None) means the whole school.
+    Raises ValueError for an unknown session.
+    """
+    if session_id:
+        scope = _session_scopes.get(session_id)
+        if scope is None:
+            scope = get_scan_session(session_id)
+            if scope is None:
+                raise ValueError("Unknown session.")
+            # Sessions never change once created, so cache them per process
+            _session_scopes[session_id] = scope
+        return scope
+    return (class_name or None, section or None)
+
+
+# === Helper: Match encodings against the gallery ===
+def match_face_encodings(face_encodings, tolerance=FACE_TOLERANCE, class_name=None, section=None):
+    """
+    Matches every encoding of a frame in one vectorized pass.
+    With a class (and optional section) the faces are first matched against
+    that class's sub-gallery; only the ones left unknown fall back to the
+    whole-school index.
+    Returns a list with (roll, name, scope) or None per face.
+    """
+    gallery = get_gallery()
+    snap = gallery.snapshot()
+    face_encodings = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+    if gallery.normalize:
+        norms = np.linalg.norm(face_encodings, axis=1, keepdims=True)
+        face_encodings = face_encodings / np.where(norms > 0, norms, 1.0)
+    results = [None] * len(face_encodings)
+    pending = np.arange(len(face_encodings))
+
+    if class_name:
+        part = gallery.partition(class_name, section)
+        scoped = match_faces(face_encodings, part.matrix, tolerance, known_sq_norms=part.sq_norms)
+        for i in np.flatnonzero(scoped.accepted):
+            idx = scoped.indices[i]
+            results[i] = (part.rolls[idx], part.names[idx], "class")
+        pending = np.flatnonzero(~scoped.accepted)
+
+    if len(pending) and len(snap.rolls):
+        queries = face_encodings[pending]
+        overall = snap.index.search(queries, snap.matrix, snap.sq_norms, tolerance)
+        for i, idx, accepted in zip(pending, overall.indices, overall.accepted):
+            if accepted:
+                results[i] = (snap.rolls[idx], snap.names[idx], "global")
+
+    return results
+
+
+# === Detection pipeline ===
+def detect_faces(img):
+    """
+    Runs face detection on a downscaled copy of an RGB frame and returns
+    boxes (top, right, bottom, left) in original-image coordinates.
+    The frame is shrunk by FACE_DETECT_SCALE and to at most
+    FACE_DETECT_MAX_DIM on its longest side, whichever is smaller.
+    """
+    height, width = img.shape[:2]
+    factor = FACE_DETECT_SCALE
+    if FACE_DETECT_MAX_DIM:
+        factor = min(factor, FACE_DETECT_MAX_DIM / max(height, width))
+
+    if factor < 1.0:
+        small = cv2.resize(
+            img,
+            (max(1, round(width * factor)), max(1, round(height * factor))),
+            interpolation=cv2.INTER_AREA,
+        )
+    else:
+        small, factor = img, 1.0
+
+    boxes = load_models().face_locations(
+        small, number_of_times_to_upsample=FACE_DETECT_UPSAMPLE, model=FACE_DETECT_MODEL
+    )
+    if factor == 1.0:
+        return boxes
+
+    inv = 1.0 / factor
+    return [
+        (
+            max(0, int(top * inv)),
+            min(width, int(round(right * inv))),
+            min(height, int(round(bottom * inv))),
+            max(0, int(left * inv)),
+        )
+        for top, right, bottom, left in boxes
+    ]
+
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000.0, 2)
+
+
+# === Scene-change gate ===
+def _static_result(tracker, thumb, gate_key, timings, debug, now=None):
+    """
+    Reuses the tracker's last result when the scene has not changed since
+    it was processed (services/scene_gate.py), else returns None.
+    Those faces were already marked, so nothing is marked again.
+    """
+    with tracker.lock:
+        if tracker.gate.changed(thumb, gate_key, now):
+            return None
+        tracker.touch()
+        matches = [dict(m, marked=False) for m in tracker.gate.result]
+    out = {"matches": matches, "error": None, "static": True}
+    if debug:
+        out["timings"] = timings
+    return out
+
+
 # === Recognize faces from webcam frame (base64) ===
-def recognize_faces_from_base64(data_url, tolerance=0.5):
+def recognize_faces_from_base64(data_url, tolerance=FACE_TOLERANCE, class_name=None, section=None,
+                                debug=False, tracker=None):
     """
     Accepts a base64-encoded image from the frontend,
     detects faces, compares with known encodings,
     returns matches + bounding boxes for overlay.
+    Pass class_name/section to match against that class first.
+    With debug=True the result includes a per-stage "timings" dict (ms).
     """
+    start = time.perf_counter()
     try:
-        if data_url.startswith("data:"):
-            _, encoded = data_url.split(",", 1)
-        else:
-            encoded = data_url
-        img_bytes = base64.b64decode(encoded)
+        img_bytes = decode_base64_payload(data_url)
     except Exception:
         return {"matches": [], "error": "Invalid image data."}
 
+    timings = {"base64_ms": _elapsed_ms(start)}
+    return recognize_faces_from_bytes(img_bytes, tolerance, class_name, section,
+                                      debug=debug, timings=timings, tracker=tracker)
+
+
+# === Recognize faces from raw image bytes (JPEG/PNG body) ===
+def recognize_faces_from_bytes(img_bytes, tolerance=FACE_TOLERANCE, class_name=None, section=None,
+                               debug=False, timings=None, tracker=None):
+    """
+    Same as recognize_faces_from_base64, for an encoded image that arrived
+    as a binary request body or multipart blob. Decodes without extra copies.
+    With a tracker, an unchanged scene is answered from a 1/8-scale decode.
+    """
+    timings = {} if timings is None else timings
+    scene_thumb = None
+    if tracker is not None and SCENE_GATE:
+        start = time.perf_counter()
+        scene_thumb = thumbnail_from_bytes(img_bytes)
+        gate_key = (class_name, section, tolerance)
+        static = _static_result(tracker, scene_thumb, gate_key, timings, debug)
+        timings["gate_ms"] = _elapsed_ms(start)
+        if static is not None:
+            return static
+
+    start = time.perf_counter()
     try:
-        pil_img = Image.open(BytesIO(img_bytes)).convert("RGB")
-        img = np.array(pil_img)
+        img = decode_image_bytes(img_bytes)
     except Exception:
+        img = None
+    if img is None:
         return {"matches": [], "error": "Could not read image."}
+    timings["decode_ms"] = _elapsed_ms(start)
+
+    return recognize_faces_in_image(img, tolerance, class_name, section, debug=debug,
+                                    timings=timings, tracker=tracker, scene_thumb=scene_thumb)
+
+
+# === Helper: Encode + match, reusing tracked identities ===
+def identify_faces(img, face_locations, tolerance=FACE_TOLERANCE, class_name=None, section=None,
+                   tracker=None, timings=None):
+    """
+    Returns (identities, tracks) for the detected boxes. With a tracker,
+    faces already recognized on earlier frames keep their identity and are
+    not re-encoded; only new, drifted or due-for-reverification faces go
+    through the encoding network and the matcher.
+    """
+    timings = {} if timings is None else timings
+    if tracker is None:
+        tracks = [None] * len(face_locations)
+        to_encode = list(range(len(face_locations)))
+    else:
+        tracks, to_encode = tracker.step(face_locations)
+    identities = [t.identity if t is not None else None for t in tracks]
+
+    start = time.perf_counter()
+    face_encodings = []
+    if to_encode:
+        face_encodings = load_models().face_encodings(
+            img, [face_locations[i] for i in to_encode]
+        )
+    timings["encode_ms"] = _elapsed_ms(start)
+    timings["faces_encoded"] = len(to_encode)
+
+    start = time.perf_counter()
+    if face_encodings:
+        matched = match_face_encodings(face_encodings, tolerance, class_name, section)
+        for i, identity in zip(to_encode, matched):
+            identities[i] = identity
+            if tracker is not None:
+                tracker.resolve(tracks[i], identity)
+    timings["match_ms"] = _elapsed_ms(start)
+
+    return identities, tracks
+
+
+# === Recognize faces in a decoded RGB frame ===
+def recognize_faces_in_image(img, tolerance=FACE_TOLERANCE, class_name=None, section=None,
+                             debug=False, timings=None, tracker=None, when=None,
+                             scene_thumb=None):
+    """
+    Detects, matches and marks attendance for faces in an RGB array.
+    Pass the session's FaceTracker (services/tracker.py) to skip
+    re-encoding faces that were already recognized, and frames of a static
+    scene entirely ("static": True results, see services/scene_gate.py).
+    Pass `when` (a datetime) to mark recorded footage at the time it was
+    filmed instead of now. `scene_thumb` is a thumbnail the caller already
+    ran through the scene gate.
+    """
+    timings = {} if timings is None else timings
+    gate_key = (class_name, section, tolerance)
+    # Recorded footage refreshes on its own clock, not on replay speed
+    gate_now = when.timestamp() if when is not None else None
+
+    if tracker is not None and SCENE_GATE and scene_thumb is None:
+        start = time.perf_counter()
+        scene_thumb = thumbnail_from_image(img)
+        static = _static_result(tracker, scene_thumb, gate_key, timings, debug, gate_now)
+        timings["gate_ms"] = _elapsed_ms(start)
+        if static is not None:
+            return static
+
+    def result(matches, error):
+        out = {"matches": matches, "error": error}
+        if scene_thumb is not None and error is None:
+            with tracker.lock:
+                tracker.gate.update(scene_thumb, matches, gate_key, gate_now)
+        if debug:
+            out["timings"] = timings
+        return out
+
+    # Detect faces on a downscaled copy, encode on the full-resolution frame
+    start = time.perf_counter()
+    face_locations = detect_faces(img)
+    timings["detect_ms"] = _elapsed_ms(start)
 
-    # Detect faces
-    face_locations = face_recognition.face_locations(img)
-    face_encodings = face_recognition.face_encodings(img, face_locations)
+    if not face_locations:
+        return result([], None)
 
-    if not face_encodings:
-        return {"matches": [], "error": None}
+    # Cache hit unless students.db changed (services/gallery.py)
+    start = time.perf_counter()
+    gallery_empty = not get_gallery().snapshot().rolls
+    timings["gallery_ms"] = _elapsed_ms(start)
+    if gallery_empty:
+        return result([], "No registered students found.")
 
-    known_encodings, known_rolls, known_names = load_known_encodings()
-    if not known_encodings:
-        return {"matches": [], "error": "No registered students found."}
+    with tracker.lock if tracker is not None else nullcontext():
+        identities, tracks = identify_faces(img, face_locations, tolerance, class_name,
+                                            section, tracker, timings)
 
+    start = time.perf_counter()
     matches_output = []
     seen_rolls = set()
 
-    for enc, loc in zip(face_encodings, face_locations):
-        comparisons = face_recognition.compare_faces(known_encodings, enc, tolerance)
-        distances = face_recognition.face_distance(known_encodings, enc)
-        best_index = np.argmin(distances) if len(distances) > 0 else None
+    for loc, identity, track in zip(face_locations, identities, tracks):
+        # Face box: (top, right, bottom, left)
+        top, right, bottom, left = loc
+        track_id = track.id if track is not None else None
 
-        if best_index is not None and comparisons[best_index]:
-            roll = known_rolls[best_index]
-            name = known_names[best_index]
+        if identity is not None:
+            roll, name, scope = identity
             marked = False
             if roll not in seen_rolls:
                 try:
-                    marked = mark_attendance_once_per_day(roll, name)
+                    marked = mark_attendance_once_per_day(roll, name, when)
                 except Exception:
                     marked = False
                 seen_rolls.add(roll)
 
-            # Face box: (top, right, bottom, left)
-            top, right, bottom, left = loc
             matches_output.append({
                 "roll": roll,
                 "name": name,
                 "marked": marked,
+                "scope": scope,
+                "track": track_id,
                 "box": [left, top, right, bottom]
             })
         else:
-            top, right, bottom, left = loc
             matches_output.append({
                 "roll": None,
                 "name": "Unknown",
                 "marked": False,
+                "scope": None,
+                "track": track_id,
                 "box": [left, top, right, bottom]
             })
+    timings["mark_ms"] = _elapsed_ms(start)
 
-    return {"matches": matches_output, "error": None}
+    return result(matches_output, None)
@@ -0,0 +1,54 @@
+"""
+services/face_templates.py
+Compact multi-sample face templates for enrollment.
+
+Several captures of a student are reduced to:
+
+  * a centroid: the mean of the good samples, which is a steadier
+    template than any single capture, and
+  * up to ENROLL_MAX_EXEMPLARS exemplars: the samples furthest from the
+    templates already kept (greedy farthest-point selection), covering
+    pose and lighting the centroid alone does not.
+
+The gallery (services/gallery.py) loads every template as its own matrix
+row, so a face is scored against all of a student's templates in the same
+GEMM pass and the nearest one wins.
+"""
+
+import numpy as np
+
+from config import ENROLL_MAX_EXEMPLARS, ENROLL_MAX_SPREAD, ENROLL_MIN_EXEMPLAR_GAP
+
+
+def build_template(encodings, max_exemplars=ENROLL_MAX_EXEMPLARS,
+                   max_spread=ENROLL_MAX_SPREAD, min_gap=ENROLL_MIN_EXEMPLAR_GAP):
+    """
+    Returns (centroid, exemplars) for a list of 128-D encodings, where
+    exemplars is a (K, 128) array with K <= max_exemplars.
+    Returns (None, None) when no encodings are given.
+    """
+    samples = np.asarray(encodings, dtype=np.float64).reshape(-1, 128)
+    if len(samples) == 0:
+        return None, None
+    if len(samples) == 1:
+        return samples[0], np.empty((0, 128))
+
+    # Drop outliers (blurred frames, someone else in view) around the
+    # per-dimension median, which a single bad sample cannot drag along
+    spread = np.linalg.norm(samples - np.median(samples, axis=0), axis=1)
+    good = samples[spread <= max_spread]
+    if len(good) == 0:
+        good = samples
+    centroid = good.mean(axis=0)
+
+    # Farthest-point selection, seeded with the centroid
+    chosen = []
+    nearest = np.linalg.norm(good - centroid, axis=1)
+    while len(chosen) < max_exemplars:
+        i = int(np.argmax(nearest))
+        if nearest[i] < min_gap:
+            break
+        chosen.append(i)
+        nearest = np.minimum(nearest, np.linalg.norm(good - good[i], axis=1))
+
+    return centroid, good[chosen]
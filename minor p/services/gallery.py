@@ -0,0 +1,380 @@
+"""
+services/gallery.py
+Process-wide, in-memory gallery of known face encodings.
+
+The gallery keeps every enrolled template in one contiguous (N, 128) matrix
+with parallel roll/name tuples, so recognition never touches SQLite on the
+hot path. A student enrolled from several samples contributes one row per
+template (centroid + exemplars, see services/face_templates.py); the rows
+share the student's roll, so the nearest template decides the match.
+Students without a usable face (enrollment_state other than "enrolled")
+are never loaded.
+
+Freshness is checked with SQLite's `PRAGMA data_version` on a
+long-lived connection (cheap, no table scan) and a generation counter that
+triggers in students.db bump on UPDATE/DELETE:
+
+  * data_version unchanged           -> cache hit, nothing is read
+  * data_version changed, same gen   -> only rows with id > last seen id are
+                                        appended (new enrollments)
+  * generation changed               -> full reload
+
+Because both signals live in the database file, several Flask workers or
+camera scripts stay consistent without talking to each other. New rows are
+also inserted into the search index (services/face_index.py) incrementally;
+a grown IVF index is written to disk by a background timer at most every
+FACE_INDEX_SAVE_DELAY seconds (and on close()), never by the request that
+noticed the new rows.
+
+With GALLERY_MMAP enabled, processes share one memory-mapped copy of the
+matrix instead (services/gallery_snapshot.py).
+"""
+
+import copy
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from config import (
+    ENCODING_DTYPE,
+    ENCODING_NORMALIZE,
+    FACE_INDEX_PATH,
+    FACE_INDEX_SAVE_DELAY,
+    GALLERY_MMAP,
+    GALLERY_SNAPSHOT_DIR,
+)
+from database.db_utils import STUD_DB, configure_connection
+from database.encoding_format import (
+    ENCODING_DIM,
+    ENROLLED,
+    template_state,
+    unpack_encoding,
+    unpack_encodings,
+)
+from services.face_index import build_index
+from services.gallery_snapshot import export_snapshot, map_snapshot, read_pointer
+from services import metrics
+from services.matcher import squared_norms
+
+GallerySnapshot = namedtuple(
+    "GallerySnapshot",
+    ["matrix", "sq_norms", "rolls", "names", "class_names", "sections", "generation", "index"],
+)
+
+# Self-contained sub-gallery for one class (and optionally one section)
+GalleryPartition = namedtuple("GalleryPartition", ["matrix", "sq_norms", "rolls", "names"])
+
+
+class FaceGallery:
+    """Cached (N, 128) template matrix backed by the students table."""
+
+    def __init__(self, db_path=STUD_DB, dtype=ENCODING_DTYPE, normalize=ENCODING_NORMALIZE,
+                 snapshot_dir=None):
+        self.db_path = db_path
+        self.dtype = np.dtype(dtype)
+        self.normalize = normalize
+        # When set, the matrix is shared between processes through a
+        # memory-mapped snapshot in this directory (services/gallery_snapshot.py)
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.RLock()
+        self._conn = None
+
+        self._buffer = np.empty((0, ENCODING_DIM), dtype=self.dtype)
+        self._sq_norms = None
+        self._size = 0
+        self._rolls = ()
+        self._names = ()
+        self._class_names = ()
+        self._sections = ()
+        self._partitions = {}
+        self._last_id = 0
+        self._index = None
+        self._index_saver = None  # pending background save of a grown index
+
+        self._data_version = None
+        self._generation = None
+        self._snapshot = None
+
+        self.stats = {
+            "hits": 0,
+            "reloads": 0,
+            "incremental_updates": 0,
+            "partition_builds": 0,
+            "snapshot_maps": 0,
+            "snapshot_exports": 0,
+            "rows_loaded": 0,
+            "last_load_ms": 0.0,
+        }
+
+    # ---------- Connection ----------
+    def _connection(self):
+        if self._conn is None:
+            self._conn = configure_connection(
+                sqlite3.connect(self.db_path, check_same_thread=False)
+            )
+        return self._conn
+
+    def close(self):
+        self.save_index()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._data_version = None
+
+    # ---------- Change detection ----------
+    @staticmethod
+    def _read_data_version(cur):
+        return cur.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _read_generation(cur, data_version):
+        try:
+            row = cur.execute("SELECT generation FROM gallery_meta WHERE id = 1").fetchone()
+            return row[0] if row else 0
+        except sqlite3.OperationalError:
+            # Older database without the meta table: treat every change as structural.
+            return ("legacy", data_version)
+
+    # ---------- Loading ----------
+    @staticmethod
+    def _decode_rows(rows, dtype, normalize=False):
+        """
+        Split rows into (ids, (rolls, names, class_names, sections), matrix),
+        one matrix row per template. The BLOBs are viewed without copying and
+        the matrix is filled once. Only "enrolled" rows are selected; a
+        template that still fails validation (missing, all zeros, not a
+        finite 128-D vector) is skipped as well.
+        """
+        ids, meta, vectors = [], [], []
+        for row_id, roll, name, class_name, section, blob, exemplars in rows:
+            centroid = unpack_encoding(blob)
+            if template_state(centroid) != ENROLLED:
+                continue
+            templates = [centroid]
+            templates += [v for v in unpack_encodings(exemplars) if template_state(v) == ENROLLED]
+            ids.append(row_id)
+            vectors += templates
+            meta += [(roll, name, class_name, section)] * len(templates)
+
+        matrix = np.empty((len(vectors), ENCODING_DIM), dtype=dtype)
+        for i, vec in enumerate(vectors):
+            matrix[i] = vec
+        if normalize and len(vectors):
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        columns = tuple(zip(*meta)) if meta else ((), (), (), ())
+        return ids, columns, matrix
+
+    def _full_reload(self, cur):
+        rows = cur.execute(
+            "SELECT id, roll, name, class_name, section, encoding, exemplars"
+            " FROM students WHERE enrollment_state = 'enrolled' ORDER BY id ASC"
+        ).fetchall()
+        ids, columns, matrix = self._decode_rows(rows, self.dtype, self.normalize)
+
+        self._buffer = matrix
+        self._sq_norms = None
+        self._size = len(matrix)
+        self._rolls, self._names, self._class_names, self._sections = columns
+        self._last_id = max((r[0] for r in rows), default=0)
+        self._index = build_index(matrix, self._rolls)
+        self.stats["reloads"] += 1
+        self.stats["rows_loaded"] += len(ids)
+
+    def _append_new_rows(self, cur):
+        rows = cur.execute(
+            "SELECT id, roll, name, class_name, section, encoding, exemplars FROM students"
+            " WHERE id > ? AND enrollment_state = 'enrolled' ORDER BY id ASC",
+            (self._last_id,),
+        ).fetchall()
+        if not rows:
+            return
+        ids, columns, matrix = self._decode_rows(rows, self.dtype, self.normalize)
+        rolls, names, class_names, sections = columns
+        self._last_id = rows[-1][0]
+        if not ids:
+            return
+
+        needed = self._size + len(matrix)
+        if needed > self._buffer.shape[0]:
+            # Grow geometrically so a burst of enrollments stays amortised O(1)
+            capacity = max(needed, 2 * self._buffer.shape[0], 64)
+            grown = np.empty((capacity, ENCODING_DIM), dtype=self.dtype)
+            grown[: self._size] = self._buffer[: self._size]
+            self._buffer = grown
+
+        self._buffer[self._size : needed] = matrix
+        self._sq_norms = None
+        self._index.add(matrix, self._size)
+        self._size = needed
+        self._rolls = self._rolls + rolls
+        self._names = self._names + names
+        self._class_names = self._class_names + class_names
+        self._sections = self._sections + sections
+        if self._index.kind == "ivf" and self._index_saver is None:
+            self._index_saver = threading.Timer(FACE_INDEX_SAVE_DELAY, self.save_index)
+            self._index_saver.daemon = True
+            self._index_saver.start()
+        self.stats["incremental_updates"] += 1
+        self.stats["rows_loaded"] += len(ids)
+
+    def save_index(self):
+        """Writes an incrementally grown index now, if a background save is pending."""
+        with self._lock:
+            saver, self._index_saver = self._index_saver, None
+            if saver is None:
+                return
+            saver.cancel()
+            # A shallow copy: later add() calls replace the index's arrays
+            # rather than mutate them, so this stays consistent unlocked
+            index = copy.copy(self._index)
+            rolls, matrix = self._rolls, self._buffer[: self._size]
+        index.save(FACE_INDEX_PATH, rolls, matrix)
+
+    # ---------- Shared memory-mapped snapshot ----------
+    @staticmethod
+    def _content_key(cur, generation):
+        max_id, count = cur.execute(
+            "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM students"
+        ).fetchone()
+        return f"{generation}:{max_id}:{count}"
+
+    def _load_via_snapshot(self, cur, generation):
+        """
+        Maps the shared snapshot if it matches the database; otherwise loads
+        from SQLite, exports a new snapshot and maps that, so every process
+        ends up reading the same page-cache copy.
+        """
+        key = self._content_key(cur, generation)
+        pointer = read_pointer(self.snapshot_dir)
+        mapped = None
+        if pointer is not None and pointer.get("key") == key:
+            mapped = map_snapshot(self.snapshot_dir, pointer)
+
+        if mapped is None:
+            self._full_reload(cur)
+            matrix = self._buffer[: self._size]
+            try:
+                base = export_snapshot(
+                    self.snapshot_dir, key, matrix, squared_norms(matrix), self._rolls,
+                    self._names, self._class_names, self._sections, self._last_id,
+                )
+            except OSError as e:
+                print("⚠️ Could not export gallery snapshot, using private copy:", e)
+                return
+            mapped = map_snapshot(self.snapshot_dir, {"key": key, "base": base})
+            if mapped is None:
+                return
+            self.stats["snapshot_exports"] += 1
+            rebuild_index = False
+        else:
+            self.stats["snapshot_maps"] += 1
+            rebuild_index = True
+
+        self._buffer = mapped.matrix
+        self._sq_norms = mapped.sq_norms
+        self._size = len(mapped.rolls)
+        self._rolls, self._names = mapped.rolls, mapped.names
+        self._class_names, self._sections = mapped.class_names, mapped.sections
+        self._last_id = mapped.last_id
+        if rebuild_index:
+            self._index = build_index(self._buffer, self._rolls)
+
+    def refresh(self, force=False):
+        """Bring the in-memory matrix up to date with students.db."""
+        with self._lock:
+            cur = self._connection().cursor()
+            data_version = self._read_data_version(cur)
+
+            if not force and self._snapshot is not None and data_version == self._data_version:
+                self.stats["hits"] += 1
+                return self._snapshot
+
+            generation = self._read_generation(cur, data_version)
+            start = time.perf_counter()
+            if self.snapshot_dir is not None:
+                # Read-only maps cannot grow in place: every change swaps snapshots
+                self._load_via_snapshot(cur, generation)
+            elif force or self._snapshot is None or generation != self._generation:
+                self._full_reload(cur)
+            else:
+                self._append_new_rows(cur)
+            self.stats["last_load_ms"] = (time.perf_counter() - start) * 1000.0
+
+            self._data_version = data_version
+            self._generation = generation
+            self._partitions = {}
+            matrix = self._buffer[: self._size]
+            self._snapshot = GallerySnapshot(
+                matrix=matrix,
+                sq_norms=self._sq_norms if self._sq_norms is not None else squared_norms(matrix),
+                rolls=self._rolls,
+                names=self._names,
+                class_names=self._class_names,
+                sections=self._sections,
+                generation=generation,
+                index=self._index,
+            )
+            return self._snapshot
+
+    def snapshot(self):
+        """Return the current GallerySnapshot without copying the matrix."""
+        return self.refresh()
+
+    def partition(self, class_name, section=None):
+        """
+        Sub-gallery for one class (all sections when `section` is None).
+        Built once per gallery change and cached, so scoped recognition
+        only pays for the rows of that class.
+        """
+        snap = self.refresh()
+        key = (class_name, section)
+        with self._lock:
+            part = self._partitions.get(key)
+            if part is not None and snap is self._snapshot:
+                return part
+
+            rows = np.array([
+                i for i, (c, s) in enumerate(zip(snap.class_names, snap.sections))
+                if c == class_name and (section is None or s == section)
+            ], dtype=np.intp)
+            part = GalleryPartition(
+                matrix=np.ascontiguousarray(snap.matrix[rows]),
+                sq_norms=snap.sq_norms[rows],
+                rolls=tuple(snap.rolls[i] for i in rows),
+                names=tuple(snap.names[i] for i in rows),
+            )
+            if snap is self._snapshot:
+                self._partitions[key] = part
+            self.stats["partition_builds"] += 1
+            return part
+
+    def invalidate(self):
+        """Force a full reload on the next snapshot()."""
+        with self._lock:
+            self._snapshot = None
+
+    def __len__(self):
+        return self._size
+
+
+# === Process-wide singleton ===
+_gallery = None
+_gallery_lock = threading.Lock()
+
+
+def get_gallery():
+    global _gallery
+    if _gallery is None:
+        with _gallery_lock:
+            if _gallery is None:
+                _gallery = FaceGallery(
+                    snapshot_dir=GALLERY_SNAPSHOT_DIR if GALLERY_MMAP else None
+                )
+                metrics.register_gauge("attendif_gallery_templates",
+                                       lambda: [({}, len(_gallery))])
+    return _gallery
@@ -0,0 +1,114 @@
+"""
+services/gallery_snapshot.py
+Memory-mapped gallery snapshots shared by every worker process.
+
+A snapshot is three files written next to students.db:
+
+    gallery-<id>.npy        (N, 128) encoding matrix
+    gallery-<id>.norms.npy  (N,) squared norms
+    gallery-<id>.json       content key, rolls, names, class_names, sections
+
+and a small `CURRENT` pointer naming the live one. Exporters write new
+files and then os.replace() the pointer, so readers always see a complete
+snapshot. Readers map the .npy files read-only (np.load(mmap_mode="r")),
+so N processes share one page-cache copy of the matrix instead of N
+private copies, and a cold worker is ready as soon as the JSON is parsed.
+"""
+
+import glob
+import json
+import os
+import tempfile
+import uuid
+from collections import namedtuple
+
+import numpy as np
+
+POINTER_NAME = "CURRENT"
+KEEP_SNAPSHOTS = 2  # the live one plus the previous, for in-flight readers
+
+MappedSnapshot = namedtuple(
+    "MappedSnapshot",
+    ["key", "matrix", "sq_norms", "rolls", "names", "class_names", "sections", "last_id"],
+)
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_pointer(directory):
+    """Returns {"key": ..., "base": ...} for the live snapshot, or None."""
+    try:
+        with open(os.path.join(directory, POINTER_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_snapshot(directory, key, matrix, sq_norms, rolls, names, class_names, sections,
+                    last_id):
+    """Writes a snapshot and atomically makes it the live one. Returns its base name."""
+    os.makedirs(directory, exist_ok=True)
+    base = f"gallery-{uuid.uuid4().hex}"
+    prefix = os.path.join(directory, base)
+
+    np.save(prefix + ".npy", np.ascontiguousarray(matrix))
+    np.save(prefix + ".norms.npy", np.ascontiguousarray(sq_norms))
+    with open(prefix + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "key": key,
+            "last_id": last_id,
+            "rolls": list(rolls),
+            "names": list(names),
+            "class_names": list(class_names),
+            "sections": list(sections),
+        }, f)
+
+    _atomic_write(os.path.join(directory, POINTER_NAME), json.dumps({"key": key, "base": base}))
+    _prune(directory, keep=base)
+    return base
+
+
+def map_snapshot(directory, pointer):
+    """Maps the snapshot named by `pointer` read-only. Returns None if it is gone."""
+    prefix = os.path.join(directory, pointer["base"])
+    try:
+        with open(prefix + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(prefix + ".npy", mmap_mode="r")
+        sq_norms = np.load(prefix + ".norms.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    return MappedSnapshot(
+        key=meta["key"],
+        matrix=matrix,
+        sq_norms=sq_norms,
+        rolls=tuple(meta["rolls"]),
+        names=tuple(meta["names"]),
+        class_names=tuple(meta["class_names"]),
+        sections=tuple(meta["sections"]),
+        last_id=meta["last_id"],
+    )
+
+
+def _prune(directory, keep):
+    """Best-effort removal of old snapshots (mapped files may be locked on Windows)."""
+    metas = sorted(glob.glob(os.path.join(directory, "gallery-*.json")), key=os.path.getmtime)
+    stale = [m for m in metas if not m.endswith(keep + ".json")][: -(KEEP_SNAPSHOTS - 1) or None]
+    for meta in stale:
+        prefix = meta[: -len(".json")]
+        for path in (prefix + ".json", prefix + ".npy", prefix + ".norms.npy"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,44 @@
+"""
+services/image_io.py
+Decoding of uploaded frames into RGB NumPy arrays.
+
+Raw uploads (image/jpeg bodies or multipart blobs) are decoded straight
+from the request buffer: np.frombuffer wraps the bytes without copying and
+cv2.imdecode writes the pixels once into the output array. The base64/JSON
+path is kept for older clients; it pays for the base64 text, the decoded
+bytes and the pixel array.
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+# OpenCV >= 4.10 can decode directly to RGB, saving the BGR->RGB pass
+_IMREAD_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+
+def decode_image_bytes(buf):
+    """
+    Decodes encoded image bytes (JPEG/PNG, bytes/bytearray/memoryview)
+    into a C-contiguous RGB uint8 array. Returns None if undecodable.
+    """
+    if not buf:
+        return None
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    if _IMREAD_RGB is not None:
+        return cv2.imdecode(arr, _IMREAD_RGB)
+
+    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+
+def decode_base64_payload(data_url):
+    """Strips an optional data: URL prefix and returns the raw bytes."""
+    if data_url.startswith("data:"):
+        _, encoded = data_url.split(",", 1)
+    else:
+        encoded = data_url
+    return base64.b64decode(encoded)
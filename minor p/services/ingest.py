@@ -0,0 +1,339 @@
+"""
+services/ingest.py
+Headless attendance ingestion from many video sources at once.
+
+Each source gets a reader thread that decodes it and samples frames at
+INGEST_SAMPLE_FPS (by media time for files, wall time for live streams).
+Sampled frames are converted to RGB, shrunk to INGEST_MAX_DIM and fanned
+into one shared RecognitionPool (services/recognition_pool.py). A source
+is pinned to one worker, so its face tracker keeps working across frames.
+
+Sources:
+
+  * video files      lecture1.mp4, /recordings/room101.mkv
+  * image sequences  a folder of images, or a glob such as "frames/*.jpg"
+  * stream URLs      rtsp://..., http://..., udp://... (live)
+  * camera indexes   0, 1, ... (live)
+
+Recorded sources block when their worker is busy, so no sampled frame is
+lost; live sources drop the frame instead and keep reading. Given a start
+time, marks from recorded footage are dated start + media time rather than
+now. Used by `python attendance.py --headless ...`.
+"""
+
+import glob
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import wait
+from datetime import timedelta
+
+import cv2
+
+from config import (
+    ALLOWED_EXTENSIONS,
+    FACE_TOLERANCE,
+    INGEST_MAX_DIM,
+    INGEST_REPORT_INTERVAL,
+    INGEST_SAMPLE_FPS,
+    INGEST_WORKERS,
+    RECOGNITION_QUEUE_SIZE,
+)
+from services.recognition_pool import PoolBusy, RecognitionPool
+
+LIVE_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+EPSILON = 1e-6  # sampling slack, so float drift never skips a due frame
+
+
+class IngestError(Exception):
+    """Raised for a source that cannot be opened."""
+
+
+# ---------- Sources ----------
+class Source(ABC):
+    def __init__(self, spec, live):
+        self.spec = spec
+        self.name = os.path.basename(spec.rstrip("/\\")) or spec
+        self.live = live
+        self.stats = {
+            "frames_read": 0,
+            "frames_sampled": 0,
+            "frames_dropped": 0,
+            "frames_recognized": 0,
+            "frames_static": 0,
+            "faces": 0,
+            "matched": 0,
+            "marked": 0,
+            "errors": 0,
+            "media_seconds": 0.0,
+            "started": None,
+            "finished": None,
+            "error": None,
+        }
+
+    @abstractmethod
+    def frames(self, sample_fps, stop):
+        """Yields (media seconds, BGR frame) at about sample_fps."""
+
+
+class CaptureSource(Source):
+    """Video file, stream URL or camera, read through cv2.VideoCapture."""
+
+    def __init__(self, spec, target, live):
+        super().__init__(spec, live)
+        self.target = target
+
+    def frames(self, sample_fps, stop):
+        cap = cv2.VideoCapture(self.target)
+        if not cap.isOpened():
+            raise IngestError(f"cannot open {self.spec}")
+        fps = 0.0 if self.live else cap.get(cv2.CAP_PROP_FPS) or 0.0
+        interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        started = time.monotonic()
+        next_due = 0.0
+        index = 0
+        try:
+            while not stop.is_set():
+                if self.live:
+                    media_t = time.monotonic() - started
+                elif fps > 0:
+                    media_t = index / fps
+                else:
+                    media_t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                index += 1
+
+                if media_t < next_due - EPSILON:
+                    # Skipped frames are grabbed but never converted to BGR
+                    if not cap.grab():
+                        break
+                    self.stats["frames_read"] += 1
+                    continue
+
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                self.stats["frames_read"] += 1
+                next_due = max(next_due + interval, media_t)
+                yield media_t, frame
+        finally:
+            cap.release()
+
+
+class ImageSequenceSource(Source):
+    """Sorted image files; image i is at i / sequence_fps seconds (default: one per sample)."""
+
+    def __init__(self, spec, paths, sequence_fps=None):
+        super().__init__(spec, live=False)
+        self.paths = paths
+        self.sequence_fps = sequence_fps
+
+    def frames(self, sample_fps, stop):
+        fps = self.sequence_fps or sample_fps or 1.0
+        interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        next_due = 0.0
+        for i, path in enumerate(self.paths):
+            if stop.is_set():
+                break
+            media_t = i / fps
+            if media_t < next_due - EPSILON:
+                continue  # not decoded at all
+            frame = cv2.imread(path)
+            self.stats["frames_read"] += 1
+            if frame is None:
+                self.stats["errors"] += 1
+                continue
+            next_due = max(next_due + interval, media_t)
+            yield media_t, frame
+
+
+def _is_image(path):
+    return path.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
+
+
+def open_source(spec, sequence_fps=None):
+    """Builds the right Source for a file, folder, glob, URL or camera index."""
+    if spec.isdigit():
+        return CaptureSource(spec, int(spec), live=True)
+    if spec.lower().startswith(LIVE_SCHEMES):
+        return CaptureSource(spec, spec, live=True)
+    if os.path.isdir(spec):
+        paths = sorted(
+            os.path.join(spec, f) for f in os.listdir(spec) if _is_image(f)
+        )
+        if not paths:
+            raise IngestError(f"no images in {spec}")
+        return ImageSequenceSource(spec, paths, sequence_fps)
+    if any(ch in spec for ch in "*?["):
+        paths = sorted(p for p in glob.glob(spec) if _is_image(p))
+        if not paths:
+            raise IngestError(f"no images match {spec}")
+        return ImageSequenceSource(spec, paths, sequence_fps)
+    if os.path.isfile(spec):
+        return CaptureSource(spec, spec, live=False)
+    raise IngestError(f"no such file, folder or stream: {spec}")
+
+
+def prepare_frame(frame, max_dim=INGEST_MAX_DIM):
+    """BGR -> RGB, shrunk so the longest side is at most max_dim."""
+    height, width = frame.shape[:2]
+    if max_dim and max(height, width) > max_dim:
+        factor = max_dim / max(height, width)
+        frame = cv2.resize(frame, (round(width * factor), round(height * factor)),
+                           interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+# ---------- Engine ----------
+class IngestEngine:
+    def __init__(self, sources, sample_fps=INGEST_SAMPLE_FPS, workers=INGEST_WORKERS,
+                 start_time=None, class_name=None, section=None, tolerance=FACE_TOLERANCE,
+                 max_dim=INGEST_MAX_DIM, inline=False):
+        self.sources = sources
+        self.sample_fps = sample_fps
+        self.workers = workers or os.cpu_count() or 1
+        self.start_time = start_time
+        self.options = {"class_name": class_name, "section": section, "tolerance": tolerance}
+        self.max_dim = max_dim
+        self.inline = inline
+
+        self.pool = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._trackers = {}
+
+    # ---------- Results ----------
+    def _record(self, source, result):
+        matches = result.get("matches") or []
+        with self._lock:
+            stats = source.stats
+            if result.get("dropped"):
+                stats["frames_dropped"] += 1
+                return
+            if result.get("error") and not matches:
+                stats["errors"] += 1
+            stats["frames_recognized"] += 1
+            stats["frames_static"] += bool(result.get("static"))
+            stats["faces"] += len(matches)
+            stats["matched"] += sum(1 for m in matches if m.get("roll"))
+            stats["marked"] += sum(1 for m in matches if m.get("marked"))
+
+    def _on_done(self, source, future):
+        with self._lock:
+            self._inflight.discard(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"matches": [], "error": str(e)}
+        self._record(source, result)
+
+    # ---------- Reader thread ----------
+    def _read(self, index, source):
+        from services.face_service import recognize_faces_in_image
+        from services.tracker import FaceTracker
+
+        source.stats["started"] = time.monotonic()
+        try:
+            for media_t, frame in source.frames(self.sample_fps, self._stop):
+                img = prepare_frame(frame, self.max_dim)
+                source.stats["frames_sampled"] += 1
+                source.stats["media_seconds"] = media_t
+                when = self.start_time + timedelta(seconds=media_t) if self.start_time else None
+
+                if self.pool is None:
+                    tracker = self._trackers.setdefault(index, FaceTracker())
+                    self._record(source, recognize_faces_in_image(
+                        img, tracker=tracker, when=when, **self.options
+                    ))
+                    continue
+
+                try:
+                    future = self.pool.submit(img, f"ingest-{index}", worker=index,
+                                              block=not source.live, when=when, **self.options)
+                except PoolBusy:
+                    with self._lock:
+                        source.stats["frames_dropped"] += 1
+                    continue
+                with self._lock:
+                    self._inflight.add(future)
+                future.add_done_callback(lambda f, s=source: self._on_done(s, f))
+        except Exception as e:
+            source.stats["error"] = str(e)
+            print(f"❌ {source.name}: {e}")
+        finally:
+            source.stats["finished"] = time.monotonic()
+
+    # ---------- Reporting ----------
+    def report(self, source, now=None):
+        """One source's stats plus rates (sampled/recognized fps, x realtime)."""
+        now = now or time.monotonic()
+        with self._lock:
+            stats = dict(source.stats)
+        started = stats.pop("started")
+        finished = stats.pop("finished")
+        elapsed = max(1e-9, (finished or now) - started) if started else 0.0
+        return {
+            "source": source.spec,
+            "live": source.live,
+            **stats,
+            "media_seconds": round(stats["media_seconds"], 1),
+            "wall_seconds": round(elapsed, 1),
+            "read_fps": round(stats["frames_read"] / elapsed, 1) if elapsed else 0.0,
+            "recognized_fps": round(stats["frames_recognized"] / elapsed, 2) if elapsed else 0.0,
+            "realtime_factor": round(stats["media_seconds"] / elapsed, 2) if elapsed else 0.0,
+            "done": finished is not None,
+        }
+
+    def _print_progress(self):
+        now = time.monotonic()
+        for source in self.sources:
+            r = self.report(source, now)
+            print(f"🎞️ {source.name}: {r['frames_sampled']} sampled, "
+                  f"{r['frames_recognized']} recognized ({r['recognized_fps']} fps), "
+                  f"{r['frames_static']} static, {r['frames_dropped']} dropped, "
+                  f"{r['marked']} marked, "
+                  f"media {r['media_seconds']:.0f}s (x{r['realtime_factor']} realtime)"
+                  f"{' ✓' if r['done'] else ''}")
+
+    # ---------- Run ----------
+    def run(self, report_interval=INGEST_REPORT_INTERVAL):
+        """Processes every source to the end (or until Ctrl+C); returns the final reports."""
+        if not self.inline:
+            self.pool = RecognitionPool(workers=min(self.workers, len(self.sources)),
+                                        queue_size=RECOGNITION_QUEUE_SIZE, max_frame_age=None)
+            print(f"⏳ Starting {self.pool.workers} recognition workers...")
+            if not self.pool.wait_ready():
+                self.pool.shutdown(timeout=1)
+                raise IngestError("a recognition worker failed to start (see its traceback)")
+
+        readers = [
+            threading.Thread(target=self._read, args=(i, s), name=f"ingest-{s.name}", daemon=True)
+            for i, s in enumerate(self.sources)
+        ]
+        for thread in readers:
+            thread.start()
+        try:
+            while True:
+                for thread in readers:
+                    thread.join(timeout=report_interval / len(readers))
+                if not any(thread.is_alive() for thread in readers):
+                    break
+                self._print_progress()
+        except KeyboardInterrupt:
+            print("🛑 Stopping sources...")
+            self._stop.set()
+            for thread in readers:
+                thread.join()
+
+        with self._lock:
+            pending = list(self._inflight)
+        wait(pending)
+        if self.pool is not None:
+            self.pool.shutdown()
+        else:
+            from services.attendance_writer import get_attendance_writer
+            get_attendance_writer().flush()
+
+        self._print_progress()
+        return [self.report(source) for source in self.sources]
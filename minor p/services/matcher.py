@@ -0,0 +1,71 @@
+"""
+services/matcher.py
+Vectorized nearest-neighbour matching of face encodings.
+
+All faces from one frame are matched in a single pass using the GEMM form
+of the squared Euclidean distance:
+
+    ||q - k||^2 = ||q||^2 + ||k||^2 - 2 * q . k
+
+The gallery is walked in row chunks so the (faces x chunk) distance block
+stays bounded regardless of how many students are enrolled.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from config import FACE_TOLERANCE
+
+DEFAULT_CHUNK_SIZE = 8192
+
+MatchResult = namedtuple("MatchResult", ["indices", "distances", "accepted"])
+
+
+def squared_norms(matrix):
+    """Row-wise ||k||^2, cacheable alongside a gallery matrix."""
+    return np.einsum("ij,ij->i", matrix, matrix)
+
+
+def match_faces(queries, known, tolerance=FACE_TOLERANCE, known_sq_norms=None,
+                chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Match every query encoding against the known matrix in one pass.
+
+    queries: (F, 128) encodings detected in a frame (a list is accepted).
+    known:   (N, 128) gallery matrix.
+    Returns MatchResult(indices, distances, accepted), each of length F.
+    `indices` is -1 and `distances` is inf when the gallery is empty.
+    """
+    known = np.asarray(known)
+    queries = np.asarray(queries, dtype=known.dtype).reshape(-1, known.shape[-1])
+    n_faces = queries.shape[0]
+
+    best_idx = np.full(n_faces, -1, dtype=np.intp)
+    best_sq = np.full(n_faces, np.inf)
+
+    if n_faces == 0 or len(known) == 0:
+        return MatchResult(best_idx, best_sq, np.zeros(n_faces, dtype=bool))
+
+    if known_sq_norms is None:
+        known_sq_norms = squared_norms(known)
+    query_sq = squared_norms(queries)
+
+    rows = np.arange(n_faces)
+    for start in range(0, len(known), chunk_size):
+        block = known[start : start + chunk_size]
+        # (F, C) squared distances for this chunk
+        d2 = queries @ block.T
+        d2 *= -2.0
+        d2 += query_sq[:, None]
+        d2 += known_sq_norms[start : start + chunk_size][None, :]
+
+        local = np.argmin(d2, axis=1)
+        local_sq = d2[rows, local]
+        better = local_sq < best_sq
+        best_sq[better] = local_sq[better]
+        best_idx[better] = local[better] + start
+
+    # Rounding can push exact matches slightly below zero
+    distances = np.sqrt(np.maximum(best_sq, 0.0))
+    return MatchResult(best_idx, distances, distances <= tolerance)
@@ -0,0 +1,261 @@
+"""
+services/metrics.py
+In-process latency histograms, counters and gauges, exported in the
+Prometheus text format at /metrics (routes/metrics.py).
+
+  * histograms - cumulative buckets for Prometheus (histogram_quantile), plus
+                 p50/p95/p99 over the last METRICS_RECENT_WINDOW observations,
+                 exported as a companion "<name>_recent_seconds" summary
+  * counters   - monotonically increasing totals
+  * gauges     - callbacks evaluated at scrape time (queue depths, sizes),
+                 registered by the module that owns the value
+
+Metrics are per process. Recognition stage timings are recorded by the
+route from the result's timings dict, so they are complete even when
+frames are processed in RECOGNITION_WORKERS processes.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+
+from config import METRICS_RECENT_WINDOW
+from database.db_utils import set_metric_hooks
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# name -> (type, help)
+METRICS = {
+    "attendif_stage_seconds": ("histogram", "Recognition pipeline stage latency."),
+    "attendif_request_seconds": ("histogram", "End-to-end recognition request latency."),
+    "attendif_db_seconds": ("histogram", "Database helper latency."),
+    "attendif_frames_total": ("counter", "Frames received, by outcome."),
+    "attendif_faces_total": ("counter", "Faces detected."),
+    "attendif_faces_encoded_total": ("counter", "Faces run through the encoding network."),
+    "attendif_matches_total": ("counter", "Faces matched to a student."),
+    "attendif_unknowns_total": ("counter", "Faces not matched to any student."),
+    "attendif_marks_total": ("counter", "First attendance marks of the day."),
+    "attendif_db_commits_total": ("counter", "Committed database transactions, by operation."),
+    "attendif_db_rows_total": ("counter", "Rows written, by operation."),
+    "attendif_recognition_queue_depth": ("gauge", "Frames waiting per recognition worker."),
+    "attendif_attendance_pending": ("gauge", "Attendance marks waiting to be flushed."),
+    "attendif_gallery_templates": ("gauge", "Face templates in the in-memory gallery."),
+    "attendif_scan_listeners": ("gauge", "Clients listening on /scan/stream."),
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS, window=METRICS_RECENT_WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self, qs=QUANTILES):
+        values = sorted(self.recent)
+        if not values:
+            return {q: float("nan") for q in qs}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in qs}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    def register_gauge(self, name, fn):
+        """`fn()` returns [(labels dict, value), ...] at scrape time."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self):
+        """{"name{labels}": value or {p50, p95, p99, count}} for JSON views."""
+        out = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                out[_series(name, labels)] = value
+            for (name, labels), hist in self._histograms.items():
+                qs = hist.quantiles()
+                out[_series(name, labels)] = {
+                    "count": hist.count,
+                    **{f"p{int(q * 100)}": qs[q] for q in QUANTILES},
+                }
+        return out
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda kv: kv[0])
+            gauges = sorted(self._gauges.items())
+
+        def header(name, kind=None, help_text=None):
+            kind_, help_ = METRICS.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text or help_}")
+            lines.append(f"# TYPE {name} {kind or kind_}")
+
+        last = None
+        for (name, labels), value in counters:
+            if name != last:
+                header(name)
+                last = name
+            lines.append(f"{_series(name, labels)} {_num(value)}")
+
+        by_name = {}
+        for (name, labels), hist in histograms:
+            by_name.setdefault(name, []).append((labels, hist))
+        for name, series in by_name.items():
+            header(name)
+            for labels, hist in series:
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _num(bound)
+                    lines.append(f"{_series(name + '_bucket', labels + (('le', le),))} {cumulative}")
+                lines.append(f"{_series(name + '_sum', labels)} {_num(hist.sum)}")
+                lines.append(f"{_series(name + '_count', labels)} {hist.count}")
+
+            recent = name[: -len("_seconds")] + "_recent_seconds"
+            header(recent, "summary", f"{METRICS.get(name, ('', name))[1]} "
+                                      f"Quantiles over the last {METRICS_RECENT_WINDOW} observations.")
+            for labels, hist in series:
+                for q, value in hist.quantiles().items():
+                    lines.append(f"{_series(recent, labels + (('quantile', _num(q)),))} {_num(value)}")
+                lines.append(f"{_series(recent + '_sum', labels)} {_num(sum(hist.recent))}")
+                lines.append(f"{_series(recent + '_count', labels)} {len(hist.recent)}")
+
+        for name, fn in gauges:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue
+            header(name)
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"{_series(name, tuple(sorted(labels.items())))} {_num(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _num(value):
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# === Process-wide registry and helpers ===
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+register_gauge = REGISTRY.register_gauge
+
+# database/db_utils.py reports its helper latencies and commits through these
+set_metric_hooks(inc=inc, observe=observe)
+
+
+class timed(ContextDecorator):
+    """
+    Times a block or function into a histogram:
+
+        @timed("attendif_db_seconds", op="add_student")
+        def add_student(...): ...
+    """
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self._start, **self.labels)
+        return False
+
+
+def observe_timings(timings):
+    """Records a recognition timings dict ({"detect_ms": 12.3, ...}) per stage."""
+    for key, value in timings.items():
+        if key.endswith("_ms"):
+            observe("attendif_stage_seconds", value / 1000.0, stage=key[: -len("_ms")])
+
+
+def record_recognition(result, timings):
+    """
+    Feeds one recognition result into the frame/face counters and its
+    timings dict (including "total_ms") into the latency histograms.
+    Returns the frame outcome: ok, static, dropped or error.
+    """
+    observe("attendif_request_seconds", timings["total_ms"] / 1000.0)
+    observe_timings({k: v for k, v in timings.items() if k != "total_ms"})
+
+    matches = result.get("matches") or []
+    known = sum(1 for m in matches if m.get("roll"))
+    if result.get("dropped"):
+        outcome = "dropped"
+    elif result.get("error"):
+        outcome = "error"
+    elif result.get("static"):
+        outcome = "static"
+    else:
+        outcome = "ok"
+    inc("attendif_frames_total", outcome=outcome)
+    inc("attendif_faces_total", len(matches))
+    inc("attendif_faces_encoded_total", timings.get("faces_encoded", 0))
+    inc("attendif_matches_total", known)
+    inc("attendif_unknowns_total", len(matches) - known)
+    inc("attendif_marks_total", sum(1 for m in matches if m.get("marked")))
+    return outcome
+
+
+def server_timing_header(timings):
+    """Server-Timing header value (shown in browser devtools) for a timings dict."""
+    return ", ".join(
+        f"{key[: -len('_ms')]};dur={value:.1f}"
+        for key, value in timings.items() if key.endswith("_ms")
+    )
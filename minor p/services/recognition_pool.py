@@ -0,0 +1,207 @@
+"""
+services/recognition_pool.py
+Process-pool recognition tier, decoupled from Flask request threads.
+
+RECOGNITION_WORKERS processes each hold their own gallery, face trackers
+and attendance writer. A request is routed to a worker by its tracker key
+(session/camera), so a camera's tracks always live in the same process.
+Every worker is fed through a bounded queue:
+
+  * queue full            -> submit() raises PoolBusy (the route answers 429)
+  * frame waited too long -> the worker drops it instead of processing it
+                             (older than RECOGNITION_MAX_FRAME_AGE seconds)
+
+Frames are encoded images from the web routes, or decoded RGB arrays from
+the headless ingestion engine (services/ingest.py), which creates its own
+pool with blocking submits and no frame-age limit for recorded footage.
+"""
+
+import atexit
+import itertools
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+
+import multiprocessing as mp
+
+from config import (
+    RECOGNITION_MAX_FRAME_AGE,
+    RECOGNITION_QUEUE_SIZE,
+    RECOGNITION_WORKERS,
+)
+from services import metrics
+
+
+class PoolBusy(Exception):
+    """Raised when the target worker's queue is full."""
+
+
+# === Worker process ===
+def _worker_main(worker_id, tasks, results, max_frame_age=RECOGNITION_MAX_FRAME_AGE):
+    # Heavy imports (dlib models, OpenCV) happen in the worker only
+    import numpy as np
+
+    from services.attendance_writer import get_attendance_writer
+    from services.face_service import (
+        recognize_faces_from_base64,
+        recognize_faces_from_bytes,
+        recognize_faces_in_image,
+        warm_up,
+    )
+    from services.tracker import get_tracker
+
+    warm_up()  # face models + gallery, before taking frames
+    results.put(("ready", worker_id))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        req_id, submitted_at, payload, tracker_key, kwargs = task
+
+        if max_frame_age is not None and time.time() - submitted_at > max_frame_age:
+            results.put((req_id, {"matches": [], "error": "Frame dropped: server busy.",
+                                  "dropped": True}))
+            continue
+
+        try:
+            tracker = get_tracker(tracker_key)
+            if isinstance(payload, str):
+                out = recognize_faces_from_base64(payload, tracker=tracker, **kwargs)
+            elif isinstance(payload, np.ndarray):
+                out = recognize_faces_in_image(payload, tracker=tracker, **kwargs)
+            else:
+                out = recognize_faces_from_bytes(payload, tracker=tracker, **kwargs)
+        except Exception as e:
+            out = {"matches": [], "error": f"Recognition failed: {e}"}
+        results.put((req_id, out))
+
+    # Process targets exit without running atexit hooks
+    get_attendance_writer().stop()
+
+
+# === Parent-side pool ===
+class RecognitionPool:
+    def __init__(self, workers=RECOGNITION_WORKERS, queue_size=RECOGNITION_QUEUE_SIZE,
+                 max_frame_age=RECOGNITION_MAX_FRAME_AGE):
+        ctx = mp.get_context("spawn")  # dlib/OpenCV are not fork-safe with threads
+        self.workers = workers
+        self._results = ctx.Queue()
+        self._tasks = [ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._procs = [
+            ctx.Process(target=_worker_main, args=(i, q, self._results, max_frame_age),
+                        name=f"recognition-{i}", daemon=True)
+            for i, q in enumerate(self._tasks)
+        ]
+        self._ids = itertools.count()
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self._ready_count = 0
+        self.stats = {"submitted": 0, "rejected": 0, "dropped": 0, "completed": 0}
+
+        for proc in self._procs:
+            proc.start()
+        self._reader = threading.Thread(target=self._read_results, name="recognition-results",
+                                        daemon=True)
+        self._reader.start()
+
+    def _read_results(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            req_id, out = item
+            if req_id == "ready":
+                with self._lock:
+                    self._ready_count += 1
+                    if self._ready_count == len(self._procs):
+                        self.ready.set()
+                continue
+            with self._lock:
+                future = self._waiters.pop(req_id, None)
+                self.stats["completed"] += 1
+                if out.get("dropped"):
+                    self.stats["dropped"] += 1
+            if future is not None:
+                future.set_result(out)
+
+    def wait_ready(self, poll=1.0):
+        """Blocks until every worker has warmed up; False if one died first."""
+        while not self.ready.wait(poll):
+            if any(not proc.is_alive() for proc in self._procs):
+                return False
+        return True
+
+    def queue_depths(self):
+        depths = []
+        for q in self._tasks:
+            try:
+                depths.append(q.qsize())
+            except NotImplementedError:  # macOS
+                depths.append(None)
+        return depths
+
+    def submit(self, payload, tracker_key, worker=None, block=False, **kwargs):
+        """
+        Queues one frame (base64 str, encoded bytes or RGB array). Returns a
+        concurrent.futures.Future with the recognition result. Raises
+        PoolBusy when the worker's queue is full, unless block=True, which
+        waits for room instead. `worker` pins the frame to one worker
+        (default: chosen by tracker key).
+        """
+        if worker is None:
+            worker = zlib.crc32(str(tracker_key).encode("utf-8")) % len(self._tasks)
+        else:
+            worker %= len(self._tasks)
+        req_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._waiters[req_id] = future
+        try:
+            self._tasks[worker].put((req_id, time.time(), payload, tracker_key, kwargs), block=block)
+        except queue.Full:
+            with self._lock:
+                self._waiters.pop(req_id, None)
+                self.stats["rejected"] += 1
+            raise PoolBusy()
+        with self._lock:
+            self.stats["submitted"] += 1
+        return future
+
+    def shutdown(self, timeout=10):
+        for q in self._tasks:
+            try:
+                q.put(None, timeout=1)
+            except queue.Full:
+                pass
+        for proc in self._procs:
+            proc.join(timeout)
+        self._results.put(None)
+        # Let the reader drain and exit before the interpreter tears the queue down
+        self._reader.join(timeout)
+
+
+# === Process-wide singleton ===
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_recognition_pool():
+    """Returns the shared pool, or None when RECOGNITION_WORKERS is 0 (inline mode)."""
+    global _pool
+    if RECOGNITION_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RecognitionPool()
+                atexit.register(_pool.shutdown)
+                metrics.register_gauge(
+                    "attendif_recognition_queue_depth",
+                    lambda: [({"worker": str(i)}, depth)
+                             for i, depth in enumerate(_pool.queue_depths())],
+                )
+    return _pool
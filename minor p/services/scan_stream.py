@@ -0,0 +1,262 @@
+"""
+services/scan_stream.py
+Streaming recognition for the scan page (templates/scan.html).
+
+Every scanning session/camera gets one ScanStream. The browser POSTs
+frames to /scan/stream/frame, which answers 202 straight away, and
+listens on /scan/stream (Server-Sent Events) for what the server made of
+them. Each stream recognizes one frame at a time and keeps only the newest
+frame waiting: a frame that arrives while another is still waiting
+replaces it, and the old one is counted as stale. Latency therefore stays
+at about one recognition per camera however fast frames are pushed, and
+as cameras are added each one gets fewer, fresher frames instead of a
+growing queue.
+
+Events sent to listeners:
+
+  result   {"seq", "matches", "static", "error", "latency_ms", "stale"}
+           for every recognized frame ("timings" too in debug mode)
+  marked   {"seq", "roll", "name"} when a student is newly marked present
+
+A comment line every STREAM_KEEPALIVE seconds keeps idle connections
+open through proxies.
+
+Streams are in-process state: a frame and the listener for its camera
+must reach the same process, so the server has to run as ONE process
+(threads are fine). This is enforced: the first process to open a stream
+takes an exclusive lock on STREAM_LOCK_PATH, and get_stream() raises
+StreamsUnavailable in any other process instead of accepting frames that
+would never be delivered.
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from config import (
+    RECOGNITION_TIMEOUT,
+    STREAM_KEEPALIVE,
+    STREAM_LISTENER_BUFFER,
+    STREAM_LOCK_PATH,
+    STREAM_WORKER_IDLE,
+)
+from services import metrics
+from services.recognition_pool import PoolBusy, get_recognition_pool
+
+STREAM_IDLE_EXPIRY = 10 * 60  # forget streams nobody used or listened to for this long
+
+
+class StreamsUnavailable(Exception):
+    """Raised when scan streams are served by another server process."""
+
+
+def recognize_frame(payload, tracker_key, options):
+    """Runs one frame through the worker pool, or inline with the camera's tracker."""
+    pool = get_recognition_pool()
+    if pool is not None:
+        try:
+            future = pool.submit(payload, tracker_key, **options)
+        except PoolBusy:
+            return {"matches": [], "error": "Recognition busy, frame dropped.", "dropped": True}
+        try:
+            return future.result(timeout=RECOGNITION_TIMEOUT)
+        except FutureTimeout:
+            return {"matches": [], "error": "Recognition timed out."}
+
+    from services.face_service import recognize_faces_from_base64, recognize_faces_from_bytes
+    from services.tracker import get_tracker
+
+    tracker = get_tracker(tracker_key)
+    if isinstance(payload, str):
+        return recognize_faces_from_base64(payload, tracker=tracker, **options)
+    return recognize_faces_from_bytes(payload, tracker=tracker, **options)
+
+
+class ScanStream:
+    def __init__(self, key):
+        self.key = key
+        self.last_used = time.monotonic()
+        self.stats = {"received": 0, "recognized": 0, "stale": 0, "marked": 0}
+
+        self._cond = threading.Condition()
+        self._pending = None    # newest frame not picked up yet
+        self._worker = None
+        self._listeners = []
+        self._seq = itertools.count(1)
+
+    # ---------- Frames in ----------
+    def push(self, payload, options, seq=None, show_timings=False):
+        """
+        Offers a frame; one still waiting is replaced (stale). Starts the
+        stream's recognition thread if it is not running. Returns the
+        frame's sequence number, echoed in its "result" event.
+        """
+        with self._cond:
+            seq = next(self._seq) if seq is None else seq
+            self.stats["received"] += 1
+            if self._pending is not None:
+                self.stats["stale"] += 1
+                metrics.inc("attendif_frames_total", outcome="stale")
+            self._pending = (seq, payload, options, show_timings, time.perf_counter())
+            self.last_used = time.monotonic()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"scan-stream-{self.key}",
+                                                daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return seq
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._pending is None:
+                    self._cond.wait(STREAM_WORKER_IDLE)
+                if self._pending is None:
+                    self._worker = None  # a later push() starts a new thread
+                    return
+                seq, payload, options, show_timings, received = self._pending
+                self._pending = None
+
+            try:
+                result = recognize_frame(payload, self.key, options)
+            except Exception as e:
+                result = {"matches": [], "error": f"Recognition failed: {e}"}
+            timings = result.pop("timings", None) or {}
+            timings["total_ms"] = (time.perf_counter() - received) * 1000.0
+            metrics.record_recognition(result, timings)
+            self._publish_result(seq, result, timings, show_timings)
+
+    def _publish_result(self, seq, result, timings, show_timings):
+        matches = result.get("matches") or []
+        event = {
+            "seq": seq,
+            "matches": matches,
+            "static": bool(result.get("static")),
+            "error": result.get("error"),
+            "latency_ms": round(timings["total_ms"], 1),
+            "stale": self.stats["stale"],
+        }
+        if show_timings:
+            event["timings"] = timings
+        self.stats["recognized"] += 1
+        self.publish("result", event)
+
+        for m in matches:
+            if m.get("marked"):
+                self.stats["marked"] += 1
+                self.publish("marked", {"seq": seq, "roll": m["roll"], "name": m["name"]})
+
+    # ---------- Events out ----------
+    def subscribe(self):
+        """Returns a new listener queue; pass it to events()."""
+        listener = queue.Queue(maxsize=STREAM_LISTENER_BUFFER)
+        with self._cond:
+            self._listeners.append(listener)
+            self.last_used = time.monotonic()
+        return listener
+
+    def unsubscribe(self, listener):
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+            self.last_used = time.monotonic()
+
+    def listener_count(self):
+        with self._cond:
+            return len(self._listeners)
+
+    def publish(self, name, data):
+        """Sends an event to every listener; a listener that fell behind loses its oldest event."""
+        message = f"event: {name}\ndata: {json.dumps(data)}\n\n"
+        with self._cond:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            while True:
+                try:
+                    listener.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        listener.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def events(self, listener):
+        """SSE body for one listener: its events plus keep-alive comments, until it disconnects."""
+        try:
+            yield f"retry: 2000\n: stream {self.key}\n\n"
+            while True:
+                try:
+                    yield listener.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(listener)
+
+
+# === Single-process lock ===
+def lock_file(path):
+    """
+    Opens `path` and takes a non-blocking exclusive lock on it. Returns the
+    open file (the lock lasts while it stays open), or None if another
+    process holds it.
+    """
+    f = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+# === Per-session registry ===
+_streams = {}
+_streams_lock = threading.Lock()
+_gauge_registered = False
+_process_lock = None  # held for the life of the process once it serves a stream
+
+
+def get_stream(key):
+    """
+    Returns the stream for a scanning session/camera, creating it on first
+    use. Raises StreamsUnavailable if another process serves the streams.
+    """
+    global _gauge_registered, _process_lock
+    now = time.monotonic()
+    with _streams_lock:
+        if _process_lock is None:
+            _process_lock = lock_file(STREAM_LOCK_PATH)
+            if _process_lock is None:
+                raise StreamsUnavailable(
+                    "Scan streaming is served by another server process; "
+                    "run the server with a single worker."
+                )
+        for stale in [
+            k for k, s in _streams.items()
+            if now - s.last_used > STREAM_IDLE_EXPIRY and not s.listener_count()
+        ]:
+            del _streams[stale]
+        stream = _streams.get(key)
+        if stream is None:
+            stream = _streams[key] = ScanStream(key)
+        if not _gauge_registered:
+            metrics.register_gauge("attendif_scan_listeners", _listener_gauge)
+            _gauge_registered = True
+        return stream
+
+
+def _listener_gauge():
+    with _streams_lock:
+        streams = list(_streams.values())
+    return [({}, sum(s.listener_count() for s in streams))]
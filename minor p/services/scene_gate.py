@@ -0,0 +1,101 @@
+"""
+services/scene_gate.py
+Cheap scene-change gate in front of face detection.
+
+Each camera/session (its FaceTracker) keeps a small blurred grey
+thumbnail of the last frame that went through detection, with that
+frame's result. A new frame is reduced the same way and compared pixel by
+pixel; if fewer than SCENE_CHANGED_FRACTION of the thumbnail pixels moved
+by more than SCENE_PIXEL_DELTA grey levels, the classroom has not changed
+and the previous result is reused without decoding or detecting anything.
+The comparison is against the last *processed* frame, not the previous
+one, so slow drift still adds up to a refresh, and every
+SCENE_REFRESH_INTERVAL seconds a frame is processed regardless.
+
+Thumbnails of encoded uploads are decoded straight from the JPEG at 1/8
+scale (IMREAD_REDUCED_GRAYSCALE_8), a fraction of a full decode. cv2 is
+imported on first use, so importing the tracker stays cheap.
+"""
+
+import time
+
+import numpy as np
+
+from config import (
+    SCENE_CHANGED_FRACTION,
+    SCENE_PIXEL_DELTA,
+    SCENE_REFRESH_INTERVAL,
+    SCENE_THUMB_SIZE,
+)
+
+
+def thumbnail_from_image(img):
+    """Blurred grey SCENE_THUMB_SIZE thumbnail of an RGB (or grey) frame."""
+    import cv2
+
+    small = cv2.resize(img, SCENE_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    # Blur away sensor and JPEG noise so only real movement counts
+    return cv2.GaussianBlur(small, (3, 3), 0)
+
+
+def thumbnail_from_bytes(img_bytes):
+    """Same thumbnail from an encoded image, decoded at 1/8 scale. None if unreadable."""
+    import cv2
+
+    if not img_bytes:
+        return None
+    try:
+        reduced = cv2.imdecode(np.frombuffer(img_bytes, dtype=np.uint8),
+                               cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    except cv2.error:
+        return None
+    if reduced is None:
+        return None
+    return thumbnail_from_image(reduced)
+
+
+class SceneGate:
+    def __init__(self, pixel_delta=SCENE_PIXEL_DELTA, changed_fraction=SCENE_CHANGED_FRACTION,
+                 refresh_interval=SCENE_REFRESH_INTERVAL):
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+        self.refresh_interval = refresh_interval
+
+        self.reference = None     # thumbnail of the last processed frame
+        self.result = None        # what that frame produced
+        self.key = None           # scope the result belongs to (class/section)
+        self.processed_at = None
+        self.stats = {"frames": 0, "static": 0, "processed": 0}
+
+    def changed(self, thumb, key=None, now=None):
+        """True if this frame must go through detection, False to reuse self.result."""
+        now = time.monotonic() if now is None else now
+        self.stats["frames"] += 1
+        if (
+            thumb is None
+            or self.reference is None
+            or key != self.key
+            or thumb.shape != self.reference.shape
+            or now - self.processed_at >= self.refresh_interval
+        ):
+            return True
+
+        diff = np.abs(thumb.astype(np.int16) - self.reference)
+        moved = np.count_nonzero(diff > self.pixel_delta)
+        if moved > self.changed_fraction * thumb.size:
+            return True
+        self.stats["static"] += 1
+        return False
+
+    def update(self, thumb, result, key=None, now=None):
+        """Makes a just-processed frame the new reference."""
+        self.reference = thumb
+        self.result = result
+        self.key = key
+        self.processed_at = time.monotonic() if now is None else now
+        self.stats["processed"] += 1
+
+    def reset(self):
+        self.reference = self.result = self.key = self.processed_at = None
@@ -0,0 +1,149 @@
+"""
+services/tracker.py
+Lightweight per-session face tracking across frames.
+
+Boxes from a new frame are associated with existing tracks by IoU. A
+track that already carries an identity keeps it, so that face is not
+re-encoded, unless:
+
+  * the box drifted away from where it was last encoded (IoU below
+    TRACK_DRIFT_IOU), or
+  * TRACK_REVERIFY_INTERVAL seconds passed since the last verification.
+
+Faces still unknown are retried every TRACK_UNKNOWN_RETRY seconds, and
+tracks not seen for TRACK_TTL seconds are dropped. Each tracker also
+owns its camera's SceneGate (services/scene_gate.py).
+"""
+
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from config import (
+    TRACK_DRIFT_IOU,
+    TRACK_IOU_THRESHOLD,
+    TRACK_REVERIFY_INTERVAL,
+    TRACK_TTL,
+    TRACK_UNKNOWN_RETRY,
+)
+from services.scene_gate import SceneGate
+
+TRACKER_IDLE_EXPIRY = 10 * 60  # forget sessions idle for this long
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU of (top, right, bottom, left) boxes, shape (len(a), len(b))."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+class Track:
+    __slots__ = ("id", "box", "identity", "verified_box", "last_seen", "last_verified")
+
+    def __init__(self, track_id, box, now):
+        self.id = track_id
+        self.box = box
+        self.identity = None        # (roll, name, scope) once recognized
+        self.verified_box = None    # box at the last encoding
+        self.last_seen = now
+        self.last_verified = None
+
+    def needs_encoding(self, now):
+        if self.last_verified is None:
+            return True
+        if self.identity is None:
+            return now - self.last_verified >= TRACK_UNKNOWN_RETRY
+        if now - self.last_verified >= TRACK_REVERIFY_INTERVAL:
+            return True
+        return iou_matrix([self.box], [self.verified_box])[0, 0] < TRACK_DRIFT_IOU
+
+
+class FaceTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tracks = []
+        self.last_used = time.monotonic()
+        self._ids = itertools.count(1)
+        self.stats = {"faces": 0, "encoded": 0, "reused": 0}
+        self.gate = SceneGate()
+
+    def touch(self, now=None):
+        """Keeps every track alive through a frame that was not re-detected (static scene)."""
+        now = time.monotonic() if now is None else now
+        self.last_used = now
+        for track in self.tracks:
+            track.last_seen = now
+
+    def step(self, boxes, now=None):
+        """
+        Associates this frame's boxes with tracks (greedy, highest IoU first).
+        Returns (tracks, to_encode): the Track for every box, and the indices
+        of boxes whose faces must be encoded and matched this frame.
+        """
+        now = time.monotonic() if now is None else now
+        self.last_used = now
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= TRACK_TTL]
+
+        assigned = [None] * len(boxes)
+        if self.tracks and boxes:
+            iou = iou_matrix(boxes, [t.box for t in self.tracks])
+            used = set()
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                i, j = divmod(int(flat), iou.shape[1])
+                if iou[i, j] < TRACK_IOU_THRESHOLD:
+                    break
+                if assigned[i] is None and j not in used:
+                    assigned[i] = self.tracks[j]
+                    used.add(j)
+
+        to_encode = []
+        for i, box in enumerate(boxes):
+            track = assigned[i]
+            if track is None:
+                track = Track(next(self._ids), box, now)
+                self.tracks.append(track)
+                assigned[i] = track
+            track.box = box
+            track.last_seen = now
+            if track.needs_encoding(now):
+                to_encode.append(i)
+
+        self.stats["faces"] += len(boxes)
+        self.stats["encoded"] += len(to_encode)
+        self.stats["reused"] += len(boxes) - len(to_encode)
+        return assigned, to_encode
+
+    @staticmethod
+    def resolve(track, identity, now=None):
+        """Records the result of encoding + matching a track's face."""
+        track.identity = identity
+        track.verified_box = track.box
+        track.last_verified = time.monotonic() if now is None else now
+
+
+# === Per-session registry ===
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(key):
+    """Returns the tracker for a scanning session/camera, creating it on first use."""
+    now = time.monotonic()
+    with _trackers_lock:
+        for stale in [k for k, t in _trackers.items() if now - t.last_used > TRACKER_IDLE_EXPIRY]:
+            del _trackers[stale]
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = FaceTracker()
+        return tracker
@@ -0,0 +1,59 @@
+"""
+Shared fixtures. Every test runs against throwaway databases
+(benchmarks.synthetic.temp_databases); the real database/ folder is never touched.
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def databases():
+    from benchmarks.synthetic import temp_databases
+
+    with temp_databases() as tmp:
+        yield tmp
+
+
+@pytest.fixture
+def client(databases):
+    from app import create_app
+
+    app = create_app(init_db=False, warm_up=False)
+    return app.test_client()
+
+
+@pytest.fixture
+def committed_databases(tmp_path, monkeypatch):
+    """Copies of the databases shipped in database/ (legacy schema), never initialized."""
+    import database.db_utils as db_utils
+
+    for name in ("students.db", "attendance.db"):
+        shutil.copy(os.path.join(db_utils.DB_DIR, name), tmp_path / name)
+    monkeypatch.setattr(db_utils, "STUD_DB", str(tmp_path / "students.db"))
+    monkeypatch.setattr(db_utils, "ATT_DB", str(tmp_path / "attendance.db"))
+    yield tmp_path
+    db_utils.close_all_connections()
+
+
+@pytest.fixture
+def planted(databases, monkeypatch):
+    """
+    A seeded roster and a classroom JPEG whose 4 drawn faces the stand-in
+    face_recognition module (benchmarks.synthetic.PlantedFaces) "detects"
+    as the first 4 students. Returns (roster, jpeg).
+    """
+    from benchmarks.synthetic import PlantedFaces, seed_students, synthetic_frame, synthetic_roster
+    from services import face_service
+
+    roster = synthetic_roster(40)
+    seed_students(roster)
+    jpeg, boxes = synthetic_frame(640, 480, 4)
+    monkeypatch.setattr(face_service, "face_recognition",
+                        PlantedFaces((640, 480), boxes, [r[4] for r in roster[:4]]))
+    return roster, jpeg
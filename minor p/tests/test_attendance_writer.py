@@ -0,0 +1,88 @@
+"""Buffered attendance writes (services/attendance_writer.py)."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from database.db_utils import get_db_connection
+from services import attendance_writer
+from services.attendance_writer import AttendanceWriter
+
+DAY1 = datetime(2025, 1, 6, 9, 0)
+DAY2 = datetime(2025, 1, 7, 9, 0)
+
+
+@pytest.fixture
+def writer(databases):
+    writer = AttendanceWriter(flush_interval=60, flush_size=1000)  # flushed by hand
+    yield writer
+    writer.stop()
+
+
+def _rows():
+    conn = get_db_connection("attendance")
+    try:
+        return conn.execute("SELECT roll, date FROM attendance ORDER BY roll, date").fetchall()
+    finally:
+        conn.close()
+
+
+def test_repeat_sightings_marked_once(writer):
+    assert writer.submit("R1", "A", DAY1)
+    assert not writer.submit("R1", "A", DAY1)
+    assert writer.submit("R1", "A", DAY2)
+    assert writer.pending() == 2
+    assert writer.flush() == 2
+    assert _rows() == [("R1", "2025-01-06"), ("R1", "2025-01-07")]
+    assert not writer.submit("R1", "A", DAY1)
+
+
+def test_seeded_from_rows_written_by_others(writer):
+    other = AttendanceWriter()
+    assert other.submit("R1", "A", DAY1)
+    other.stop()
+    assert not writer.submit("R1", "A", DAY1)
+
+
+def test_switching_dates_keeps_unflushed_marks(writer, monkeypatch):
+    # A one-day cache reloads on every switch; queued rolls must survive it
+    monkeypatch.setattr(attendance_writer, "MARKED_CACHE_DAYS", 1)
+    assert writer.submit("R1", "A", DAY1)
+    assert writer.submit("R2", "B", DAY2)
+    assert not writer.submit("R1", "A", DAY1)
+    assert not writer.submit("R2", "B", DAY2)
+    assert writer.flush() == 2
+
+
+def test_failed_flush_is_retried(writer, monkeypatch):
+    real_apply = attendance_writer.rollups.apply_marks
+    calls = []
+
+    def flaky(conn, inserted):
+        calls.append(len(inserted))
+        if len(calls) == 1:
+            raise RuntimeError("disk I/O error")
+        return real_apply(conn, inserted)
+
+    monkeypatch.setattr(attendance_writer.rollups, "apply_marks", flaky)
+    assert writer.submit("R1", "A", DAY1)
+    assert writer.flush() == 0
+    assert writer.pending() == 1 and _rows() == []
+    assert writer.flush() == 1
+    assert _rows() == [("R1", "2025-01-06")]
+
+
+def test_full_batch_flushes_in_background(databases):
+    writer = AttendanceWriter(flush_interval=60, flush_size=3)
+    try:
+        for roll in ("R1", "R2", "R3"):
+            writer.submit(roll, roll, DAY1)
+        for _ in range(100):
+            if writer.stats["rows_written"] == 3:
+                break
+            time.sleep(0.02)
+        assert writer.stats["rows_written"] == 3
+        assert writer.pending() == 0
+    finally:
+        writer.stop()
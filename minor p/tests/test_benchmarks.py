@@ -0,0 +1,75 @@
+"""Benchmark suite plumbing (benchmarks/run_suite.py) at toy sizes."""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from benchmarks import run_suite
+from benchmarks.bench_matcher import per_face_loop
+from benchmarks.synthetic import percentiles, synthetic_gallery, synthetic_queries
+from services.matcher import match_faces
+
+
+@pytest.fixture
+def tiny_suite(monkeypatch):
+    """The matcher benchmark at toy sizes, plus one that cannot be imported."""
+    suite = dict(run_suite.SUITE)
+    fast = {"sizes": [200], "faces_per_frame": [1, 5], "repeat": 1, "frames": 2}
+    suite["matcher"] = run_suite.SUITE["matcher"][:4] + (fast, fast)
+    suite["missing"] = ("benchmarks.bench_does_not_exist", ("size",), "ms", False, {}, {})
+    monkeypatch.setattr(run_suite, "SUITE", suite)
+    return suite
+
+
+def test_gemm_matches_the_per_face_loop():
+    gallery = synthetic_gallery(300)
+    queries = synthetic_queries(gallery, 20)
+    result = match_faces(queries, gallery, 0.5)
+    assert np.where(result.accepted, result.indices, -1).tolist() == per_face_loop(queries, gallery, 0.5)
+
+
+def test_percentiles():
+    stats = percentiles(range(1, 101))
+    assert stats["p50_ms"] == 50.5 and stats["mean_ms"] == 50.5
+    assert stats["p99_ms"] == pytest.approx(99.01)
+
+
+def test_run_suite_rows_and_skips(tiny_suite):
+    results = run_suite.run_suite(["matcher", "missing"], quick=True)
+    rows = results["matcher"]["rows"]
+    assert {(r["faces_per_frame"], r["method"]) for r in rows} == {
+        (f, m) for f in (1, 5) for m in ("gemm_float64", "gemm_float32", "per_face_loop")}
+    assert all(r["ms_per_frame"] > 0 for r in rows)
+    assert "skipped" in results["missing"]
+
+
+def _report(*rows, size=1000, metric="ms_per_frame"):
+    return {"meta": {"timestamp": "t", "git_commit": None},
+            "results": {"matcher": {"rows": [
+                {"size": size, "faces_per_frame": 1, "method": m, metric: v} for m, v in rows]}}}
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    baseline = _report(("gemm_float32", 1.0), ("gemm_float64", 1.0), ("per_face_loop", 1.0))
+    current = _report(("gemm_float32", 1.05), ("gemm_float64", 1.5), ("new_method", 9.0))
+    changes = {key["method"]: (round(change, 2), regressed) for _, key, _, _, _, change, regressed
+               in run_suite.compare(baseline, current, threshold=0.1)}
+    assert changes == {"gemm_float32": (0.05, False), "gemm_float64": (0.5, True)}
+
+
+def test_main_writes_results_and_fails_on_regression(tiny_suite, tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    json.dump(_report(("gemm_float32", 1e-9), size=200) | {"schema": 1}, baseline.open("w"))
+    out = tmp_path / "current.json"
+    monkeypatch.setattr(sys, "argv", ["run_suite", "--quick", "--only", "matcher", "--out",
+                                      str(out), "--compare", str(baseline),
+                                      "--fail-on-regression"])
+    assert run_suite.main() == 1
+
+    report = json.loads(out.read_text())
+    assert report["quick"] is True
+    assert report["meta"]["numpy"] == np.__version__
+    assert "FACE_INDEX" in report["meta"]["config"]
+    assert report["results"]["matcher"]["rows"]
@@ -0,0 +1,148 @@
+"""Bulk enrollment (services/bulk_import.py)."""
+
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from database.db_utils import add_student, get_enrollment_state
+from database.encoding_format import ENCODING_DIM, ENROLLED, NO_FACE
+from services import bulk_import
+
+GOOD_FACE = np.full(ENCODING_DIM, 0.05)
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    # Encode in threads with a fixed face instead of spawning dlib workers
+    monkeypatch.setattr(bulk_import, "ProcessPoolExecutor",
+                        lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(bulk_import, "encode_photo", lambda photos_path, member: (GOOD_FACE, None))
+
+
+def _import(tmp_path, rolls):
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    lines = ["name,roll,class_name,section"]
+    for roll in rolls:
+        lines.append(f"Student {roll},{roll},Class 1,A")
+        (photos / f"{roll}.jpg").write_bytes(b"jpeg")
+    roster = tmp_path / "roster.csv"
+    roster.write_text("\n".join(lines) + "\n")
+    events = list(bulk_import.import_roster(str(roster), str(photos), workers=1))
+    return events[-1], [e for e in events if e["event"] == "failure"]
+
+
+def test_reimport_gives_no_face_student_a_face(databases, tmp_path, fake_encoder):
+    assert add_student("Student R1", "R1", "Class 1", "A")
+    assert get_enrollment_state("R1") == NO_FACE
+
+    done, failures = _import(tmp_path, ["R1"])
+    assert failures == []
+    assert done["enrolled"] == 1
+    assert get_enrollment_state("R1") == ENROLLED
+
+
+def test_reimport_skips_enrolled_student(databases, tmp_path, fake_encoder):
+    assert add_student("Student R1", "R1", "Class 1", "A", encoding=GOOD_FACE)
+
+    done, failures = _import(tmp_path, ["R1"])
+    assert done["enrolled"] == 0
+    assert [f["reason"] for f in failures] == ["roll already enrolled"]
+
+
+def test_reimport_into_shipped_database(committed_databases, tmp_path, fake_encoder):
+    # The first students schema has no UNIQUE constraint on roll
+    assert add_student("Student R1", "R1", "Class 1", "A")
+
+    done, failures = _import(tmp_path, ["R1", "R2"])
+    assert failures == []
+    assert done["enrolled"] == 2
+    assert get_enrollment_state("R1") == get_enrollment_state("R2") == ENROLLED
+
+
+def test_roster_problems_fail_before_encoding(databases, tmp_path, fake_encoder):
+    add_student("Old", "R0", "Class 1", "A", encoding=GOOD_FACE)
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    for roll in ("R1", "R2"):
+        (photos / f"{roll}.png").write_bytes(b"png")
+    (photos / "R3.txt").write_bytes(b"not an image")
+    roster = tmp_path / "roster.csv"
+    roster.write_text(
+        "Name,Roll,Class,Section\n"
+        "Ann,R1,Class 1,A\n"
+        "Ann again,R1,Class 1,A\n"
+        "Bob,R0,Class 1,A\n"
+        "Cid,R3,Class 1,A\n"
+        ",R4,Class 1,\n"
+        "Dee,R2,Class 1,B\n"
+    )
+
+    events = list(bulk_import.import_roster(str(roster), str(photos), workers=1))
+    assert events[0] == {"event": "start", "total": 6}
+    failures = {(e["line"], e["reason"]) for e in events if e["event"] == "failure"}
+    assert failures == {
+        (3, "duplicate roll in roster"),
+        (4, "roll already enrolled"),
+        (5, "photo not found: R3"),
+        (6, "missing name, section"),
+    }
+    assert events[-1]["enrolled"] == 2 and events[-1]["failed"] == 4
+    assert get_enrollment_state("R2") == ENROLLED
+
+
+def test_zip_with_photo_column(databases, tmp_path, fake_encoder):
+    photos = tmp_path / "photos.zip"
+    with zipfile.ZipFile(photos, "w") as zf:
+        zf.writestr("class1/ann.JPG", b"jpeg")
+        zf.writestr("class1/bob.jpeg", b"jpeg")
+    roster = tmp_path / "roster.csv"
+    roster.write_text("name,roll_no,class,section,image\n"
+                      "Ann,R1,Class 1,A,ann.jpg\n"
+                      "Bob,R2,Class 1,A,bob.jpeg\n")
+
+    done = list(bulk_import.import_roster(str(roster), str(photos), workers=1))[-1]
+    assert (done["enrolled"], done["failed"]) == (2, 0)
+    assert bulk_import.index_photos(str(photos))["ann.jpg"] == "class1/ann.JPG"
+
+
+def test_batches_report_progress(databases, tmp_path, fake_encoder):
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    lines = ["name,roll,class_name,section"]
+    for i in range(5):
+        lines.append(f"S{i},R{i},Class 1,A")
+        (photos / f"R{i}.jpg").write_bytes(b"jpeg")
+    roster = tmp_path / "roster.csv"
+    roster.write_text("\n".join(lines) + "\n")
+
+    events = list(bulk_import.import_roster(str(roster), str(photos), workers=2, batch_size=2))
+    progress = [e["enrolled"] for e in events if e["event"] == "progress"]
+    assert progress == [2, 4, 5]
+
+
+def test_bulk_route_streams_ndjson(client, tmp_path, fake_encoder):
+    response = client.post("/enroll/bulk", data={
+        "roster": (io.BytesIO(b"name,roll,class_name,section\nAnn,R1,Class 1,A\n"), "roster.csv"),
+        "photos": [(io.BytesIO(b"jpeg"), "R1.jpg")],
+    }, content_type="multipart/form-data")
+    assert response.mimetype == "application/x-ndjson"
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert events[-1]["event"] == "done" and events[-1]["enrolled"] == 1
+
+    assert client.post("/enroll/bulk", data={}).status_code == 400
+
+
+def test_encode_photo_rejects_group_and_broken_photos(planted, tmp_path):
+    _, jpeg = planted
+    (tmp_path / "group.jpg").write_bytes(jpeg)
+    (tmp_path / "broken.jpg").write_bytes(b"not a jpeg")
+
+    assert bulk_import.encode_photo(str(tmp_path), "group.jpg") == (
+        None, "multiple faces detected (4)")
+    assert bulk_import.encode_photo(str(tmp_path), "broken.jpg") == (None, "unreadable photo")
+    assert bulk_import.encode_photo(str(tmp_path), "gone.jpg")[1].startswith("unreadable photo:")
@@ -0,0 +1,46 @@
+"""Pooled SQLite connections (database/db_utils.py)."""
+
+import database.db_utils as db_utils
+from database.db_utils import ConnectionPool, get_db_connection
+
+
+def test_connections_are_reused(databases):
+    conn = get_db_connection("students")
+    raw = conn._conn
+    conn.close()
+    conn.close()  # a second close is a no-op
+    again = get_db_connection("students")
+    try:
+        assert again._conn is raw
+        assert again.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        again.close()
+
+
+def test_close_rolls_back_uncommitted_work(databases):
+    conn = get_db_connection("students")
+    conn.execute("INSERT INTO students (name, roll) VALUES ('Ghost', 'G1')")
+    conn.close()
+    conn = get_db_connection("students")
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM students").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_attendance_connections_see_the_roster(databases):
+    conn = get_db_connection("attendance")
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM roster.students").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_pool_keeps_at_most_size_idle(databases):
+    pool = ConnectionPool(db_utils.STUD_DB, size=2)
+    held = [pool.acquire() for _ in range(4)]
+    for conn in held:
+        conn.close()
+    assert pool._idle.qsize() == 2
+    pool.close_all()
+    assert pool._idle.qsize() == 0
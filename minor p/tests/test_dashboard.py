@@ -0,0 +1,45 @@
+"""Dashboard API (routes/dashboard.py) over the rollups (database/rollups.py)."""
+
+import pytest
+
+from benchmarks.synthetic import seed_attendance, seed_students, synthetic_roster
+from database.db_utils import add_student
+
+
+@pytest.fixture
+def roster(databases):
+    roster = synthetic_roster(40)
+    seed_students(roster)
+    seed_attendance(roster, days=5, start="2025-01-06")
+    return roster
+
+
+def test_class_percent_counts_enrolled_students_only(client, roster):
+    query = {"date_from": "2025-01-06", "date_to": "2025-01-10"}
+    before = client.get("/api/dashboard/classes", query_string=query).get_json()["classes"]
+    assert add_student("Waiting", "NOFACE1", "Class 1", "A")  # no face yet
+    after = client.get("/api/dashboard/classes", query_string=query).get_json()["classes"]
+    assert after == before
+    assert sum(c["enrolled"] for c in after) == len(roster)
+
+
+def test_unpadded_dates_are_normalized(client, roster):
+    padded = client.get("/api/dashboard/daily",
+                        query_string={"date_from": "2025-01-06", "date_to": "2025-01-08"}).get_json()
+    loose = client.get("/api/dashboard/daily",
+                       query_string={"date_from": "2025-1-6", "date_to": "2025-1-8"}).get_json()
+    assert len(padded["days"]) == 3
+    assert loose == padded
+
+
+def test_unpadded_day_is_normalized(client, roster):
+    padded = client.get("/api/dashboard/absentees", query_string={"date": "2025-01-07"}).get_json()
+    loose = client.get("/api/dashboard/absentees", query_string={"date": "2025-1-7"}).get_json()
+    assert loose["date"] == "2025-01-07"
+    assert 0 < loose["count"] < len(roster)
+    assert loose == padded
+
+
+def test_bad_date_is_rejected(client, roster):
+    assert client.get("/api/dashboard/daily", query_string={"date_from": "Jan 6"}).status_code == 400
+    assert client.get("/api/dashboard/absentees", query_string={"date": "2025-13-01"}).status_code == 400
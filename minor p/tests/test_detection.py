@@ -0,0 +1,46 @@
+"""Downscaled detection and stage timings (services/face_service.py)."""
+
+import numpy as np
+
+from services import face_service
+
+
+class RecordingDetector:
+    """Returns one fixed box in the coordinates of whatever image it is given."""
+
+    def __init__(self, box):
+        self.box = box
+        self.shapes = []
+
+    def face_locations(self, img, number_of_times_to_upsample=1, model="hog"):
+        self.shapes.append(img.shape[:2])
+        return [self.box]
+
+
+def test_detection_runs_downscaled_and_maps_boxes_back(monkeypatch):
+    detector = RecordingDetector((10, 110, 90, 20))
+    monkeypatch.setattr(face_service, "face_recognition", detector)
+    monkeypatch.setattr(face_service, "FACE_DETECT_MAX_DIM", 640)
+    monkeypatch.setattr(face_service, "FACE_DETECT_SCALE", 1.0)
+
+    boxes = face_service.detect_faces(np.zeros((720, 1280, 3), dtype=np.uint8))
+    assert detector.shapes == [(360, 640)]
+    assert boxes == [(20, 220, 180, 40)]
+
+
+def test_small_frames_are_not_resized(monkeypatch):
+    detector = RecordingDetector((10, 110, 90, 20))
+    monkeypatch.setattr(face_service, "face_recognition", detector)
+    monkeypatch.setattr(face_service, "FACE_DETECT_MAX_DIM", 640)
+    monkeypatch.setattr(face_service, "FACE_DETECT_SCALE", 1.0)
+
+    assert face_service.detect_faces(np.zeros((240, 320, 3), dtype=np.uint8)) == [(10, 110, 90, 20)]
+    assert detector.shapes == [(240, 320)]
+
+
+def test_debug_results_carry_stage_timings(planted):
+    roster, jpeg = planted
+    result = face_service.recognize_faces_from_bytes(jpeg, debug=True)
+    assert len(result["matches"]) == 4
+    assert {"decode_ms", "detect_ms", "encode_ms", "match_ms"} <= set(result["timings"])
+    assert "timings" not in face_service.recognize_faces_from_bytes(jpeg)
@@ -0,0 +1,130 @@
+"""Versioned encoding records and the students.db migration."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from database import encoding_format as ef
+from database.migrate_encodings import SCHEMA_VERSION, migrate, schema_version
+
+
+def _vec(seed):
+    return np.random.default_rng(seed).normal(size=128)
+
+
+def test_pack_round_trip():
+    vec = _vec(0)
+    blob = ef.pack_encoding(vec)
+    assert len(blob) == ef.HEADER_SIZE + 128 * 4
+    assert ef.read_header(blob)[:3] == (np.dtype("<f4"), 128, 0)
+    np.testing.assert_allclose(ef.unpack_encoding(blob), vec, rtol=1e-6)
+    assert not ef.is_legacy(blob)
+
+
+def test_pack_normalized_float64():
+    blob = ef.pack_encoding(_vec(1), dtype=np.float64, normalize=True)
+    dtype, dim, flags, _ = ef.read_header(blob)
+    assert (dtype, dim, flags) == (np.dtype("<f8"), 128, ef.FLAG_NORMALIZED)
+    assert np.linalg.norm(ef.unpack_encoding(blob)) == pytest.approx(1.0)
+
+
+def test_legacy_float64_dump_is_readable():
+    vec = _vec(2)
+    blob = vec.tobytes()
+    assert ef.is_legacy(blob)
+    np.testing.assert_array_equal(ef.unpack_encoding(blob), vec)
+
+
+@pytest.mark.parametrize("blob", [None, b"", b"junk", b"AFE\x01", ef.pack_encoding(_vec(3))[:-4]])
+def test_unreadable_blobs(blob):
+    assert ef.unpack_encoding(blob) is None
+
+
+def test_multi_record_blob():
+    vecs = [_vec(i) for i in range(3)]
+    blob = ef.pack_encodings(vecs)
+    out = ef.unpack_encodings(blob)
+    assert len(out) == 3
+    np.testing.assert_allclose(out[2], vecs[2], rtol=1e-6)
+    assert ef.pack_encodings([]) is None
+    assert len(ef.unpack_encodings(blob + b"trailing junk")) == 3
+
+
+def test_blob_state():
+    assert ef.blob_state(None) == ef.NO_FACE
+    assert ef.blob_state(np.zeros(128).tobytes()) == ef.NO_FACE
+    assert ef.blob_state(b"junk") == ef.NEEDS_RECAPTURE
+    assert ef.blob_state(ef.pack_encoding(np.full(64, 0.1))) == ef.NEEDS_RECAPTURE
+    assert ef.blob_state(ef.pack_encoding([np.nan] * 128)) == ef.NEEDS_RECAPTURE
+    assert ef.blob_state(ef.pack_encoding(_vec(4))) == ef.ENROLLED
+
+
+# ---------- Migration ----------
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Oldest layout: float64 dumps in an `embedding` column."""
+    conn = sqlite3.connect(str(tmp_path / "students.db"))
+    conn.execute(
+        "CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, roll TEXT,"
+        " class TEXT, section TEXT, embedding BLOB)"
+    )
+    rows = [
+        ("Ann", "R1", _vec(10).tobytes()),       # legacy float64 -> converted
+        ("Bob", "R2", np.zeros(128).tobytes()),  # converted placeholder, has an .npy file
+        ("Cid", "R3", None),                     # no face at all
+        ("Dee", "R4", b"garbage"),               # unreadable -> skipped
+    ]
+    conn.executemany(
+        "INSERT INTO students (name, roll, class, section, embedding) VALUES (?, ?, 'C1', 'A', ?)",
+        rows,
+    )
+    conn.commit()
+    embed_dir = tmp_path / "embeddings"
+    embed_dir.mkdir()
+    np.save(str(embed_dir / "R2.npy"), _vec(11))
+    np.save(str(embed_dir / "R9.npy"), _vec(12))  # no such student
+    yield conn, str(embed_dir)
+    conn.close()
+
+
+def _states(conn):
+    return dict(conn.execute("SELECT roll, enrollment_state FROM students"))
+
+
+def test_migrate_legacy_database(legacy_db):
+    conn, embed_dir = legacy_db
+    report = migrate(conn, embed_dir=embed_dir, normalize=False)
+
+    assert report == {"converted": 2, "imported_npy": 1, "orphan_npy": 1, "skipped": 1,
+                      "no_face": 1, "recapture": 1}
+    assert schema_version(conn) == SCHEMA_VERSION
+    blobs = dict(conn.execute("SELECT roll, encoding FROM students"))
+    np.testing.assert_allclose(ef.unpack_encoding(blobs["R1"]), _vec(10), rtol=1e-6)
+    np.testing.assert_allclose(ef.unpack_encoding(blobs["R2"]), _vec(11), rtol=1e-6)
+    assert not ef.is_legacy(blobs["R1"])
+    assert _states(conn) == {"R1": ef.ENROLLED, "R2": ef.ENROLLED,
+                             "R3": ef.NO_FACE, "R4": ef.NEEDS_RECAPTURE}
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+    assert {"encoding", "exemplars", "enrollment_state"} <= columns
+
+
+def test_migrate_runs_once(legacy_db):
+    conn, embed_dir = legacy_db
+    migrate(conn, embed_dir=embed_dir)
+    conn.execute("UPDATE students SET enrollment_state = 'no_face'")
+    assert migrate(conn, embed_dir=embed_dir)["converted"] == 0
+    assert set(_states(conn).values()) == {ef.NO_FACE}
+
+
+def test_migrate_from_version_1(legacy_db):
+    """A v1 database only gets the exemplars and enrollment_state columns."""
+    conn, embed_dir = legacy_db
+    conn.execute("ALTER TABLE students ADD COLUMN encoding BLOB")
+    conn.execute("UPDATE students SET encoding = ?", (ef.pack_encoding(_vec(20)),))
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+    report = migrate(conn, embed_dir=embed_dir)
+    assert report["converted"] == report["imported_npy"] == 0
+    assert set(_states(conn).values()) == {ef.ENROLLED}
@@ -0,0 +1,71 @@
+"""Enrollment states: students without a usable face stay out of recognition."""
+
+import base64
+
+import numpy as np
+import pytest
+
+from database.db_utils import (
+    add_student,
+    get_enrollment_counts,
+    get_enrollment_state,
+    set_student_face,
+)
+from database.encoding_format import ENROLLED, NEEDS_RECAPTURE, NO_FACE
+from services.gallery import get_gallery
+
+FACE = np.random.default_rng(3).normal(scale=0.1, size=128)
+
+
+@pytest.fixture
+def students(databases):
+    add_student("Ann", "R1", "Class 1", "A", FACE)
+    add_student("Bob", "R2", "Class 1", "A")                        # add-student form
+    add_student("Cid", "R3", "Class 1", "A", np.zeros(128))          # all-zeros placeholder
+    add_student("Dee", "R4", "Class 1", "A", np.full(128, np.nan))   # broken capture
+    add_student("Eve", "R5", "Class 1", "A", np.ones(64))            # wrong size
+
+
+def test_states_on_insert(students):
+    states = {roll: get_enrollment_state(roll) for roll in ("R1", "R2", "R3", "R4", "R5")}
+    assert states == {"R1": ENROLLED, "R2": NO_FACE, "R3": NO_FACE,
+                      "R4": NEEDS_RECAPTURE, "R5": NEEDS_RECAPTURE}
+    assert get_enrollment_state("R9") is None
+    assert get_enrollment_counts() == {NO_FACE: 2, ENROLLED: 1, NEEDS_RECAPTURE: 2}
+
+
+def test_gallery_holds_only_enrolled_students(students):
+    assert get_gallery().snapshot().rolls == ("R1",)
+
+
+def test_set_student_face_enrolls_once(students):
+    faces = get_gallery()
+    faces.snapshot()
+    assert set_student_face("R4", FACE + 0.01)
+    assert get_enrollment_state("R4") == ENROLLED
+    assert faces.snapshot().rolls == ("R1", "R4")
+
+    assert not set_student_face("R4", FACE)           # already enrolled
+    assert not set_student_face("R2", np.zeros(128))  # still no usable face
+    assert not set_student_face("R9", FACE)           # unknown roll
+    assert get_enrollment_state("R2") == NO_FACE
+
+
+def test_add_then_enroll_through_the_pages(client, planted):
+    resp = client.post("/add_student", data={"name": "Late", "roll": "NEW1",
+                                             "class_name": "Class 1", "section": "A"})
+    assert resp.status_code == 302
+    assert get_enrollment_state("NEW1") == NO_FACE
+    pending = client.get("/api/students", query_string={"state": "pending"}).get_json()
+    assert [s["roll"] for s in pending["students"]] == ["NEW1"]
+    assert "No face" in client.get("/students", query_string={"state": "no_face"}).get_data(
+        as_text=True)
+
+    _, jpeg = planted
+    image = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+    resp = client.post("/enroll/", data={"name": "Late", "roll": "NEW1", "class_name": "Class 1",
+                                         "section": "A", "image_data": [image, image]})
+    assert resp.status_code == 302
+    assert get_enrollment_state("NEW1") == ENROLLED
+    assert "NEW1" in get_gallery().snapshot().rolls
+    assert client.get("/api/students", query_string={"state": "pending"}).get_json()["students"] == []
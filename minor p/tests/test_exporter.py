@@ -0,0 +1,98 @@
+"""Streaming attendance export (services/exporter.py, GET /attendance/export)."""
+
+import csv
+import io
+
+import pytest
+
+from benchmarks.synthetic import seed_attendance, seed_students, synthetic_roster
+from database.db_utils import get_db_connection
+from services import exporter
+
+
+@pytest.fixture
+def history(databases):
+    roster = synthetic_roster(30)
+    seed_students(roster)
+    seed_attendance(roster, days=4)
+    return roster
+
+
+def _rows(sql=""):
+    conn = get_db_connection("attendance")
+    try:
+        return [tuple(r) for r in conn.execute(
+            "SELECT id, roll, name, date, time FROM attendance" + sql
+            + " ORDER BY date, time, id")]
+    finally:
+        conn.close()
+
+
+def _csv_rows(data):
+    reader = csv.reader(io.StringIO(data.decode("utf-8")))
+    assert next(reader) == list(exporter.COLUMNS)
+    return [(int(r[0]), *r[1:]) for r in reader]
+
+
+def test_csv_is_streamed_per_chunk(history):
+    expected = _rows()
+    blocks = list(exporter.stream_export("csv", exporter.attendance_chunks(chunk_size=10)))
+    assert len(blocks) == -(-len(expected) // 10)
+    assert _csv_rows(b"".join(blocks)) == expected
+
+
+def test_empty_history_is_just_the_header(databases):
+    data = b"".join(exporter.stream_export("csv", exporter.attendance_chunks()))
+    assert data.decode("utf-8").splitlines() == [",".join(exporter.COLUMNS)]
+
+
+def test_csv_route_applies_filters(client, history):
+    resp = client.get("/attendance/export", query_string={
+        "date_from": "2025-01-07", "date_to": "2025-01-08", "class_name": "Class 2"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert resp.headers["Content-Disposition"].endswith(".csv")
+    class_2 = {r[1] for r in history if r[2] == "Class 2"}
+    expected = [r for r in _rows(" WHERE date BETWEEN '2025-01-07' AND '2025-01-08'")
+                if r[1] in class_2]
+    assert expected and _csv_rows(resp.data) == expected
+
+
+def test_xlsx_route(client, history):
+    from openpyxl import load_workbook
+
+    resp = client.get("/attendance/export", query_string={"format": "xlsx"})
+    assert resp.mimetype == exporter.FORMATS["xlsx"][0]
+    sheet = load_workbook(io.BytesIO(resp.data), read_only=True)["Attendance"]
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0] == exporter.COLUMNS
+    assert rows[1:] == _rows()
+
+
+def test_parquet_export_to_path(history, tmp_path):
+    import pyarrow.parquet as pq
+
+    path = str(tmp_path / "attendance.parquet")
+    exporter.export_to_path("parquet", path, exporter.attendance_chunks(chunk_size=25))
+    table = pq.read_table(path)
+    assert table.column_names == list(exporter.COLUMNS)
+    assert pq.ParquetFile(path).num_row_groups == -(-len(_rows()) // 25)
+    assert [tuple(r.values()) for r in table.to_pylist()] == _rows()
+
+
+def test_unknown_format(client, databases):
+    with pytest.raises(exporter.ExportError):
+        exporter.check_format("pdf")
+    resp = client.get("/attendance/export", query_string={"format": "pdf"})
+    assert resp.status_code == 400
+    assert "Unknown export format" in resp.get_json()["error"]
+
+
+def test_missing_pyarrow_is_reported(client, databases, monkeypatch):
+    def no_pyarrow():
+        raise exporter.ExportError("Parquet export needs pyarrow (pip install pyarrow).")
+
+    monkeypatch.setattr(exporter, "_pyarrow", no_pyarrow)
+    resp = client.get("/attendance/export", query_string={"format": "parquet"})
+    assert resp.status_code == 400
+    assert "pyarrow" in resp.get_json()["error"]
@@ -0,0 +1,77 @@
+"""Search indexes over the gallery (services/face_index.py)."""
+
+import functools
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import seed_students, synthetic_gallery, synthetic_queries, synthetic_roster
+from services import gallery
+from services.face_index import ExactIndex, IVFIndex, build_index
+from services.matcher import squared_norms
+
+
+def test_ivf_probing_every_list_matches_exact_scan():
+    matrix = synthetic_gallery(2000).astype(np.float32)
+    queries = synthetic_queries(matrix, 50)
+    sq = squared_norms(matrix)
+    ivf = IVFIndex.train(matrix, n_lists=16, nprobe=16)
+    exact = ExactIndex().search(queries, matrix, sq, 0.5)
+    approx = ivf.search(queries, matrix, sq, 0.5)
+    assert (approx.indices == exact.indices).all()
+    np.testing.assert_allclose(approx.distances, exact.distances, rtol=1e-4)
+
+
+def test_saved_index_rejected_after_reenrollment(tmp_path):
+    path = str(tmp_path / "face_index.npz")
+    matrix = synthetic_gallery(500).astype(np.float32)
+    rolls = tuple(f"R{i}" for i in range(len(matrix)))
+    build_index(matrix, rolls, kind="ivf", path=path, min_size=0)
+    assert IVFIndex.load(path, rolls, matrix) is not None
+
+    # Same rolls, one student's face captured again
+    reenrolled = matrix.copy()
+    reenrolled[7] = synthetic_gallery(1, seed=9)[0]
+    assert IVFIndex.load(path, rolls, reenrolled) is None
+
+
+def test_incremental_rows_saved_in_background(databases, tmp_path, monkeypatch):
+    path = str(tmp_path / "face_index.npz")
+    monkeypatch.setattr(gallery, "FACE_INDEX_PATH", path)
+    monkeypatch.setattr(gallery, "build_index",
+                        functools.partial(build_index, kind="ivf", path=path, min_size=0))
+    roster = synthetic_roster(300)
+    seed_students(roster[:200])
+    faces = gallery.get_gallery()
+    faces.refresh()
+    saved_at = os.stat(path).st_mtime_ns
+
+    seed_students(roster[200:])
+    snap = faces.refresh()
+    assert len(snap.rolls) == 300
+    assert os.stat(path).st_mtime_ns == saved_at  # not written by the refresh itself
+
+    faces.save_index()
+    assert IVFIndex.load(path, snap.rolls, snap.matrix).size == 300
+    assert IVFIndex.load(path, snap.rolls[:200], snap.matrix[:200]) is None
+
+
+def test_small_galleries_use_the_exact_scan(tmp_path):
+    matrix = synthetic_gallery(100).astype(np.float32)
+    rolls = tuple(range(len(matrix)))
+    index = build_index(matrix, rolls, kind="ivf", path=str(tmp_path / "i.npz"), min_size=1000)
+    assert isinstance(index, ExactIndex) and index.size == 100
+    assert not (tmp_path / "i.npz").exists()
+    with pytest.raises(ValueError):
+        build_index(matrix, rolls, kind="hnsw", min_size=0)
+
+
+def test_ivf_ignores_rows_newer_than_the_matrix():
+    matrix = synthetic_gallery(400).astype(np.float32)
+    ivf = IVFIndex.train(matrix[:300], n_lists=8, nprobe=8)
+    ivf.add(matrix[300:], 300)
+    assert ivf.size == 400
+    # A snapshot taken before the append only knows the first 300 rows
+    result = ivf.search(matrix[350:352], matrix[:300], squared_norms(matrix[:300]), 0.5)
+    assert (result.indices < 300).all()
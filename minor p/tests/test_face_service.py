@@ -0,0 +1,35 @@
+"""Recognition entry points (services/face_service.py)."""
+
+import inspect
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import seed_students, synthetic_roster
+from config import FACE_TOLERANCE
+from services import face_service
+
+
+@pytest.mark.parametrize("func", [
+    face_service.match_face_encodings,
+    face_service.recognize_faces_from_base64,
+    face_service.recognize_faces_from_bytes,
+    face_service.identify_faces,
+    face_service.recognize_faces_in_image,
+])
+def test_tolerance_defaults_to_config(func):
+    assert inspect.signature(func).parameters["tolerance"].default == FACE_TOLERANCE
+
+
+def test_match_face_encodings_uses_config_tolerance(databases):
+    roster = synthetic_roster(50)
+    seed_students(roster)
+    known = np.asarray(roster[3][4], dtype=np.float64)
+    direction = np.random.default_rng(0).normal(size=known.shape)
+    direction /= np.linalg.norm(direction)
+
+    inside = known + direction * (FACE_TOLERANCE - 0.02)
+    outside = known + direction * (FACE_TOLERANCE + 0.3)
+    identities = face_service.match_face_encodings([inside, outside])
+    assert identities[0] is not None and identities[0][0] == roster[3][1]
+    assert identities[1] is None
@@ -0,0 +1,57 @@
+"""Multi-sample enrollment templates (services/face_templates.py)."""
+
+import numpy as np
+
+from database.db_utils import add_student
+from services.face_templates import build_template
+from services.gallery import get_gallery
+
+rng = np.random.default_rng(7)
+FACE = rng.normal(scale=0.1, size=128)
+
+
+def _jitter(scale, n=1):
+    direction = rng.normal(size=(n, 128))
+    return FACE + direction / np.linalg.norm(direction, axis=1, keepdims=True) * scale
+
+
+def test_no_samples():
+    assert build_template([]) == (None, None)
+
+
+def test_single_sample_is_the_centroid():
+    centroid, exemplars = build_template([FACE])
+    np.testing.assert_array_equal(centroid, FACE)
+    assert exemplars.shape == (0, 128)
+
+
+def test_near_identical_samples_keep_only_the_centroid():
+    samples = _jitter(0.01, n=5)
+    centroid, exemplars = build_template(samples)
+    np.testing.assert_allclose(centroid, samples.mean(axis=0))
+    assert len(exemplars) == 0
+
+
+def test_outlier_is_dropped():
+    samples = np.vstack([_jitter(0.05, n=4), FACE + 1.0])
+    centroid, exemplars = build_template(samples)
+    np.testing.assert_allclose(centroid, samples[:4].mean(axis=0))
+    assert not any(np.allclose(e, samples[4]) for e in exemplars)
+
+
+def test_exemplars_are_distinct_and_capped():
+    samples = _jitter(0.3, n=8)
+    _, exemplars = build_template(samples, max_exemplars=3, min_gap=0.08)
+    assert exemplars.shape == (3, 128)
+    gaps = [np.linalg.norm(a - b) for i, a in enumerate(exemplars) for b in exemplars[i + 1:]]
+    assert min(gaps) >= 0.08
+
+
+def test_gallery_loads_one_row_per_template(databases):
+    centroid, exemplars = build_template(_jitter(0.3, n=6), max_exemplars=2)
+    add_student("Ann", "R1", "Class 1", "A", centroid, exemplars)
+    add_student("Bob", "R2", "Class 1", "A", _jitter(0.3)[0])
+
+    snap = get_gallery().snapshot()
+    assert snap.rolls == ("R1", "R1", "R1", "R2")
+    np.testing.assert_allclose(snap.matrix[2], exemplars[1], rtol=1e-6)
@@ -0,0 +1,38 @@
+"""Frame upload shapes of /attendance/recognize and /scan/frame (routes/attendance.py)."""
+
+import base64
+import io
+
+import pytest
+
+
+def _rolls(resp):
+    assert resp.status_code == 200, resp.get_json()
+    return sorted(m["roll"] for m in resp.get_json()["matches"])
+
+
+@pytest.mark.parametrize("endpoint", ["/attendance/recognize", "/scan/frame"])
+def test_raw_jpeg_body(client, planted, endpoint):
+    roster, jpeg = planted
+    resp = client.post(endpoint, data=jpeg, content_type="image/jpeg",
+                       query_string={"camera_id": f"raw-{endpoint}"})
+    assert _rolls(resp) == sorted(r[1] for r in roster[:4])
+
+
+def test_multipart_upload(client, planted):
+    roster, jpeg = planted
+    resp = client.post("/attendance/recognize", content_type="multipart/form-data",
+                       data={"image": (io.BytesIO(jpeg), "frame.jpg"), "camera_id": "multipart"})
+    assert _rolls(resp) == sorted(r[1] for r in roster[:4])
+
+
+def test_base64_json_still_accepted(client, planted):
+    roster, jpeg = planted
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("ascii")
+    resp = client.post("/attendance/recognize", json={"image": data_url, "camera_id": "json"})
+    assert _rolls(resp) == sorted(r[1] for r in roster[:4])
+
+
+def test_missing_image_is_rejected(client, planted):
+    assert client.post("/attendance/recognize", data=b"", content_type="image/jpeg").status_code == 400
+    assert client.post("/attendance/recognize", json={}).status_code == 400
@@ -0,0 +1,66 @@
+"""In-memory gallery of known encodings (services/gallery.py)."""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import seed_students, synthetic_roster
+from database.db_utils import get_db_connection
+from services import gallery
+from services.face_service import load_known_encodings
+
+
+@pytest.fixture
+def roster(databases):
+    roster = synthetic_roster(30)
+    seed_students(roster[:20])
+    return roster
+
+
+def _execute(sql, params=()):
+    conn = get_db_connection("students")
+    try:
+        with conn:
+            conn.execute(sql, params)
+    finally:
+        conn.close()
+
+
+def test_unchanged_database_is_a_cache_hit(roster):
+    faces = gallery.get_gallery()
+    first = faces.snapshot()
+    assert faces.snapshot() is first
+    assert faces.stats["hits"] == 1
+    assert faces.stats["reloads"] == 1
+
+
+def test_new_enrollments_are_appended(roster):
+    faces = gallery.get_gallery()
+    faces.snapshot()
+    seed_students(roster[20:])
+    snap = faces.snapshot()
+    assert faces.stats["reloads"] == 1
+    assert faces.stats["incremental_updates"] == 1
+    assert snap.rolls == tuple(r[1] for r in roster)
+    np.testing.assert_allclose(snap.matrix[25], roster[25][4], rtol=1e-6)
+
+
+def test_updates_and_deletes_reload_everything(roster):
+    faces = gallery.get_gallery()
+    faces.snapshot()
+
+    _execute("DELETE FROM students WHERE roll = ?", (roster[0][1],))
+    snap = faces.snapshot()
+    assert faces.stats["reloads"] == 2
+    assert roster[0][1] not in snap.rolls
+
+    _execute("UPDATE students SET name = 'Renamed' WHERE roll = ?", (roster[1][1],))
+    snap = faces.snapshot()
+    assert faces.stats["reloads"] == 3
+    assert snap.names[snap.rolls.index(roster[1][1])] == "Renamed"
+
+
+def test_load_known_encodings_reads_the_gallery(roster):
+    matrix, rolls, names = load_known_encodings()
+    assert matrix.shape == (20, 128)
+    assert rolls == [r[1] for r in roster[:20]]
+    assert names == [r[0] for r in roster[:20]]
@@ -0,0 +1,92 @@
+"""Memory-mapped gallery snapshots (services/gallery_snapshot.py)."""
+
+import glob
+import os
+
+import numpy as np
+import pytest
+
+import database.db_utils as db_utils
+from benchmarks.synthetic import seed_students, synthetic_roster
+from services.gallery import FaceGallery
+from services.gallery_snapshot import export_snapshot, map_snapshot, read_pointer
+from services.matcher import squared_norms
+
+
+def _export(directory, key, n=5):
+    matrix = np.random.default_rng(n).normal(size=(n, 128)).astype(np.float32)
+    rolls = [f"R{i}" for i in range(n)]
+    export_snapshot(directory, key, matrix, squared_norms(matrix), rolls, rolls,
+                    ["C1"] * n, ["A"] * n, last_id=n)
+    return matrix
+
+
+def test_export_and_map(tmp_path):
+    directory = str(tmp_path)
+    matrix = _export(directory, "k1")
+    pointer = read_pointer(directory)
+    assert pointer["key"] == "k1"
+
+    mapped = map_snapshot(directory, pointer)
+    assert isinstance(mapped.matrix, np.memmap)
+    assert not mapped.matrix.flags.writeable
+    np.testing.assert_array_equal(mapped.matrix, matrix)
+    assert mapped.rolls == ("R0", "R1", "R2", "R3", "R4")
+    assert mapped.last_id == 5
+
+
+def test_old_snapshots_are_pruned(tmp_path):
+    directory = str(tmp_path)
+    for i in range(4):
+        _export(directory, f"k{i}")
+    assert len(glob.glob(os.path.join(directory, "gallery-*.json"))) == 2
+    assert read_pointer(directory)["key"] == "k3"
+
+
+def test_missing_snapshot_maps_to_none(tmp_path):
+    assert read_pointer(str(tmp_path)) is None
+    assert map_snapshot(str(tmp_path), {"key": "k", "base": "gallery-gone"}) is None
+
+
+# ---------- FaceGallery with GALLERY_MMAP ----------
+@pytest.fixture
+def roster(databases):
+    roster = synthetic_roster(12)
+    seed_students(roster[:10])
+    return roster
+
+
+def _gallery(directory):
+    return FaceGallery(db_path=db_utils.STUD_DB, snapshot_dir=directory)
+
+
+def test_second_process_maps_the_exported_snapshot(roster, tmp_path):
+    directory = str(tmp_path / "snapshots")
+    first, second = _gallery(directory), _gallery(directory)
+    try:
+        a = first.snapshot()
+        b = second.snapshot()
+        assert first.stats["snapshot_exports"] == 1
+        assert second.stats["snapshot_exports"] == 0
+        assert second.stats["snapshot_maps"] == 1
+        assert b.rolls == a.rolls == tuple(r[1] for r in roster[:10])
+        np.testing.assert_array_equal(b.matrix, a.matrix)
+    finally:
+        first.close()
+        second.close()
+
+
+def test_new_enrollment_swaps_the_snapshot(roster, tmp_path):
+    directory = str(tmp_path / "snapshots")
+    faces = _gallery(directory)
+    try:
+        faces.snapshot()
+        key = read_pointer(directory)["key"]
+        seed_students(roster[10:])
+        snap = faces.snapshot()
+        assert faces.stats["snapshot_exports"] == 2
+        assert read_pointer(directory)["key"] != key
+        assert len(snap.rolls) == 12
+        np.testing.assert_allclose(snap.matrix[11], roster[11][4], rtol=1e-6)
+    finally:
+        faces.close()
@@ -0,0 +1,103 @@
+"""Headless ingestion from files, folders and streams (services/ingest.py)."""
+
+import threading
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+from database.db_utils import get_db_connection
+from services import ingest
+
+
+def _write_images(folder, n, jpeg=None):
+    folder.mkdir(exist_ok=True)
+    blank = cv2.imencode(".png", np.zeros((48, 64, 3), dtype=np.uint8))[1].tobytes()
+    for i in range(n):
+        (folder / f"frame{i:03d}.jpg").write_bytes(jpeg or blank)
+    return folder
+
+
+def test_source_is_abstract():
+    with pytest.raises(TypeError):
+        ingest.Source("x", live=False)
+
+
+def test_open_source_kinds(tmp_path):
+    frames = _write_images(tmp_path / "frames", 3)
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "lecture.mp4").write_bytes(b"")
+
+    camera = ingest.open_source("0")
+    assert isinstance(camera, ingest.CaptureSource) and camera.live and camera.target == 0
+    assert ingest.open_source("rtsp://cam/1").live
+    video = ingest.open_source(str(tmp_path / "lecture.mp4"))
+    assert isinstance(video, ingest.CaptureSource) and not video.live
+
+    folder = ingest.open_source(str(frames))
+    assert isinstance(folder, ingest.ImageSequenceSource) and len(folder.paths) == 3
+    assert folder.name == "frames"
+    assert len(ingest.open_source(str(frames / "frame00[01].jpg")).paths) == 2
+
+    for spec in (str(tmp_path / "empty"), str(tmp_path / "*.png"), str(tmp_path / "gone.mp4")):
+        with pytest.raises(ingest.IngestError):
+            ingest.open_source(spec)
+
+
+def test_image_sequence_sampling(tmp_path):
+    source = ingest.open_source(str(_write_images(tmp_path / "frames", 10)), sequence_fps=10)
+    times = [t for t, _ in source.frames(sample_fps=2, stop=threading.Event())]
+    assert times == [0.0, 0.5]
+    assert source.stats["frames_read"] == 2  # skipped images are never decoded
+
+
+def test_video_file_sampling_by_media_time(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("OpenCV was built without a video writer")
+    for i in range(30):
+        writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+    writer.release()
+
+    source = ingest.open_source(path)
+    times = [t for t, _ in source.frames(sample_fps=2, stop=threading.Event())]
+    assert times == pytest.approx([0.0, 0.5, 1.0, 1.5, 2.0, 2.5])
+    assert source.stats["frames_read"] == 30
+
+
+def test_prepare_frame_shrinks_and_converts():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[..., 0] = 255  # blue in BGR
+    img = ingest.prepare_frame(frame, max_dim=640)
+    assert img.shape == (360, 640, 3)
+    assert img[0, 0].tolist() == [0, 0, 255]
+    assert ingest.prepare_frame(frame, max_dim=None).shape == (720, 1280, 3)
+
+
+def test_inline_engine_marks_at_media_time(planted, tmp_path):
+    roster, jpeg = planted
+    source = ingest.open_source(str(_write_images(tmp_path / "frames", 4, jpeg)))
+    start = datetime(2025, 5, 5, 9, 0, 0)
+    engine = ingest.IngestEngine([source], sample_fps=1.0, start_time=start, inline=True)
+    [report] = engine.run(report_interval=0.5)
+
+    assert report["done"] and report["frames_sampled"] == 4
+    assert report["frames_recognized"] == 4
+    assert report["marked"] == 4  # each student once, however many frames show them
+    conn = get_db_connection("attendance")
+    try:
+        rows = conn.execute("SELECT roll, date, time FROM attendance ORDER BY roll").fetchall()
+    finally:
+        conn.close()
+    assert [r[0] for r in rows] == sorted(r[1] for r in roster[:4])
+    assert {(r[1], r[2]) for r in rows} == {("2025-05-05", "09:00:00")}
+
+
+def test_unreadable_source_is_reported(planted, tmp_path):
+    bad = tmp_path / "bad.mp4"
+    bad.write_bytes(b"not a video")
+    engine = ingest.IngestEngine([ingest.open_source(str(bad))], inline=True)
+    [report] = engine.run(report_interval=0.5)
+    assert report["done"] and report["error"].startswith("cannot open")
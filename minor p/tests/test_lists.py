@@ -0,0 +1,111 @@
+"""Keyset-paginated lists (/attendance_list, /students and their JSON API)."""
+
+import base64
+import json
+
+import pytest
+
+from benchmarks.synthetic import seed_attendance, seed_students, synthetic_roster
+from database.db_utils import add_student, decode_cursor, encode_cursor, get_db_connection
+
+
+def _cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def test_cursor_round_trip():
+    key = ["2025-01-06", "08:00:00", 7]
+    assert decode_cursor(encode_cursor(key), 3) == key
+
+
+@pytest.mark.parametrize("value", [[{}, 1, 2], [1, 2], [None], [[1]], [True], [1.5], {"a": 1}, "x"])
+def test_tampered_cursor_is_ignored(value):
+    assert decode_cursor(_cursor(value), 3) is None
+    assert decode_cursor(_cursor(value), 1) is None
+
+
+@pytest.mark.parametrize("path", ["/attendance_list", "/students", "/api/attendance", "/api/students"])
+@pytest.mark.parametrize("value", [[{}, 1, 2], [{}], ["x", None, []]])
+def test_tampered_cursor_returns_first_page(client, path, value):
+    seed_students(synthetic_roster(3))
+    resp = client.get(path, query_string={"after": _cursor(value)})
+    assert resp.status_code == 200
+
+
+def _walk(client, path, key, **params):
+    """Follows `next` cursors to the end, returning every page."""
+    pages, after = [], None
+    while True:
+        query = dict(params, **({"after": after} if after else {}))
+        data = client.get(path, query_string=query).get_json()
+        pages.append(data[key])
+        after = data["next"]
+        if after is None:
+            return pages
+
+
+@pytest.fixture
+def history(databases):
+    roster = synthetic_roster(40)
+    seed_students(roster)
+    seed_attendance(roster, days=3)
+    return roster
+
+
+def _all_attendance():
+    conn = get_db_connection("attendance")
+    try:
+        return conn.execute(
+            "SELECT id, roll, name, date, time FROM attendance"
+            " ORDER BY date DESC, time DESC, id DESC"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_attendance_pages_cover_every_row_once(client, history):
+    expected = _all_attendance()
+    pages = _walk(client, "/api/attendance", "records", limit=7)
+    rows = [(r["id"], r["roll"], r["name"], r["date"], r["time"]) for page in pages for r in page]
+    assert rows == [tuple(r) for r in expected]
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_exact_multiple_has_no_empty_last_page(client, history):
+    total = len(_all_attendance())
+    pages = _walk(client, "/api/attendance", "records", limit=total)
+    assert [len(page) for page in pages] == [total]
+
+
+def test_attendance_filters(client, history):
+    rows = [r for page in _walk(client, "/api/attendance", "records", limit=5,
+                                date_from="2025-01-07", date_to="2025-01-07",
+                                class_name="Class 3", section="A")
+            for r in page]
+    class_3a = {r[1] for r in history if r[2] == "Class 3" and r[3] == "A"}
+    assert rows and {r["roll"] for r in rows} <= class_3a
+    assert {r["date"] for r in rows} == {"2025-01-07"}
+
+
+def test_bad_date_and_limit(client, history):
+    assert client.get("/api/attendance", query_string={"date_from": "07/01/2025"}).status_code == 400
+    data = client.get("/api/attendance", query_string={"limit": 0}).get_json()
+    assert len(data["records"]) == 1
+    data = client.get("/api/attendance", query_string={"limit": 10 ** 6}).get_json()
+    assert data["next"] is None
+
+
+def test_student_pages_with_state_filter(client, databases):
+    roster = synthetic_roster(9)
+    seed_students(roster)
+    for i in range(5):
+        add_student(f"New {i}", f"N{i}", "Class 1", "A")
+
+    pages = _walk(client, "/api/students", "students", limit=2, state="pending")
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [s["roll"] for page in pages for s in page] == [f"N{i}" for i in range(5)]
+
+    pages = _walk(client, "/api/students", "students", limit=4, state="enrolled")
+    assert [s["roll"] for page in pages for s in page] == [r[1] for r in roster]
+    pages = _walk(client, "/api/students", "students", limit=4, class_name="Class 1")
+    assert [s["roll"] for page in pages for s in page] == [roster[0][1]] + [f"N{i}" for i in range(5)]
@@ -0,0 +1,48 @@
+"""Vectorized matcher (services/matcher.py)."""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_gallery, synthetic_queries
+from services.matcher import match_faces, squared_norms
+
+
+def _brute_force(queries, known):
+    d = np.linalg.norm(queries[:, None, :] - known[None, :, :], axis=2)
+    return d.argmin(axis=1), d.min(axis=1)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 8192])
+def test_gemm_matches_brute_force(chunk_size):
+    known = synthetic_gallery(300)
+    queries = synthetic_queries(known, 12)
+    result = match_faces(queries, known, 0.1, chunk_size=chunk_size)
+    indices, distances = _brute_force(queries, known)
+    assert (result.indices == indices).all()
+    np.testing.assert_allclose(result.distances, distances, atol=1e-6)
+    assert (result.accepted == (distances <= 0.1)).all()
+
+
+def test_float32_gallery_and_cached_norms():
+    known = synthetic_gallery(200).astype(np.float32)
+    queries = synthetic_queries(known, 5)
+    cached = match_faces(queries, known, 0.5, known_sq_norms=squared_norms(known))
+    plain = match_faces(list(queries), known, 0.5)
+    assert (cached.indices == plain.indices).all()
+    np.testing.assert_allclose(cached.distances, _brute_force(queries, known)[1], atol=1e-3)
+
+
+def test_exact_match_has_zero_distance():
+    known = synthetic_gallery(50)
+    result = match_faces(known[[4, 9]], known, 0.0)
+    assert list(result.indices) == [4, 9]
+    assert (result.distances >= 0).all() and result.accepted.all()
+
+
+def test_empty_inputs():
+    known = synthetic_gallery(10)
+    none = match_faces(np.empty((0, 128)), known)
+    assert len(none.indices) == 0
+    empty = match_faces(known[:2], np.empty((0, 128)))
+    assert list(empty.indices) == [-1, -1]
+    assert np.isinf(empty.distances).all() and not empty.accepted.any()
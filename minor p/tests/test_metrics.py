@@ -0,0 +1,94 @@
+"""Metrics registry (services/metrics.py) and the database layer's hooks."""
+
+import subprocess
+import sys
+
+from database.db_utils import add_student, get_class_sizes
+from services import metrics
+
+
+def test_database_layer_does_not_load_metrics():
+    code = "import sys, database.db_utils; print('services.metrics' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=metrics.__file__.rsplit("services", 1)[0], check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_db_helpers_report_through_hooks(databases):
+    before = metrics.REGISTRY.snapshot()
+    get_class_sizes()
+    assert add_student("A", "R1", "Class 1", "A")
+    after = metrics.REGISTRY.snapshot()
+
+    timing = 'attendif_db_seconds{op="get_class_sizes"}'
+    commits = 'attendif_db_commits_total{op="add_student"}'
+    assert after[timing]["count"] == before.get(timing, {"count": 0})["count"] + 1
+    assert after[commits] == before.get(commits, 0) + 1
+
+
+def test_histogram_renders_cumulative_buckets_and_recent_quantiles():
+    registry = metrics.Registry()
+    for seconds in (0.002, 0.004, 0.2, 20.0):
+        registry.observe("attendif_stage_seconds", seconds, stage="detect")
+    lines = registry.render().splitlines()
+
+    assert "# TYPE attendif_stage_seconds histogram" in lines
+    assert 'attendif_stage_seconds_bucket{stage="detect",le="0.0025"} 1' in lines
+    assert 'attendif_stage_seconds_bucket{stage="detect",le="0.005"} 2' in lines
+    assert 'attendif_stage_seconds_bucket{stage="detect",le="10.0"} 3' in lines
+    assert 'attendif_stage_seconds_bucket{stage="detect",le="+Inf"} 4' in lines
+    assert 'attendif_stage_seconds_count{stage="detect"} 4' in lines
+    assert "# TYPE attendif_stage_recent_seconds summary" in lines
+    assert 'attendif_stage_recent_seconds{stage="detect",quantile="0.5"} 0.2' in lines
+    assert 'attendif_stage_recent_seconds{stage="detect",quantile="0.99"} 20.0' in lines
+
+
+def test_counters_gauges_and_label_escaping():
+    registry = metrics.Registry()
+    registry.inc("attendif_frames_total", outcome="ok")
+    registry.inc("attendif_frames_total", 2, outcome='we"ird')
+    registry.register_gauge("attendif_attendance_pending", lambda: [({}, 3), ({"x": "1"}, None)])
+    registry.register_gauge("attendif_scan_listeners", lambda: 1 / 0)  # broken gauges are skipped
+    text = registry.render()
+
+    assert "# TYPE attendif_frames_total counter" in text
+    assert 'attendif_frames_total{outcome="ok"} 1\n' in text
+    assert 'attendif_frames_total{outcome="we\\"ird"} 2\n' in text
+    assert "attendif_attendance_pending 3\n" in text
+    assert "attendif_scan_listeners" not in text
+
+
+def test_record_recognition_outcomes():
+    before = metrics.REGISTRY.snapshot()
+    result = {"matches": [{"roll": "R1", "marked": True}, {"roll": None}]}
+    timings = {"detect_ms": 5.0, "total_ms": 9.0, "faces_encoded": 2}
+    assert metrics.record_recognition(result, timings) == "ok"
+    assert metrics.record_recognition({"static": True, "matches": []}, {"total_ms": 1.0}) == "static"
+    after = metrics.REGISTRY.snapshot()
+
+    def delta(series):
+        return after.get(series, 0) - before.get(series, 0)
+
+    assert delta("attendif_matches_total") == 1
+    assert delta("attendif_unknowns_total") == 1
+    assert delta("attendif_marks_total") == 1
+    assert delta('attendif_frames_total{outcome="static"}') == 1
+    assert metrics.server_timing_header(timings) == "detect;dur=5.0, total;dur=9.0"
+
+
+def test_metrics_endpoint_after_a_recognition(client, planted):
+    _, jpeg = planted
+    assert client.post("/attendance/recognize", data=jpeg, content_type="image/jpeg",
+                       query_string={"camera_id": "metrics"}).status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.mimetype == "text/plain"
+    assert "version=0.0.4" in resp.headers["Content-Type"]
+    text = resp.get_data(as_text=True)
+    assert 'attendif_frames_total{outcome="ok"}' in text
+    assert 'attendif_stage_seconds_bucket{stage="detect",le="+Inf"}' in text
+    assert "attendif_request_seconds_count" in text
+
+    data = client.get("/metrics", query_string={"format": "json"}).get_json()
+    assert data["attendif_request_seconds"]["count"] >= 1
+    assert set(data["attendif_request_seconds"]) == {"count", "p50", "p95", "p99"}
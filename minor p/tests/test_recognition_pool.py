@@ -0,0 +1,86 @@
+"""Process-pool recognition tier (services/recognition_pool.py).
+
+The pool runs its workers as threads here: spawned processes would open
+the real database/ folder instead of the test databases.
+"""
+
+import queue
+import threading
+
+import pytest
+
+from services import recognition_pool
+from services.recognition_pool import PoolBusy, RecognitionPool
+
+
+class ThreadContext:
+    Queue = queue.Queue
+    Process = threading.Thread
+
+
+class IdleProcess:
+    """A worker that never starts, so its queue only fills up."""
+
+    def __init__(self, target, args, name, daemon):
+        pass
+
+    def start(self):
+        pass
+
+    def is_alive(self):
+        return True
+
+    def join(self, timeout=None):
+        pass
+
+
+class IdleContext(ThreadContext):
+    Process = IdleProcess
+
+
+@pytest.fixture
+def use_context(monkeypatch):
+    def use(ctx):
+        monkeypatch.setattr(recognition_pool.mp, "get_context", lambda method: ctx)
+    return use
+
+
+def test_frames_are_recognized_by_workers(planted, use_context):
+    roster, jpeg = planted
+    use_context(ThreadContext)
+    pool = RecognitionPool(workers=2, queue_size=4)
+    try:
+        assert pool.wait_ready(poll=0.1)
+        result = pool.submit(jpeg, "cam-1").result(timeout=10)
+        assert sorted(m["roll"] for m in result["matches"]) == sorted(r[1] for r in roster[:4])
+        assert pool.stats["completed"] == 1
+    finally:
+        pool.shutdown(timeout=5)
+
+
+def test_stale_frames_are_dropped(planted, use_context):
+    roster, jpeg = planted
+    use_context(ThreadContext)
+    pool = RecognitionPool(workers=1, queue_size=4, max_frame_age=-1.0)
+    try:
+        result = pool.submit(jpeg, "cam-1").result(timeout=10)
+        assert result["dropped"] and result["matches"] == []
+        assert pool.stats["dropped"] == 1
+    finally:
+        pool.shutdown(timeout=5)
+
+
+def test_full_queue_raises_pool_busy(use_context):
+    use_context(IdleContext)
+    pool = RecognitionPool(workers=2, queue_size=1)
+    pool.submit(b"frame", "cam-1")
+    with pytest.raises(PoolBusy):
+        pool.submit(b"frame", "cam-1")  # same camera -> same worker
+    assert pool.stats == {"submitted": 1, "rejected": 1, "dropped": 0, "completed": 0}
+    assert sorted(pool.queue_depths()) == [0, 1]
+    pool.shutdown(timeout=0)
+
+
+def test_inline_mode_has_no_pool(monkeypatch):
+    monkeypatch.setattr(recognition_pool, "RECOGNITION_WORKERS", 0)
+    assert recognition_pool.get_recognition_pool() is None
@@ -0,0 +1,103 @@
+"""Attendance rollups (database/rollups.py): incremental upkeep and rebuild()."""
+
+from datetime import datetime
+
+import pytest
+
+from benchmarks.synthetic import seed_attendance, seed_students, synthetic_roster
+from database import rollups
+from database.db_utils import get_db_connection
+from services.attendance_writer import AttendanceWriter
+
+TABLES = ("school_days", "daily_class_rollup", "student_rollup")
+
+# Who is present on each school day, written day by day through the writer
+DAYS = {
+    "2025-03-03": ["R1", "R2"],
+    "2025-03-04": ["R1", "R2", "R3"],
+    "2025-03-05": ["R1", "R2"],
+    "2025-03-06": ["R2", "R3"],
+    "2025-03-07": ["R1", "R2"],
+}
+
+
+def _dump(conn):
+    return {t: sorted(conn.execute(f"SELECT * FROM {t}").fetchall()) for t in TABLES}
+
+
+@pytest.fixture
+def marked(databases):
+    seed_students([
+        ("Ann", "R1", "Class 1", "A", None),
+        ("Bob", "R2", "Class 1", "A", None),
+        ("Cid", "R3", "Class 2", "B", None),
+    ])
+    writer = AttendanceWriter(flush_size=1000)
+    for day, rolls in DAYS.items():
+        for roll in rolls:
+            writer.submit(roll, roll, datetime.strptime(day + " 08:30", "%Y-%m-%d %H:%M"))
+        writer.flush()
+    conn = get_db_connection("attendance")
+    yield conn
+    conn.close()
+
+
+def _student(conn, roll):
+    return conn.execute(
+        "SELECT days_present, first_date, last_date, streak, best_streak"
+        " FROM student_rollup WHERE roll = ?", (roll,)).fetchone()
+
+
+def test_incremental_streaks(marked):
+    assert _student(marked, "R1") == (4, "2025-03-03", "2025-03-07", 1, 3)
+    assert _student(marked, "R2") == (5, "2025-03-03", "2025-03-07", 5, 5)
+    assert _student(marked, "R3") == (2, "2025-03-04", "2025-03-06", 1, 1)
+    assert marked.execute("SELECT present FROM daily_class_rollup WHERE date = '2025-03-04'"
+                          " AND class_name = 'Class 2'").fetchone() == (1,)
+
+
+def test_rebuild_matches_incremental(marked):
+    incremental = _dump(marked)
+    rollups.rebuild(marked)
+    assert _dump(marked) == incremental
+
+
+def test_rebuild_matches_apply_marks_on_seeded_history(databases):
+    roster = synthetic_roster(30)
+    seed_students(roster)
+    seed_attendance(roster, days=10)  # rebuilds the rollups
+    conn = get_db_connection("attendance")
+    try:
+        rebuilt = _dump(conn)
+        with conn:
+            for table in TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            marks = conn.execute("SELECT roll, date FROM attendance ORDER BY date, time").fetchall()
+            rollups.apply_marks(conn, [tuple(m) for m in marks])
+        assert _dump(conn) == rebuilt
+        assert not rollups.needs_rebuild(conn)
+    finally:
+        conn.close()
+
+
+def test_student_summary_streaks(marked):
+    summary = rollups.student_summary(marked, "R1", "2025-03-10")
+    assert summary["days_present"] == 4 and summary["school_days"] == 5
+    assert summary["percent"] == 80.0
+    assert (summary["current_streak"], summary["best_streak"]) == (1, 3)
+    # R3 missed the latest school day, so its streak is over
+    assert rollups.student_summary(marked, "R3", "2025-03-10")["current_streak"] == 0
+    assert rollups.student_summary(marked, "R9", "2025-03-10") is None
+
+
+def test_class_attendance(marked):
+    classes = rollups.class_attendance(marked, "2025-03-03", "2025-03-07",
+                                       {("Class 1", "A"): 2, ("Class 2", "B"): 1})
+    assert [(c["class_name"], c["present"], c["percent"]) for c in classes] == [
+        ("Class 1", 9, 90.0), ("Class 2", 2, 40.0)]
+
+
+def test_student_route(client, marked):
+    data = client.get("/api/dashboard/students/R2").get_json()
+    assert data["days_present"] == 5 and data["best_streak"] == 5
+    assert client.get("/api/dashboard/students/R9").status_code == 404
@@ -0,0 +1,60 @@
+"""Roster queries joining attendance.db with the attached students table."""
+
+import pytest
+
+from benchmarks.synthetic import seed_students
+from database.db_utils import get_absentees, get_arrivals, mark_attendance
+
+DAY = "2025-02-10"
+
+
+@pytest.fixture
+def roster(databases):
+    seed_students([
+        ("Ann", "R1", "Class 1", "A", None),
+        ("Bob", "R2", "Class 1", "A", None),
+        ("Cid", "R3", "Class 1", "B", None),
+        ("Dee", "R4", "Class 2", "A", None),
+    ])
+    mark_attendance("R2", "Bob", DAY, "08:05:00")
+    mark_attendance("R4", "Dee", DAY, "08:40:00")
+    mark_attendance("R1", "Ann", DAY, "09:15:00")
+    mark_attendance("R3", "Cid", "2025-02-11", "08:00:00")  # another day
+    mark_attendance("X9", "Visitor", DAY, "08:20:00")       # not on the roster
+
+
+def _rolls(rows, column):
+    return [r[column] for r in rows]
+
+
+def test_absentees(roster):
+    assert _rolls(get_absentees(DAY), 2) == ["R3"]
+    assert get_absentees(DAY, "Class 1", "B")[0][1:] == ("Cid", "R3", "Class 1", "B")
+    assert get_absentees(DAY, "Class 2") == []
+    assert _rolls(get_absentees("2025-02-12"), 2) == ["R1", "R2", "R3", "R4"]
+
+
+def test_arrivals_in_first_seen_order(roster):
+    rows = get_arrivals(DAY)
+    assert _rolls(rows, 0) == ["R2", "X9", "R4", "R1"]
+    # Marks for unknown rolls keep the name they were marked with
+    assert rows[1] == ("X9", "Visitor", None, None, "08:20:00")
+
+
+def test_late_arrivals_and_class_filter(roster):
+    assert _rolls(get_arrivals(DAY, "08:30:00"), 0) == ["R4", "R1"]
+    assert _rolls(get_arrivals(DAY, None, "Class 1"), 0) == ["R2", "R1"]
+    assert _rolls(get_arrivals(DAY, "08:30:00", "Class 1", "A"), 0) == ["R1"]
+
+
+def test_dashboard_routes(client, roster):
+    data = client.get("/api/dashboard/absentees",
+                      query_string={"date": DAY, "class_name": "Class 1"}).get_json()
+    assert data["count"] == 1 and data["students"][0]["roll"] == "R3"
+
+    data = client.get("/api/dashboard/late", query_string={"date": DAY, "after": "08:30"}).get_json()
+    assert data["after"] == "08:30:00"
+    assert [a["roll"] for a in data["arrivals"]] == ["R4", "R1"]
+
+    data = client.get("/api/dashboard/arrivals", query_string={"date": DAY}).get_json()
+    assert data["count"] == 4 and data["arrivals"][0]["first_seen"] == "08:05:00"
@@ -0,0 +1,114 @@
+"""Streaming scan (services/scan_stream.py, /scan/stream)."""
+
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+from services import scan_stream
+
+
+@pytest.fixture
+def streams(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_stream, "STREAM_LOCK_PATH", str(tmp_path / "scan_stream.lock"))
+    monkeypatch.setattr(scan_stream, "_process_lock", None)
+    monkeypatch.setattr(scan_stream, "_streams", {})
+    yield
+    if scan_stream._process_lock is not None:
+        scan_stream._process_lock.close()
+
+
+def _next_event(listener, name):
+    while True:
+        message = listener.get(timeout=10)
+        if message.startswith(f"event: {name}\n"):
+            return json.loads(message.split("data: ", 1)[1])
+
+
+def test_frame_reaches_its_cameras_stream(client, streams):
+    mine = scan_stream.get_stream("cam-1").subscribe()
+    other = scan_stream.get_stream("cam-2").subscribe()
+
+    resp = client.post("/scan/stream/frame", json={"image": "!!!", "camera_id": "cam-1", "seq": 7})
+    assert resp.status_code == 202
+    assert resp.get_json()["listeners"] == 1
+
+    event = _next_event(mine, "result")
+    assert event["seq"] == 7
+    assert event["error"] == "Could not read image."
+    with pytest.raises(queue.Empty):
+        other.get(timeout=0.2)
+
+
+def test_second_process_is_refused(client, streams):
+    # Another process holding the lock (a second flock on the file conflicts the same way)
+    held = scan_stream.lock_file(scan_stream.STREAM_LOCK_PATH)
+    try:
+        resp = client.post("/scan/stream/frame", json={"image": "!!!", "camera_id": "cam-1"})
+        assert resp.status_code == 503
+        assert client.get("/scan/stream", query_string={"camera_id": "cam-1"}).status_code == 503
+    finally:
+        held.close()
+    assert client.post("/scan/stream/frame",
+                       json={"image": "!!!", "camera_id": "cam-1"}).status_code == 202
+
+
+def test_waiting_frame_is_replaced_by_newer_one(streams, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def slow_recognize(payload, tracker_key, options):
+        seen.append(payload)
+        started.set()
+        release.wait(10)
+        return {"matches": []}
+
+    monkeypatch.setattr(scan_stream, "recognize_frame", slow_recognize)
+    stream = scan_stream.get_stream("cam-1")
+    listener = stream.subscribe()
+
+    stream.push("frame-1", {}, seq=1)
+    assert started.wait(10)
+    stream.push("frame-2", {}, seq=2)  # waits...
+    stream.push("frame-3", {}, seq=3)  # ...and is replaced by this one
+    release.set()
+
+    assert _next_event(listener, "result")["seq"] == 1
+    last = _next_event(listener, "result")
+    assert (last["seq"], last["stale"]) == (3, 1)
+    assert seen == ["frame-1", "frame-3"]
+    assert stream.stats["received"] == 3 and stream.stats["stale"] == 1
+
+
+def test_marked_students_are_announced(client, planted, streams):
+    roster, jpeg = planted
+    listener = scan_stream.get_stream("cam-mark").subscribe()
+    resp = client.post("/scan/stream/frame", data=jpeg, content_type="image/jpeg",
+                       query_string={"camera_id": "cam-mark"})
+    assert resp.status_code == 202
+
+    result = _next_event(listener, "result")
+    assert sorted(m["roll"] for m in result["matches"]) == sorted(r[1] for r in roster[:4])
+    marked = [_next_event(listener, "marked")["roll"] for _ in range(4)]
+    assert sorted(marked) == sorted(r[1] for r in roster[:4])
+
+
+def test_slow_listener_loses_oldest_events(streams, monkeypatch):
+    monkeypatch.setattr(scan_stream, "STREAM_LISTENER_BUFFER", 2)
+    stream = scan_stream.get_stream("cam-1")
+    listener = stream.subscribe()
+    for i in range(5):
+        stream.publish("result", {"seq": i})
+    assert [json.loads(listener.get_nowait().split("data: ", 1)[1])["seq"] for _ in range(2)] == [3, 4]
+
+
+def test_idle_streams_are_forgotten(streams, monkeypatch):
+    old = scan_stream.get_stream("old")
+    listened = scan_stream.get_stream("listened")
+    listened.subscribe()
+    old.last_used = listened.last_used = time.monotonic() - scan_stream.STREAM_IDLE_EXPIRY - 1
+
+    scan_stream.get_stream("new")
+    assert set(scan_stream._streams) == {"listened", "new"}
@@ -0,0 +1,81 @@
+"""Scene gate in front of detection (services/scene_gate.py)."""
+
+import cv2
+import numpy as np
+import pytest
+
+from services import face_service
+from services.scene_gate import SceneGate, thumbnail_from_bytes
+
+
+@pytest.mark.parametrize("img_bytes", [b"", b"not an image"])
+def test_thumbnail_from_unreadable_bytes(img_bytes):
+    assert thumbnail_from_bytes(img_bytes) is None
+
+
+@pytest.mark.parametrize("endpoint", ["/attendance/recognize", "/scan/frame"])
+@pytest.mark.parametrize("image", ["!!!", "data:,"])
+def test_empty_base64_frame_with_gate_on(client, monkeypatch, endpoint, image):
+    monkeypatch.setattr(face_service, "SCENE_GATE", True)
+    resp = client.post(endpoint, json={"image": image, "camera_id": "test-empty"})
+    assert resp.status_code == 200
+    assert resp.get_json()["error"] == "Could not read image."
+
+
+def _thumb(value=100):
+    return np.full((90, 160), value, dtype=np.uint8)
+
+
+def test_first_frame_is_processed_then_static_frames_reuse_it():
+    gate = SceneGate(refresh_interval=10.0)
+    assert gate.changed(_thumb(), now=0.0)
+    gate.update(_thumb(), {"matches": ["x"]}, now=0.0)
+    assert not gate.changed(_thumb(110), now=1.0)  # within SCENE_PIXEL_DELTA
+    assert gate.result == {"matches": ["x"]}
+    assert gate.stats == {"frames": 2, "static": 1, "processed": 1}
+
+
+def test_moved_pixels_over_the_fraction_count_as_a_change():
+    gate = SceneGate(pixel_delta=20, changed_fraction=0.01, refresh_interval=10.0)
+    gate.update(_thumb(), None, now=0.0)
+    moved = _thumb()
+    moved[:1, :100] = 200  # 100 of 14400 pixels, under 1%
+    assert not gate.changed(moved, now=1.0)
+    moved[:2, :] = 200     # 320 pixels, over 1%
+    assert gate.changed(moved, now=1.0)
+
+
+def test_refresh_interval_key_and_shape_force_processing():
+    gate = SceneGate(refresh_interval=5.0)
+    gate.update(_thumb(), None, key=("Class 1", "A"), now=0.0)
+    assert not gate.changed(_thumb(), key=("Class 1", "A"), now=4.9)
+    assert gate.changed(_thumb(), key=("Class 1", "A"), now=5.0)
+    assert gate.changed(_thumb(), key=("Class 2", "A"), now=1.0)
+    assert gate.changed(np.full((45, 80), 100, dtype=np.uint8), key=("Class 1", "A"), now=1.0)
+    assert gate.changed(None, key=("Class 1", "A"), now=1.0)
+    gate.reset()
+    assert gate.changed(_thumb(), now=1.0)
+
+
+def test_thumbnail_from_jpeg_matches_size():
+    jpeg = cv2.imencode(".jpg", np.full((480, 640, 3), 128, dtype=np.uint8))[1].tobytes()
+    thumb = thumbnail_from_bytes(jpeg)
+    assert thumb.shape == (90, 160) and thumb.dtype == np.uint8
+    assert abs(int(thumb.mean()) - 128) <= 2
+
+
+def test_repeated_frame_skips_detection(client, planted, monkeypatch):
+    roster, jpeg = planted
+    monkeypatch.setattr(face_service, "SCENE_GATE", True)
+    calls = []
+    detect = face_service.face_recognition.face_locations
+    monkeypatch.setattr(face_service.face_recognition, "face_locations",
+                        lambda *a, **k: calls.append(1) or detect(*a, **k))
+
+    first = client.post("/attendance/recognize", data=jpeg, content_type="image/jpeg",
+                        query_string={"camera_id": "gate"}).get_json()
+    second = client.post("/attendance/recognize", data=jpeg, content_type="image/jpeg",
+                         query_string={"camera_id": "gate"}).get_json()
+    assert len(calls) == 1
+    assert second.get("static") is True
+    assert sorted(m["roll"] for m in second["matches"]) == sorted(m["roll"] for m in first["matches"])
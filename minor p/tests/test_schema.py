@@ -0,0 +1,21 @@
+"""Schema setup and migration of existing databases (database/db_utils.py)."""
+
+import database.db_utils as db_utils
+from database.migrate_encodings import SCHEMA_VERSION, schema_version
+
+
+def test_first_connection_migrates_students_db(committed_databases):
+    conn = db_utils.get_db_connection("students")
+    try:
+        assert schema_version(conn) == SCHEMA_VERSION
+    finally:
+        conn.close()
+    assert db_utils.get_enrollment_counts()["enrolled"] == 0
+
+
+def test_students_page_without_init_databases(committed_databases):
+    from app import create_app
+
+    client = create_app(init_db=False).test_client()
+    assert client.get("/students").status_code == 200
+    assert client.get("/api/students").status_code == 200
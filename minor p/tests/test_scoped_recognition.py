@@ -0,0 +1,40 @@
+"""Class/section-scoped matching (services/face_service.py, services/gallery.py)."""
+
+import pytest
+
+from benchmarks.synthetic import seed_students, synthetic_roster
+from database.db_utils import create_scan_session
+from services import face_service
+from services.gallery import get_gallery
+
+
+@pytest.fixture
+def roster(databases):
+    roster = synthetic_roster(100)  # Class 1..10, sections A/B
+    seed_students(roster)
+    face_service._session_scopes.clear()
+    return roster
+
+
+def test_partition_holds_only_that_class(roster):
+    part = get_gallery().partition("Class 3", "A")
+    expected = [r[1] for r in roster if r[2] == "Class 3" and r[3] == "A"]
+    assert list(part.rolls) == expected
+    assert part.matrix.shape == (len(expected), 128)
+    assert len(get_gallery().partition("Class 3").rolls) == sum(r[2] == "Class 3" for r in roster)
+
+
+def test_scoped_match_then_whole_school_fallback(roster):
+    in_class = next(r for r in roster if r[2] == "Class 3")
+    elsewhere = next(r for r in roster if r[2] == "Class 7")
+    results = face_service.match_face_encodings([in_class[4], elsewhere[4]], class_name="Class 3")
+    assert results[0] == (in_class[1], in_class[0], "class")
+    assert results[1] == (elsewhere[1], elsewhere[0], "global")
+
+
+def test_resolve_scope_from_session(roster):
+    session_id = create_scan_session("Class 2", "B")
+    assert face_service.resolve_scope("Class 9", None, session_id) == ("Class 2", "B")
+    assert face_service.resolve_scope("", "") == (None, None)
+    with pytest.raises(ValueError):
+        face_service.resolve_scope(session_id="no-such-session")
@@ -0,0 +1,54 @@
+"""Lazy heavy imports and fast app startup (app.py)."""
+
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import bench_startup
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pages that must be served without OpenCV, Pillow or dlib
+CHILD = r"""
+import json, sys
+from benchmarks.synthetic import seed_attendance, seed_students, synthetic_roster, temp_databases
+with temp_databases():
+    roster = synthetic_roster(20)
+    seed_students(roster)
+    seed_attendance(roster, days=2)
+    from app import create_app
+    client = create_app().test_client()
+    codes = [client.get(path).status_code for path in (
+        "/", "/students", "/attendance_list", "/api/students", "/api/attendance",
+        "/api/dashboard/classes", "/attendance/export", "/metrics")]
+    print("RESULT " + json.dumps({
+        "codes": codes,
+        "heavy": sorted(m for m in %r if m in sys.modules),
+    }))
+"""
+
+
+def test_pages_do_not_import_recognition_stack():
+    proc = subprocess.run([sys.executable, "-c", CHILD % (bench_startup.HEAVY_MODULES,)],
+                          cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("RESULT "))
+    result = json.loads(line[len("RESULT "):])
+    assert result["codes"] == [200] * 8
+    assert result["heavy"] == []
+
+
+def test_startup_benchmark_child():
+    result = bench_startup._child_run(students=50, warm_up=False)
+    assert result["heavy_modules"] == []
+    assert result["create_app_ms"] > 0 and result["first_page_ms"] > 0
+
+
+def test_warm_up_loads_models_and_gallery(databases, planted):
+    from app import create_app
+    from services.gallery import get_gallery
+
+    roster, _ = planted
+    create_app(init_db=False, warm_up=True)
+    assert len(get_gallery()) == len(roster)
+    assert get_gallery().stats["reloads"] == 1
@@ -0,0 +1,64 @@
+"""Face tracking across frames (services/tracker.py)."""
+
+import numpy as np
+
+from config import TRACK_REVERIFY_INTERVAL, TRACK_TTL, TRACK_UNKNOWN_RETRY
+from services.tracker import FaceTracker, get_tracker, iou_matrix
+
+BOX_A = (100, 200, 200, 100)  # (top, right, bottom, left)
+BOX_B = (100, 500, 200, 400)
+
+
+def _resolve_all(tracker, tracks, to_encode, identity, now):
+    for i in to_encode:
+        tracker.resolve(tracks[i], identity, now)
+
+
+def test_iou_matrix():
+    iou = iou_matrix([BOX_A, BOX_B], [BOX_A, (100, 250, 200, 150)])
+    np.testing.assert_allclose(iou, [[1.0, 1 / 3], [0.0, 0.0]])
+
+
+def test_known_faces_are_not_re_encoded():
+    tracker = FaceTracker()
+    tracks, to_encode = tracker.step([BOX_A, BOX_B], now=0.0)
+    assert to_encode == [0, 1]
+    _resolve_all(tracker, tracks, to_encode, ("R1", "A", "global"), 0.0)
+
+    nudged = (102, 203, 202, 103)
+    tracks2, to_encode = tracker.step([BOX_B, nudged], now=1.0)
+    assert to_encode == []
+    assert [t.id for t in tracks2] == [tracks[1].id, tracks[0].id]
+    assert tracker.stats == {"faces": 4, "encoded": 2, "reused": 2}
+
+
+def test_drift_reverify_and_unknown_retry():
+    tracker = FaceTracker()
+    tracks, to_encode = tracker.step([BOX_A, BOX_B], now=0.0)
+    tracker.resolve(tracks[0], ("R1", "A", "global"), 0.0)
+    tracker.resolve(tracks[1], None, 0.0)  # unknown face
+
+    # Still within the unknown retry interval; a big move re-encodes the known face
+    moved = (100, 240, 200, 140)
+    _, to_encode = tracker.step([moved, BOX_B], now=TRACK_UNKNOWN_RETRY / 2)
+    assert to_encode == [0]
+    tracker.resolve(tracks[0], ("R1", "A", "global"), TRACK_UNKNOWN_RETRY / 2)
+
+    _, to_encode = tracker.step([moved, BOX_B], now=TRACK_UNKNOWN_RETRY)
+    assert to_encode == [1]
+
+    _, to_encode = tracker.step([moved, BOX_B], now=TRACK_REVERIFY_INTERVAL + 1)
+    assert 0 in to_encode
+
+
+def test_unseen_tracks_expire():
+    tracker = FaceTracker()
+    tracks, _ = tracker.step([BOX_A], now=0.0)
+    tracker.step([], now=TRACK_TTL + 0.1)
+    new_tracks, to_encode = tracker.step([BOX_A], now=TRACK_TTL + 0.2)
+    assert new_tracks[0].id != tracks[0].id and to_encode == [0]
+
+
+def test_one_tracker_per_camera():
+    assert get_tracker("cam-test-1") is get_tracker("cam-test-1")
+    assert get_tracker("cam-test-1") is not get_tracker("cam-test-2")